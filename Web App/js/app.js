@@ -2,7 +2,7 @@
  * Eco-BJJ Class Creator Logic
  */
 
-import { markedParse } from './utils.js';
+import { markedParse, conceptImagesHtml, pageName } from './utils.js';
 
 // Data State
 let state = {
@@ -27,7 +27,9 @@ const CLASS_TEMPLATE = [
 
 async function init() {
     try {
-        const response = await fetch('data/content.json?v=' + Date.now()); // Cache bust
+        // Slim catalog first; concept markdown and game descriptions are fetched on demand.
+        // Revalidate with the server's ETag; an unchanged catalog comes back as a tiny 304
+        const response = await fetch('data/catalog.json', { cache: 'no-cache' });
         if (!response.ok) throw new Error('Failed to load content');
 
         state.content = await response.json();
@@ -42,12 +44,118 @@ async function init() {
         }
 
         setupEventListeners();
+        subscribeToChanges();
     } catch (error) {
         console.error('Initialization error:', error);
         alert('Error loading content. Please ensure python http server is running.');
     }
 }
 
+// Live updates: the server pushes content index changes over /api/events, so saves made
+// here or in another browser patch state.content in place instead of refetching the catalog
+function subscribeToChanges() {
+    if (!window.EventSource) return;
+    const source = new EventSource('/api/events');
+    source.addEventListener('change', (e) => {
+        applyChanges(JSON.parse(e.data).changes);
+        refreshView();
+    });
+    // Sent after a full rebuild, or when changes were missed while disconnected
+    source.addEventListener('reset', reloadCatalog);
+}
+
+async function reloadCatalog() {
+    try {
+        const response = await fetch('data/catalog.json', { cache: 'no-cache' });
+        if (!response.ok) return;
+        state.content = await response.json();
+        refreshView();
+    } catch (error) {
+        console.error('Error reloading catalog:', error);
+    }
+}
+
+function applyChanges(changes) {
+    changes.forEach(change => {
+        const list = change.kind === 'concept' ? state.content.concepts : state.content.games;
+        const idx = list.findIndex(item => item.id === change.id);
+
+        if (change.kind === 'game') {
+            state.content.categories.forEach(cat => {
+                cat.games = cat.games.filter(id => id !== change.id);
+            });
+        }
+
+        if (change.action === 'removed') {
+            if (idx !== -1) list.splice(idx, 1);
+            return;
+        }
+
+        // Catalog fields only; the detail document is fetched again when next needed
+        if (idx !== -1) {
+            list[idx] = change.data;
+        } else {
+            list.push(change.data);
+        }
+
+        if (change.kind === 'game') {
+            const category = change.data.category;
+            let catObj = state.content.categories.find(c => c.title === category);
+            if (!catObj) {
+                catObj = {
+                    id: category.toLowerCase().replace(/ /g, "-"),
+                    title: category,
+                    description: "",
+                    games: []
+                };
+                state.content.categories.push(catObj);
+            }
+            catObj.games.push(change.id);
+        }
+    });
+}
+
+// Re-render the concept picker and class preview from state.content
+function refreshView() {
+    renderConceptSelect();
+    const select = document.getElementById('concept-select');
+    const selected = state.content.concepts.some(c => c.id === state.selectedConceptId);
+    if (selected) {
+        select.value = state.selectedConceptId;
+        generateClassStructure();
+    }
+}
+
+// Fetch a concept or game detail document and merge it into the catalog entry
+async function fetchDetail(kind, item) {
+    if (item.detailLoaded) return;
+    try {
+        const response = await fetch(`data/${kind}/${encodeURIComponent(pageName(item.id))}.json`, { cache: 'no-cache' });
+        if (response.ok) {
+            Object.assign(item, await response.json());
+        }
+    } catch (error) {
+        console.error(`Error loading ${kind} detail:`, error);
+    }
+    item.detailLoaded = true;
+}
+window.fetchDetail = fetchDetail;
+
+// Details the class view needs: the concept text/images and every slotted game's description.
+// Returns a promise if anything still has to be fetched, otherwise null.
+function loadDetails(concept) {
+    const pending = [];
+    if (concept && !concept.detailLoaded) pending.push(fetchDetail('concepts', concept));
+    Object.values(state.segments).forEach(slots => {
+        if (!Array.isArray(slots)) return;
+        slots.forEach(slot => {
+            const game = state.content.games.find(x => x.id === slot.gameId);
+            if (game && !game.detailLoaded) pending.push(fetchDetail('games', game));
+        });
+    });
+    return pending.length ? Promise.all(pending) : null;
+}
+
 function getFormattedTitle() {
     const dateInput = document.getElementById('class-date-input');
     let dateStr = '';
@@ -163,6 +271,11 @@ if (dateInput) {
     if (loadBtn) {
         loadBtn.addEventListener('click', loadClass);
     }
+
+    const suggestBtn = document.getElementById('suggest-plan-btn');
+    if (suggestBtn) {
+        suggestBtn.addEventListener('click', suggestPlan);
+    }
 }
 
 async function saveClass() {
@@ -189,17 +302,31 @@ async function saveClass() {
 
     console.log("Saving class:", classData);
 
+    // Saving over the class we loaded (or last saved) must start from its current version;
+    // any other name must not exist yet, unless the coach confirms the overwrite
+    const sendSave = (baseVersion) => fetch('/api/save_class', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ name: fileName, data: classData, baseVersion: baseVersion })
+    });
+
     try {
-        const response = await fetch('/api/save_class', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                name: fileName,
-                data: classData
-            })
-        });
+        const base = state.classFile === fileName ? state.classVersion : null;
+        let response = await sendSave(base);
+
+        if (response.status === 409) {
+            const conflict = await response.json();
+            const question = base
+                ? "This class was changed on another device since you loaded it. Overwrite their changes?"
+                : "A class with this name already exists. Overwrite it?";
+            if (!confirm(question)) return;
+            response = await sendSave(conflict.version);
+        }
 
         if (response.ok) {
+            const result = await response.json();
+            state.classFile = fileName;
+            state.classVersion = result.version;
             alert('Class saved successfully!');
         } else {
             alert('Error saving class');
@@ -259,6 +386,8 @@ async function loadClass() {
                     const loadedData = result.data;
 
                     // Restore State
+                    state.classFile = selectedName;
+                    state.classVersion = result.version;
                     state.classTitle = loadedData.title || selectedName;
                     state.selectedConceptId = loadedData.conceptId;
                     state.segments = loadedData.segments || {};
@@ -288,10 +417,89 @@ async function loadClass() {
 
 
 
+async function suggestPlan() {
+    if (!state.selectedConceptId) {
+        alert("Please select a concept first.");
+        return;
+    }
+
+    const existing = document.querySelector('.modal-overlay');
+    if (existing) existing.remove();
+
+    const overlay = document.createElement('div');
+    overlay.className = 'modal-overlay';
+    overlay.innerHTML = `
+        <div class="modal">
+            <div class="modal-header">
+                <h3>Suggest Plan</h3>
+                <button onclick="this.closest('.modal-overlay').remove()">×</button>
+            </div>
+            <div class="modal-body">
+                <label for="plan-minutes">Class length (minutes)</label>
+                <input type="number" id="plan-minutes" value="90" min="80" step="5" style="width: 100%; padding: 10px; margin-bottom: 10px;">
+                <label><input type="checkbox" id="plan-avoid-recent" checked> Avoid games from recent classes</label>
+                <div style="text-align: right; margin: 10px 0;">
+                    <button class="btn primary" id="run-plan-btn">Suggest</button>
+                </div>
+                <div id="plan-results"></div>
+            </div>
+        </div>
+    `;
+    document.body.appendChild(overlay);
+
+    const results = document.getElementById('plan-results');
+    document.getElementById('run-plan-btn').onclick = async () => {
+        const minutes = document.getElementById('plan-minutes').value;
+        const recent = document.getElementById('plan-avoid-recent').checked ? 5 : 0;
+        const params = new URLSearchParams({ concept: state.selectedConceptId, minutes, recent });
+        results.textContent = 'Planning...';
+
+        try {
+            const res = await fetch(`/api/plan?${params}`);
+            if (!res.ok) {
+                results.textContent = `Could not plan this class (${res.status})`;
+                return;
+            }
+            const data = await res.json();
+            const gameTitle = (id) => (state.content.games.find(g => g.id === id) || { title: id }).title;
+
+            results.innerHTML = data.plans.map((plan, i) => `
+                <div class="plan-option" style="border-top: 1px solid #ddd; padding: 10px 0;">
+                    <strong>Option ${plan.rank}</strong> (${plan.minutes.rolling} min free roll)
+                    <ul>
+                        ${CLASS_TEMPLATE.filter(s => (plan.segments[s.id] || []).length).map(s =>
+                            `<li>${s.title}: ${plan.segments[s.id].map(slot => gameTitle(slot.gameId)).join(', ')}</li>`).join('')}
+                    </ul>
+                    ${plan.warnings.map(w => `<p class="subtitle">${w}</p>`).join('')}
+                    <button class="btn secondary use-plan-btn" data-index="${i}">Use this plan</button>
+                </div>
+            `).join('') || 'No plan fits this class length.';
+
+            results.querySelectorAll('.use-plan-btn').forEach(btn => {
+                btn.onclick = () => {
+                    state.segments = data.plans[btn.dataset.index].segments;
+                    generateClassStructure();
+                    overlay.remove();
+                };
+            });
+        } catch (e) {
+            console.error(e);
+            results.textContent = 'Error planning class';
+        }
+    };
+}
+
 function generateClassStructure() {
     const concept = state.content.concepts.find(t => t.id === state.selectedConceptId);
     if (!concept) return;
 
+    // Render once the concept text and slotted game descriptions have arrived
+    const pendingDetails = loadDetails(concept);
+    if (pendingDetails) {
+        pendingDetails.then(generateClassStructure);
+        return;
+    }
+
     // Show panels
     document.getElementById('preview-panel').classList.remove('hidden');
     document.getElementById('class-meta').classList.remove('hidden');
@@ -364,12 +572,7 @@ function generateClassStructure() {
 
         if (segment.type === 'discussion') {
             // Inject Concept Content here
-            let imagesHtml = '';
-            if (concept.images && concept.images.length > 0) {
-                imagesHtml = `<div class="theory-images">
-                ${concept.images.map(img => `<img src="${img}" alt="Concept Image" loading="lazy">`).join('')}
-                </div>`;
-            }
+            const imagesHtml = conceptImagesHtml(concept);
 
             contentHtml = `
                 <details class="game-card" open>
@@ -654,6 +857,7 @@ window.openGamePicker = (segmentId) => {
 function createModal(segmentId, filterCategory = null) {
     const existing = document.querySelector('.modal-overlay');
     if (existing) existing.remove();
+    pickerBrowseHtml = null;
 
     const overlay = document.createElement('div');
     overlay.className = 'modal-overlay';
@@ -709,12 +913,14 @@ function createModal(segmentId, filterCategory = null) {
                 </div>
             </div>
             <div class="modal-subheader" style="padding: 10px; border-bottom: 1px solid #333;">
+                <input type="search" id="picker-search" placeholder="Search games..." autocomplete="off"
+                       oninput="window.searchPicker('${segmentId}', this.value)" style="width: 100%; padding: 8px; margin-bottom: 8px;">
                 <select id="picker-concept-filter" onchange="window.filterPicker('${segmentId}', this.value)" style="width: 100%; padding: 8px;">
                      <option value="All">All Concepts</option>
                      ${conceptOptions}
                 </select>
             </div>
-            <div class="modal-body">
+            <div class="modal-body" id="picker-body">
                 ${contentHtml}
             </div>
         </div >
@@ -727,6 +933,38 @@ window.filterPicker = (segmentId, category) => {
     createModal(segmentId, category);
 };
 
+// Server-side search (/api/search) replaces the picker list while a query is typed
+let pickerSearchTimer = null;
+let pickerBrowseHtml = null;
+window.searchPicker = (segmentId, query) => {
+    clearTimeout(pickerSearchTimer);
+    pickerSearchTimer = setTimeout(async () => {
+        const body = document.getElementById('picker-body');
+        if (!body) return;
+        if (pickerBrowseHtml === null) pickerBrowseHtml = body.innerHTML;
+
+        if (!query.trim()) {
+            body.innerHTML = pickerBrowseHtml;
+            pickerBrowseHtml = null;
+            return;
+        }
+
+        try {
+            const response = await fetch(`/api/search?kind=game&limit=50&q=${encodeURIComponent(query)}`);
+            if (!response.ok) throw new Error(await response.text());
+            const result = await response.json();
+            const games = result.results
+                .map(r => state.content.games.find(g => g.id === r.id))
+                .filter(Boolean);
+            body.innerHTML = games.length
+                ? renderGameOptions(games, segmentId)
+                : '<p class="segment-note">No matching games.</p>';
+        } catch (e) {
+            console.error('Search error:', e);
+        }
+    }, 150);
+};
+
 function renderGameOptions(games, segmentId) {
     return games.map(game => `
                 <div class="game-option" onclick="selectGame('${game.id}', '${segmentId}')">
@@ -762,6 +1000,18 @@ import { Editor } from './editor.js';
 
 // Game Editor Modal
 window.openGameModal = (gameId = null, preselectedCategory = null, templateGame = null, segmentId = null) => {
+    // Descriptions aren't in the slim catalog; fetch the game (and its parent) before building the form
+    const baseGame = gameId ? window.state.content.games.find(g => g.id === gameId) : templateGame;
+    if (baseGame) {
+        const parent = baseGame.parentId ? window.state.content.games.find(g => g.id === baseGame.parentId) : null;
+        const missing = [baseGame, parent].filter(g => g && !g.detailLoaded);
+        if (missing.length) {
+            Promise.all(missing.map(g => fetchDetail('games', g)))
+                .then(() => window.openGameModal(gameId, preselectedCategory, templateGame, segmentId));
+            return;
+        }
+    }
+
     // Remove existing modal
     const existing = document.querySelector('.modal-overlay');
     if (existing) existing.remove();
@@ -791,9 +1041,16 @@ window.openGameModal = (gameId = null, preselectedCategory = null, templateGame
         };
     }
 
+    // The server resolves inheritance; fields listed in game.inherited came from an ancestor
+    const ownVal = (field) => {
+        if (!game || (game.inherited && game.inherited[field])) return undefined;
+        return game[field];
+    };
+
     // Helper to get value: Child -> Parent -> Default
     const getVal = (field, def = '') => {
-        if (game && game[field] !== undefined && game[field] !== '') return game[field];
+        const own = ownVal(field);
+        if (own !== undefined && own !== null && own !== '') return own;
         if (parentGame && parentGame[field]) return parentGame[field];
         return def;
     };
@@ -801,7 +1058,8 @@ window.openGameModal = (gameId = null, preselectedCategory = null, templateGame
     // Helper to check if overridden
     const isOverridden = (field) => {
         if (!parentGame) return true; // No parent = always editable
-        return (game && game[field] !== undefined && game[field] !== '');
+        const own = ownVal(field);
+        return own !== undefined && own !== null && own !== '';
     };
 
     // Helper to render fields with toggle
@@ -1037,6 +1295,7 @@ window.submitGameForm = async (isEdit) => {
                 intensity: intensity,
                 difficulty: difficulty,
                 initiation: initiation,
+                parentId: gameParentId || null,
                 overwrite: allowOverwrite // Use passed flag
             };
 
@@ -1072,7 +1331,8 @@ window.submitGameForm = async (isEdit) => {
                     duration: duration,
                     difficulty: difficulty,
                     initiation: initiation,
-                    parentId: gameParentId || null
+                    parentId: gameParentId || null,
+                    detailLoaded: true
                 };
 
                 if (isEdit) {
@@ -1177,6 +1437,11 @@ window.deleteConcept = async (conceptId) => {
 
 window.openConceptModal = (conceptId = null) => {
     console.log("openConceptModal called with ID:", conceptId);
+    const target = conceptId ? window.state.content.concepts.find(c => c.id === conceptId) : null;
+    if (target && !target.detailLoaded) {
+        fetchDetail('concepts', target).then(() => window.openConceptModal(conceptId));
+        return;
+    }
     const existing = document.querySelector('.modal-overlay');
     if (existing) existing.remove();
 
@@ -3,6 +3,8 @@
  * Handles granular content editing for Games and Theories.
  */
 
+import { conceptImagesHtml } from './utils.js';
+
 export class Editor {
     constructor() {
         this.activeEditors = new Map(); // Track open editors
@@ -59,7 +61,7 @@ export class Editor {
 
         const theory = window.state.content.theories.find(t => t.id === window.state.selectedTheoryId);
 
-        await this.saveToFile(theory.path, newContent, () => {
+        await this.saveToFile(theory.path, newContent, theory, () => {
             // Update State
             theory.content = newContent;
 
@@ -67,12 +69,7 @@ export class Editor {
             // Re-render discussion content (description + images)
             // Ideally we should re-use app.js rendering logic or just simple parse
             // Let's assume images haven't changed for now, or re-render them if we can access them
-            let imagesHtml = '';
-            if (theory.images && theory.images.length > 0) {
-                imagesHtml = `<div class="theory-images">
-                    ${theory.images.map(img => `<img src="${img}" alt="Theory Image" loading="lazy">`).join('')}
-                </div>`;
-            }
+            const imagesHtml = conceptImagesHtml(theory, 'Theory Image');
 
             container.innerHTML = `
                 ${window.markedParse(newContent)}
@@ -133,7 +130,7 @@ players: ${game.players || 2}
 `;
             const fullContent = frontmatter + newContent;
 
-            await this.saveToFile(game.path, fullContent, () => {
+            await this.saveToFile(game.path, fullContent, game, () => {
                 // Update State
                 game.description = newContent;
 
@@ -168,20 +165,25 @@ players: ${game.players || 2}
         }
     }
 
-    async saveToFile(path, content, onSuccess) {
+    // item is the concept/game being saved; its version lets the server reject a stale overwrite
+    async saveToFile(path, content, item, onSuccess) {
         try {
+            const payload = { path: path, content: content };
+            if (item && item.version) payload.baseVersion = item.version;
+
             const response = await fetch('/api/save', {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({
-                    path: path,
-                    content: content
-                })
+                body: JSON.stringify(payload)
             });
 
             if (response.ok) {
+                const result = await response.json();
+                if (item) item.version = result.version;
                 // Success - Execute callback for UI update
                 if (onSuccess) onSuccess();
+            } else if (response.status === 409) {
+                alert("This file was changed on another device since you opened it. Reload the page to get the latest version, then reapply your edit.");
             } else {
                 alert("Server Error: " + await response.text());
             }
@@ -13,3 +13,33 @@ export function markedParse(text) {
         .replace(/\*\*(.*)\*\*/gim, '<strong>$1</strong>')
         .replace(/\n/gim, '<br>');
 }
+
+// Device names Windows won't create a file under, whatever the extension
+const WINDOWS_RESERVED = new Set(['CON', 'PRN', 'AUX', 'NUL',
+    ...[1, 2, 3, 4, 5, 6, 7, 8, 9].flatMap(n => [`COM${n}`, `LPT${n}`])]);
+
+const percentByte = c => '%' + c.charCodeAt(0).toString(16).toUpperCase().padStart(2, '0');
+
+// File name of an id's detail document (data/<kind>/<name>.json); same rule as page_name in scripts/export_site.py
+export function pageName(id) {
+    let name = encodeURIComponent(id).replace(/[!'()*]/g, percentByte);
+    if (name.endsWith('.')) name = name.slice(0, -1) + '%2E';
+    if (WINDOWS_RESERVED.has(name.split('.')[0].toUpperCase())) name = percentByte(name[0]) + name.slice(1);
+    return name;
+}
+
+// Rendered width of concept images (see .theory-images img); lets the browser pick a srcset variant
+const CONCEPT_IMAGE_SIZES = '320px';
+
+// Concept image strip; uses the generator's resized WebP variants when it made them
+export function conceptImagesHtml(concept, alt = 'Concept Image') {
+    if (!concept.images || concept.images.length === 0) return '';
+    const variants = concept.imageVariants || {};
+    return `<div class="theory-images">
+        ${concept.images.map(img => {
+            const v = variants[img];
+            const extra = v ? ` srcset="${v.srcset}" sizes="${CONCEPT_IMAGE_SIZES}" width="${v.width}" height="${v.height}"` : '';
+            return `<img src="${img}"${extra} alt="${alt}" loading="lazy">`;
+        }).join('')}
+    </div>`;
+}
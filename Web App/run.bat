@@ -8,4 +8,4 @@ echo Opening http://localhost:8000 in browser...
 start http://localhost:8000
 
 echo Starting Eco-BJJ Server...
-python server.py
+python server.py --watch
@@ -19,5 +19,5 @@ fi
 
 # Start Server
 echo "Starting Eco-BJJ Server..."
-python3 server.py
+python3 server.py --watch
 
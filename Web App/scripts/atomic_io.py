@@ -0,0 +1,54 @@
+import os
+import hashlib
+import tempfile
+
+# mkstemp creates files 0600; new files should get the usual permissions instead.
+# Read once at import, since os.umask can only be read by setting it.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+def file_version(path):
+    """Content hash identifying the current revision of a file, or None if it doesn't exist."""
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()[:16]
+    except FileNotFoundError:
+        return None
+
+def atomic_write(path, text):
+    """
+    Replaces path with text so readers (and a crash) only ever see the old or
+    the new file, never a truncated one: write a temp file in the same
+    directory, fsync it, then os.replace it over the target.
+    Returns the new file_version.
+    """
+    directory = os.path.dirname(path) or '.'
+    # Dot-prefixed with a .tmp suffix so the content scanners never mistake it for a .md/.json file
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            try:
+                mode = os.stat(path).st_mode & 0o777
+            except FileNotFoundError:
+                mode = 0o666 & ~_UMASK
+            os.chmod(tmp_path, mode)
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    # Persist the rename itself; directories can't be opened for fsync on Windows
+    if hasattr(os, 'O_DIRECTORY'):
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+    return file_version(path)
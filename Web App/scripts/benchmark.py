@@ -0,0 +1,824 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import builtins
+import contextlib
+import platform
+import tempfile
+import threading
+import subprocess
+import http.client
+from collections import Counter
+from urllib.parse import quote
+
+# Paths relative to this script
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+WEB_APP_DIR = os.path.abspath(os.path.join(BASE_DIR, '..'))
+sys.path.insert(0, BASE_DIR)
+
+from generate_content import ContentIndex
+from parse_cache import ParseCache
+from search_index import SearchIndex
+from class_store import ClassStore
+from class_planner import ClassPlanner
+from game_records import deep_size
+from metrics import process_memory
+
+# A few bytes is enough; the pipeline only lists images, it never decodes them
+FAKE_JPEG = b'\xff\xd8\xff\xe0' + b'\0' * 256 + b'\xff\xd9'
+
+def make_synthetic_tree(root, concepts, games_per_concept, images_per_concept=2, variation_every=10,
+                        parent_every=0, description_bytes=0):
+    """
+    Writes a Concepts/ tree of concepts x games_per_concept games under root.
+    Every variation_every-th game goes into a nested Games/<Variations>/ folder,
+    like Concepts/Mobility/Games/Butterfly/, and every parent_every-th game
+    inherits from the game before it via parent_id. description_bytes pads
+    each game's body to about that size. Returns the Concepts directory.
+    """
+    filler = "The defender frames, recovers guard and resets the grips before the next exchange. "
+    concepts_dir = os.path.join(root, 'Concepts')
+    for c in range(concepts):
+        name = f"Concept{c:04d}"
+        concept_path = os.path.join(concepts_dir, name)
+        games_dir = os.path.join(concept_path, 'Games')
+        os.makedirs(games_dir)
+
+        with open(os.path.join(concept_path, f"{name}.md"), 'w', encoding='utf-8') as f:
+            f.write(f"# {name}\n\nSynthetic concept {c} for benchmarking.\n")
+        for i in range(images_per_concept):
+            with open(os.path.join(concept_path, f"diagram{i}.jpg"), 'wb') as f:
+                f.write(FAKE_JPEG)
+
+        for g in range(games_per_concept):
+            folder = games_dir
+            if variation_every and g % variation_every == variation_every - 1:
+                folder = os.path.join(games_dir, f"Variations{g // variation_every}")
+                os.makedirs(folder, exist_ok=True)
+            parent = ''
+            if parent_every and g and g % parent_every == 0:
+                parent = f"parent_id: {name.lower()}-game-{c}-{g - 1}\n"
+            with open(os.path.join(folder, f"Game{g:05d}.md"), 'w', encoding='utf-8') as f:
+                f.write(
+                    "---\n"
+                    f"title: Game {c}-{g}\n"
+                    f"{parent}"
+                    f"category: {name}\n"
+                    "players: 2\n"
+                    f"duration: {1 + g % 5}\n"
+                    "type: Round Switching\n"
+                    f"intensity: {('Flow', 'Cooperative', 'Adversarial')[g % 3]}\n"
+                    f"goals: Reach position {g} without losing the grip.\n"
+                    "---\n\n"
+                    f"Starting from position {g}, the attacker works for control.\n"
+                    + filler * (description_bytes // len(filler)) + "\n"
+                )
+    return concepts_dir
+
+class _CountingEntry:
+    """DirEntry proxy that counts the stat() syscall the first time it is made."""
+
+    def __init__(self, entry, counts):
+        self._entry = entry
+        self._counts = counts
+        self._stat = None
+        self.name = entry.name
+        self.path = entry.path
+
+    def is_dir(self, **kwargs):
+        return self._entry.is_dir(**kwargs)
+
+    def is_file(self, **kwargs):
+        return self._entry.is_file(**kwargs)
+
+    def stat(self, **kwargs):
+        if self._stat is None:
+            self._counts['stat'] += 1
+            self._stat = self._entry.stat(**kwargs)
+        return self._stat
+
+class _CountingScandir:
+    def __init__(self, it, counts):
+        self._it = it
+        self._counts = counts
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._it.close()
+
+    def __iter__(self):
+        return (_CountingEntry(entry, self._counts) for entry in self._it)
+
+class FsCallCounter:
+    """Counts filesystem calls (listdir, scandir, stat, open) made inside the with block."""
+
+    def __init__(self):
+        self.counts = Counter()
+
+    def __enter__(self):
+        self._originals = (os.listdir, os.scandir, os.stat, builtins.open)
+        listdir, scandir, stat, open_ = self._originals
+        counts = self.counts
+
+        def counting_listdir(*args, **kwargs):
+            counts['listdir'] += 1
+            return listdir(*args, **kwargs)
+
+        def counting_scandir(*args, **kwargs):
+            counts['scandir'] += 1
+            return _CountingScandir(scandir(*args, **kwargs), counts)
+
+        def counting_stat(*args, **kwargs):
+            counts['stat'] += 1
+            return stat(*args, **kwargs)
+
+        def counting_open(*args, **kwargs):
+            counts['open'] += 1
+            return open_(*args, **kwargs)
+
+        os.listdir, os.scandir, os.stat, builtins.open = (
+            counting_listdir, counting_scandir, counting_stat, counting_open)
+        return self
+
+    def __exit__(self, *exc):
+        os.listdir, os.scandir, os.stat, builtins.open = self._originals
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+def legacy_discovery(concepts_dir, cache):
+    """
+    The pre-scandir tree walk: get_concepts() and get_categories_and_games()
+    each listdir the tree, re-list concept folders for images, probe paths with
+    exists/isdir, and stat every file for its parse cache lookup. Games/ is flat.
+    """
+    files = []
+    for concept_name in os.listdir(concepts_dir):
+        concept_path = os.path.join(concepts_dir, concept_name)
+        if os.path.isdir(concept_path):
+            md_file = os.path.join(concept_path, f"{concept_name}.md")
+            if not os.path.exists(md_file):
+                continue
+            cache.get(md_file, os.stat(md_file))
+            files.append(md_file)
+            [f for f in os.listdir(concept_path) if f.lower().endswith(('.jpg', '.png'))]
+
+    for concept_name in os.listdir(concepts_dir):
+        concept_path = os.path.join(concepts_dir, concept_name)
+        if not os.path.isdir(concept_path):
+            continue
+        games_dir = os.path.join(concept_path, 'Games')
+        if not os.path.exists(games_dir):
+            continue
+        for file in os.listdir(games_dir):
+            if file.endswith('.md'):
+                path = os.path.join(games_dir, file)
+                cache.get(path, os.stat(path))
+                files.append(path)
+    return files
+
+def bench_walk(args):
+    """Filesystem calls and wall time of one warm-cache index build vs the legacy walk."""
+    workdir = tempfile.mkdtemp(prefix='eco-bench-')
+    try:
+        concepts_dir = make_synthetic_tree(workdir, args.concepts, args.games,
+                                           variation_every=args.variation_every)
+        cache = ParseCache(os.path.join(workdir, 'parse_cache.sqlite'))
+        ContentIndex(concepts_dir, cache=cache).build()  # warm the parse cache
+
+        # Counted and timed separately: the counting proxies add their own overhead
+        with FsCallCounter() as legacy:
+            legacy_files = legacy_discovery(concepts_dir, cache)
+        start = time.perf_counter()
+        legacy_discovery(concepts_dir, cache)
+        legacy_time = time.perf_counter() - start
+
+        with FsCallCounter() as single:
+            ContentIndex(concepts_dir, cache=cache).build()
+        index = ContentIndex(concepts_dir, cache=cache)
+        start = time.perf_counter()
+        index.build()
+        single_time = time.perf_counter() - start
+        cache.close()
+
+        results = {
+            'concepts': args.concepts,
+            'games_on_disk': args.concepts * args.games,
+            'legacy': {'files_found': len(legacy_files), 'calls': dict(legacy.counts),
+                       'total_calls': legacy.total, 'seconds': legacy_time},
+            'single_pass': {'files_found': len(index.games) + len(index.concepts), 'calls': dict(single.counts),
+                            'total_calls': single.total, 'seconds': single_time},
+        }
+    finally:
+        shutil.rmtree(workdir)
+
+    for name in ('legacy', 'single_pass'):
+        r = results[name]
+        calls = ', '.join(f"{k}={v}" for k, v in sorted(r['calls'].items()))
+        print(f"{name:>12}: {r['files_found']:>6} files, {r['total_calls']:>6} fs calls ({calls}), "
+              f"{r['total_calls'] / max(r['files_found'], 1):.3f} calls/file, {r['seconds'] * 1000:.1f} ms")
+    return results
+
+def bench_search(args):
+    """Query latency of the inverted index over a synthetic library, plus one incremental update."""
+    workdir = tempfile.mkdtemp(prefix='eco-bench-')
+    try:
+        concepts_dir = make_synthetic_tree(workdir, args.concepts, args.games)
+        index = ContentIndex(concepts_dir)
+        search = SearchIndex()
+        search.attach(index)
+        start = time.perf_counter()
+        index.build()
+        build_time = time.perf_counter() - start
+        # Descriptions stay on disk (see game_records.Description), so indexing reads each game file back
+        start = time.perf_counter()
+        for game in index.game_list():
+            game.get('description')
+        read_time = time.perf_counter() - start
+
+        queries = ['game', 'position 42', 'grip', 'attack contr', 'concept0001', 'reach position 7 without']
+        timings = {}
+        for query in queries:
+            runs = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                result = search.search(query, kind='game')
+                runs.append(time.perf_counter() - start)
+            runs.sort()
+            timings[query] = {'total': result['total'], 'median_ms': runs[len(runs) // 2] * 1000}
+
+        # One saved game: the index is patched, not rebuilt
+        path = next(iter(index.games))
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write("\nNew drill: knee slice finish.\n")
+        start = time.perf_counter()
+        index.refresh_path(path)
+        update_time = time.perf_counter() - start
+    finally:
+        shutil.rmtree(workdir)
+
+    results = {
+        'games': len(index.games),
+        'build_seconds': build_time,
+        'description_read_seconds': read_time,
+        'incremental_update_ms': update_time * 1000,
+        'queries': timings,
+    }
+    print(f"{results['games']} games indexed in {build_time:.2f} s; one saved game reindexed in "
+          f"{results['incremental_update_ms']:.2f} ms")
+    print(f"  reading every description back from disk: {read_time * 1000:.0f} ms")
+    for query, t in timings.items():
+        print(f"  {query!r:>28}: {t['total']:>6} hits, {t['median_ms']:.2f} ms")
+    return results
+
+def bench_classes(args):
+    """Class store sync time and query latency over N synthetic saved classes (one per evening)."""
+    workdir = tempfile.mkdtemp(prefix='eco-bench-')
+    try:
+        classes_dir = os.path.join(workdir, 'Saved Classes')
+        os.makedirs(classes_dir)
+        for i in range(args.classes):
+            day = time.strftime('%Y-%m-%d', time.gmtime(1577836800 + i * 86400))
+            segments = {seg: [{'gameId': f"game-{(i * 7 + s * 3 + k) % args.game_pool}"} for k in range(2)]
+                        for s, seg in enumerate(('standing', 'mobility', 'takedowns', 'applications'))}
+            with open(os.path.join(classes_dir, f"Evening_Class_{day}.json"), 'w', encoding='utf-8') as f:
+                json.dump({'title': 'Evening Class', 'date': day, 'conceptId': f"concept-{i % 20}",
+                           'segments': segments}, f)
+
+        store = ClassStore(classes_dir, os.path.join(workdir, 'class_index.sqlite'))
+        start = time.perf_counter()
+        store.sync()
+        sync_time = time.perf_counter() - start
+
+        def median_ms(fn):
+            runs = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                fn()
+                runs.append(time.perf_counter() - start)
+            runs.sort()
+            return runs[len(runs) // 2] * 1000
+
+        timings = {
+            'names': median_ms(store.names),
+            'by_concept': median_ms(lambda: store.list(concept_id='concept-3', limit=20)),
+            'date_range': median_ms(lambda: store.list(date_from='2021-01-01', date_to='2021-01-31')),
+            'using_game': median_ms(lambda: store.classes_using('game-42')),
+            'load_one': median_ms(lambda: store.load_raw('Evening_Class_2020-06-01.json')),
+        }
+        store.close()
+    finally:
+        shutil.rmtree(workdir)
+
+    print(f"{args.classes} classes indexed in {sync_time:.2f} s")
+    for name, ms in timings.items():
+        print(f"  {name:>12}: {ms:.3f} ms")
+    return {'classes': args.classes, 'sync_seconds': sync_time, 'median_ms': timings}
+
+def bench_plan(args):
+    """Class planner latency over a synthetic catalog, with a share of games marked recently used."""
+    rng = random.Random(args.seed)
+    categories = ['Standing', 'Grips', 'Mobility'] + [f"Concept{c:04d}" for c in range(args.concepts)]
+    games = [{
+        'id': f"game-{i}",
+        'category': categories[i % len(categories)],
+        'duration': rng.choice([None, 2, 3, 4, 5, 5, 6, 8, 10]),
+        'type': rng.choice(['Continuous', 'Round Switching']),
+        'players': rng.choice([None, 2, 3]),
+        'intensity': rng.choice(['Flow', 'Cooperative', 'Adversarial', '']),
+        'difficultyLevel': rng.choice([None, 1, 2, 3]),
+    } for i in range(args.games)]
+    recent = {g['id']: 1.0 for g in rng.sample(games, int(len(games) * args.recent_share))}
+
+    planner = ClassPlanner(games)
+    results = {}
+    for minutes in args.minutes:
+        runs = timed(lambda: planner.plan('Concept0000', minutes, args.alternatives, recent), args.repeat)
+        plans = planner.plan('Concept0000', minutes, args.alternatives, recent)
+        results[str(minutes)] = dict(percentiles(runs), plans=len(plans), nodes=planner.nodes,
+                                     exhaustive=not planner.truncated,
+                                     best_score=plans[0]['score'] if plans else None)
+
+    print(f"{len(games)} games, {len(recent)} recently used, {args.alternatives} alternatives")
+    for minutes, r in results.items():
+        print(f"  {minutes:>4} min: p50 {r['p50_ms']:.1f} ms, p95 {r['p95_ms']:.1f} ms, "
+              f"{r['nodes']} nodes{'' if r['exhaustive'] else ' (budget hit)'}, best score {r['best_score']}")
+    return {'games': len(games), 'minutes': results}
+
+def percentiles(samples):
+    """p50/p95/p99 (nearest rank) of a list of seconds, in milliseconds."""
+    if not samples:
+        return {'p50_ms': 0.0, 'p95_ms': 0.0, 'p99_ms': 0.0}
+    samples = sorted(samples)
+    def rank(p):
+        return samples[min(len(samples) - 1, int(len(samples) * p))] * 1000
+    return {'p50_ms': rank(0.50), 'p95_ms': rank(0.95), 'p99_ms': rank(0.99)}
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, or None where the platform doesn't report it."""
+    peak = process_memory()['peak_rss_bytes']
+    return peak / (1024 * 1024) if peak is not None else None
+
+def timed(fn, repeat):
+    """Runs fn repeat times; returns the list of wall times."""
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - start)
+    return runs
+
+def bench_generate(args):
+    """Full (cold and warm parse cache) and incremental index builds over a synthetic tree."""
+    workdir = tempfile.mkdtemp(prefix='eco-bench-')
+    try:
+        concepts_dir = make_synthetic_tree(workdir, args.concepts, args.games,
+                                           variation_every=args.variation_every, parent_every=args.parent_every)
+        output_file = os.path.join(workdir, 'content.json')
+        cache_file = os.path.join(workdir, 'parse_cache.sqlite')
+
+        cold = timed(lambda: ContentIndex(concepts_dir).build(), args.repeat)
+
+        cache = ParseCache(cache_file)
+        start = time.perf_counter()
+        ContentIndex(concepts_dir, cache=cache).build()
+        cache_fill = time.perf_counter() - start
+        warm = timed(lambda: ContentIndex(concepts_dir, cache=cache).build(), args.repeat)
+
+        index = ContentIndex(concepts_dir, cache=cache, output_file=output_file)
+        index.build()
+        write = timed(index.write, args.repeat)
+        games = sorted(index.games)
+
+        # One file at a time, the way a save from the editor patches the index
+        rng = random.Random(args.seed)
+        edit, add, delete, concept = [], [], [], []
+        for i in range(args.repeat):
+            path = rng.choice(games)
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(f"\nEdit {i}.\n")
+            edit += timed(lambda: index.refresh_path(path), 1)
+
+            new_path = os.path.join(os.path.dirname(path), f"Bench{i:04d}.md")
+            with open(new_path, 'w', encoding='utf-8') as f:
+                f.write(f"---\ntitle: Bench {i}\nplayers: 2\n---\n\nAdded by the benchmark.\n")
+            add += timed(lambda: index.refresh_path(new_path), 1)
+
+            os.remove(new_path)
+            delete += timed(lambda: index.refresh_path(new_path), 1)
+
+            name = rng.choice(sorted(index.concepts))
+            md_file = os.path.join(concepts_dir, name, f"{name}.md")
+            with open(md_file, 'a', encoding='utf-8') as f:
+                f.write(f"\nRevision {i}.\n")
+            concept += timed(lambda: index.refresh_path(md_file), 1)
+        cache.close()
+
+        results = {
+            'concepts': len(index.concepts),
+            'games': len(index.games),
+            'content_json_bytes': os.path.getsize(output_file),
+            'full_build_cold': percentiles(cold),
+            'full_build_cache_fill_ms': cache_fill * 1000,
+            'full_build_warm': percentiles(warm),
+            'write_content_json': percentiles(write),
+            'incremental': {
+                'edit_game': percentiles(edit),
+                'add_game': percentiles(add),
+                'delete_game': percentiles(delete),
+                'edit_concept': percentiles(concept),
+            },
+        }
+    finally:
+        shutil.rmtree(workdir)
+
+    print(f"{results['concepts']} concepts, {results['games']} games, "
+          f"content.json {results['content_json_bytes'] / 1024:.0f} KiB")
+    print(f"  full build, no cache:    {results['full_build_cold']['p50_ms']:9.1f} ms (median)")
+    print(f"  full build, cache fill:  {results['full_build_cache_fill_ms']:9.1f} ms")
+    print(f"  full build, warm cache:  {results['full_build_warm']['p50_ms']:9.1f} ms (median)")
+    print(f"  write content.json:      {results['write_content_json']['p50_ms']:9.1f} ms (median)")
+    for name, t in results['incremental'].items():
+        print(f"  incremental {name + ':':<13}{t['p50_ms']:9.2f} ms p50, {t['p95_ms']:.2f} ms p95")
+    return results
+
+@contextlib.contextmanager
+def read_latency(seconds):
+    """Adds seconds to every open() of a .md file, standing in for a network-mounted disk."""
+    if not seconds:
+        yield
+        return
+    real_open = builtins.open
+
+    def slow_open(file, *args, **kwargs):
+        if isinstance(file, str) and file.endswith('.md'):
+            time.sleep(seconds)
+        return real_open(file, *args, **kwargs)
+
+    builtins.open = slow_open
+    try:
+        yield
+    finally:
+        builtins.open = real_open
+
+def bench_parse(args):
+    """Cold full builds (no parse cache), serial against thread and process pools, at several tree sizes."""
+    modes = [('serial', 1, 'thread')] + [(f"{pool} x{args.jobs}", args.jobs, pool) for pool in ('thread', 'process')]
+    results = {}
+    for files in args.files:
+        workdir = tempfile.mkdtemp(prefix='eco-bench-')
+        try:
+            concepts = max(1, files // args.games)
+            concepts_dir = make_synthetic_tree(workdir, concepts, files // concepts, images_per_concept=0,
+                                               parent_every=args.parent_every)
+            level, reference = {}, None
+            for name, jobs, pool in modes:
+                def build():
+                    index = ContentIndex(concepts_dir, jobs=jobs, pool=pool)
+                    index.build()
+                    return index
+                with read_latency(args.latency_ms / 1000):
+                    runs = timed(build, args.repeat)
+                    data = build().to_dict()
+                # Same content.json whichever way the files were parsed
+                if reference is None:
+                    reference = data
+                level[name] = dict(percentiles(runs), identical=data == reference)
+            results[files] = level
+        finally:
+            shutil.rmtree(workdir)
+
+        serial = level['serial']['p50_ms']
+        print(f"{files} game files{f', {args.latency_ms} ms per read' if args.latency_ms else ''}:")
+        for name, r in level.items():
+            print(f"  {name + ':':<14}{r['p50_ms']:10.1f} ms (median), {serial / r['p50_ms']:5.2f}x"
+                  f"{'' if r['identical'] else '  OUTPUT DIFFERS'}")
+    return {'jobs': args.jobs, 'latency_ms': args.latency_ms, 'files': results}
+
+def bench_memory(args):
+    """Memory held by the content and search indexes for a synthetic library, against plain dict records."""
+    workdir = tempfile.mkdtemp(prefix='eco-bench-')
+    try:
+        concepts_dir = make_synthetic_tree(workdir, args.concepts, args.games, parent_every=args.parent_every,
+                                           description_bytes=args.description_bytes)
+        rss_before = process_memory()['rss_bytes']
+        index = ContentIndex(concepts_dir)
+        search = SearchIndex()
+        search.attach(index)
+        start = time.perf_counter()
+        index.build()
+        build_time = time.perf_counter() - start
+        rss_after = process_memory()['rss_bytes']
+
+        report = index.memory_report()
+        seen = set()
+        deep_size((index.games, index.raw_games), seen)
+        search_bytes = deep_size((search.postings, search.docs, search.vocab), seen)
+        # What the same games cost as the dicts the index used to hold, descriptions loaded
+        as_dicts = deep_size([g.as_dict() for g in index.game_list()], set())
+    finally:
+        shutil.rmtree(workdir)
+
+    mib = 1024 * 1024
+    results = {
+        'games': report['games'],
+        'build_seconds': build_time,
+        'rss_growth_mb': (rss_after - rss_before) / mib if rss_before is not None else None,
+        'index_bytes': report['bytes'],
+        'index_total_mb': report['total_bytes'] / mib,
+        'search_index_mb': search_bytes / mib,
+        'descriptions_on_disk_mb': report['description_bytes_on_disk'] / mib,
+        'plain_dict_games_mb': as_dicts / mib,
+    }
+    print(f"{results['games']} games indexed in {build_time:.1f} s")
+    if results['rss_growth_mb'] is not None:
+        print(f"  RSS growth:              {results['rss_growth_mb']:8.1f} MiB")
+    print(f"  content index:           {results['index_total_mb']:8.1f} MiB "
+          f"({', '.join(f'{k} {v / mib:.1f}' for k, v in report['bytes'].items())})")
+    print(f"  search index:            {results['search_index_mb']:8.1f} MiB")
+    print(f"  descriptions on disk:    {results['descriptions_on_disk_mb']:8.1f} MiB")
+    print(f"  as plain dict records:   {results['plain_dict_games_mb']:8.1f} MiB")
+    return results
+
+def use_project(server, project_root, concepts_dir):
+    """
+    Points the in-process server at a synthetic project: its own content
+    index (plus the search index on top), content.json and class store.
+    """
+    server.PROJECT_ROOT = project_root
+    server.CONTENT_INDEX = ContentIndex(concepts_dir, output_file=os.path.join(project_root, 'content.json'))
+    server.SEARCH_INDEX = SearchIndex()
+    server.SEARCH_INDEX.attach(server.CONTENT_INDEX)
+    server.CONTENT_INDEX.build()
+    server.CLASS_STORE = ClassStore(os.path.join(project_root, 'Saved Classes'),
+                                    os.path.join(project_root, 'class_index.sqlite'))
+    server.CLASS_STORE.sync()
+
+def api_requests(index, rng, count, write_ratio):
+    """A reproducible mix of (label, method, path, body) like a coach browsing and editing."""
+    games = [index.games[p] for p in sorted(index.games)]
+    concepts = [index.concepts[n] for n in sorted(index.concepts)]
+    words = ['game', 'position', 'grip', 'reach', 'attack', 'contr', 'concept00']
+    reads = [
+        ('catalog', lambda: '/data/catalog.json'),
+        ('game_detail', lambda: f"/data/games/{quote(rng.choice(games)['id'])}.json"),
+        ('concept_detail', lambda: f"/data/concepts/{quote(rng.choice(concepts)['id'])}.json"),
+        ('search', lambda: f"/api/search?q={quote(rng.choice(words))}+{rng.randrange(100)}"),
+        ('classes', lambda: '/api/classes?limit=20'),
+    ]
+    plan = []
+    for _ in range(count):
+        if games and rng.random() < write_ratio:
+            game = rng.choice(games)
+            with open(game['path'], encoding='utf-8') as f:
+                content = f.read()
+            body = json.dumps({'path': game['path'], 'content': content + "\nSaved by the benchmark.\n"})
+            plan.append(('save', 'POST', '/api/save', body))
+        else:
+            label, make_path = rng.choice(reads)
+            plan.append((label, 'GET', make_path(), None))
+    # content.json is the heaviest read; keep it a small, fixed share
+    for i in range(0, count, 50):
+        plan[i] = ('content', 'GET', '/data/content.json', None)
+    return plan
+
+def run_api_level(port, plan, concurrency, keep_alive=False):
+    """
+    Sends plan over concurrency parallel clients, each opening a connection per
+    request or (keep_alive) reusing one. Returns (label, seconds, ok) samples and the wall time.
+    """
+    samples = []
+    cursor = iter(range(len(plan)))
+    cursor_lock = threading.Lock()
+
+    def client():
+        conn = None
+        while True:
+            with cursor_lock:
+                i = next(cursor, None)
+            if i is None:
+                break
+            label, method, path, body = plan[i]
+            start = time.perf_counter()
+            try:
+                if conn is None:
+                    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+                headers = {'Content-Type': 'application/json'} if body else {}
+                conn.request(method, path, body=body, headers=headers)
+                resp = conn.getresponse()
+                resp.read()
+                ok = resp.status < 400
+                if not keep_alive or resp.will_close:
+                    conn.close()
+                    conn = None
+            except (OSError, http.client.HTTPException):
+                ok = False
+                if conn is not None:
+                    conn.close()
+                    conn = None
+            samples.append((label, time.perf_counter() - start, ok))
+        if conn is not None:
+            conn.close()
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return samples, time.perf_counter() - start
+
+def bench_api(args):
+    """Latency percentiles and throughput of the HTTP API, in process, at each concurrency level."""
+    sys.path.insert(0, WEB_APP_DIR)
+    import server
+    # Keep the per-request access log out of the results
+    server.EcoHandler.log_message = lambda self, *a: None
+
+    workdir = tempfile.mkdtemp(prefix='eco-bench-')
+    try:
+        concepts_dir = make_synthetic_tree(workdir, args.concepts, args.games, parent_every=args.parent_every)
+        os.makedirs(os.path.join(workdir, 'Saved Classes'))
+        use_project(server, workdir, concepts_dir)
+
+        httpd = server.create_server(0, args.workers, host='127.0.0.1')
+        port = httpd.server_address[1]
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+
+        rng = random.Random(args.seed)
+        levels = {}
+        # Saves print a line each; keep them out of the report
+        devnull = open(os.devnull, 'w')
+        try:
+            with contextlib.redirect_stdout(devnull):
+                for concurrency in args.concurrency:
+                    plan = api_requests(server.CONTENT_INDEX, rng, args.requests, args.write_ratio)
+                    samples, elapsed = run_api_level(port, plan, concurrency, args.keep_alive)
+                    by_label = {}
+                    for label, seconds, ok in samples:
+                        by_label.setdefault(label, []).append(seconds)
+                    levels[str(concurrency)] = {
+                        'requests': len(samples),
+                        'errors': sum(1 for _, _, ok in samples if not ok),
+                        'seconds': elapsed,
+                        'throughput_rps': len(samples) / elapsed if elapsed else 0.0,
+                        'latency': percentiles([seconds for _, seconds, _ in samples]),
+                        'endpoints': {label: dict(percentiles(times), requests=len(times))
+                                      for label, times in sorted(by_label.items())},
+                    }
+        finally:
+            devnull.close()
+            httpd.shutdown()
+            httpd.server_close()
+            server.CLASS_STORE.close()
+    finally:
+        shutil.rmtree(workdir)
+
+    print(f"{args.concepts * args.games} games, {args.workers} workers, {args.requests} requests per level, "
+          f"{args.write_ratio:.0%} saves, {'persistent connections' if args.keep_alive else 'a connection per request'}")
+    print(f"{'clients':>8} {'errors':>7} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for concurrency, r in levels.items():
+        lat = r['latency']
+        print(f"{concurrency:>8} {r['errors']:>7} {r['throughput_rps']:>9.1f} "
+              f"{lat['p50_ms']:>8.1f} {lat['p95_ms']:>8.1f} {lat['p99_ms']:>8.1f}")
+    return {'games': args.concepts * args.games, 'workers': args.workers, 'write_ratio': args.write_ratio,
+            'keep_alive': args.keep_alive, 'concurrency': levels}
+
+def numeric_leaves(data, prefix=''):
+    """Flattens nested results into {'a.b.c': number}."""
+    leaves = {}
+    if isinstance(data, dict):
+        for key, value in data.items():
+            leaves.update(numeric_leaves(value, f"{prefix}{key}."))
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        leaves[prefix[:-1]] = data
+    return leaves
+
+def compare_results(args):
+    """Prints every metric present in both result files with its relative change."""
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = numeric_leaves(json.load(f).get('results', {}))
+    with open(args.current, encoding='utf-8') as f:
+        current = numeric_leaves(json.load(f).get('results', {}))
+
+    for key in sorted(baseline.keys() & current.keys()):
+        before, after = baseline[key], current[key]
+        change = f"{(after - before) / before:+.1%}" if before else "n/a"
+        print(f"{key:<60} {before:>12.3f} {after:>12.3f} {change:>8}")
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for the Eco-BJJ content pipeline")
+    parser.add_argument('--output', help="Also write results to this JSON file")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    walk = sub.add_parser('walk', help="Tree walk syscalls: single scandir pass vs legacy listdir walk")
+    walk.add_argument('--concepts', type=int, default=100)
+    walk.add_argument('--games', type=int, default=100, help="Games per concept")
+    walk.add_argument('--variation-every', type=int, default=10,
+                      help="Put every Nth game in a nested variation folder (0 = flat Games/, "
+                           "which the legacy walk can fully see)")
+    walk.set_defaults(func=bench_walk)
+
+    search = sub.add_parser('search', help="Search index query latency on a synthetic library")
+    search.add_argument('--concepts', type=int, default=100)
+    search.add_argument('--games', type=int, default=100, help="Games per concept")
+    search.add_argument('--repeat', type=int, default=20, help="Runs per query (median is reported)")
+    search.set_defaults(func=bench_search)
+
+    classes = sub.add_parser('classes', help="Saved class store sync and query latency")
+    classes.add_argument('--classes', type=int, default=3000, help="Saved classes to generate")
+    classes.add_argument('--game-pool', type=int, default=500, help="Distinct game ids used in slots")
+    classes.add_argument('--repeat', type=int, default=50, help="Runs per query (median is reported)")
+    classes.set_defaults(func=bench_classes)
+
+    plan = sub.add_parser('plan', help="Class planner latency on a synthetic catalog")
+    plan.add_argument('--games', type=int, default=5000, help="Games in the catalog")
+    plan.add_argument('--concepts', type=int, default=20, help="Concept categories besides Standing/Grips/Mobility")
+    plan.add_argument('--minutes', type=int, nargs='+', default=[80, 90, 120], help="Class lengths to plan")
+    plan.add_argument('--alternatives', type=int, default=3)
+    plan.add_argument('--recent-share', type=float, default=0.2, help="Share of games used in recent classes")
+    plan.add_argument('--repeat', type=int, default=10)
+    plan.add_argument('--seed', type=int, default=1)
+    plan.set_defaults(func=bench_plan)
+
+    generate = sub.add_parser('generate', help="Full and incremental content generation on a synthetic tree")
+    generate.add_argument('--concepts', type=int, default=50)
+    generate.add_argument('--games', type=int, default=100, help="Games per concept")
+    generate.add_argument('--variation-every', type=int, default=10)
+    generate.add_argument('--parent-every', type=int, default=20, help="Every Nth game inherits from the previous one")
+    generate.add_argument('--repeat', type=int, default=5, help="Runs per measurement")
+    generate.add_argument('--seed', type=int, default=1)
+    generate.set_defaults(func=bench_generate)
+
+    parse = sub.add_parser('parse', help="Cold full build: serial vs thread/process pool parsing")
+    parse.add_argument('--files', type=int, nargs='+', default=[1000, 10000, 50000], help="Game files per tree")
+    parse.add_argument('--games', type=int, default=500, help="Games per concept")
+    parse.add_argument('--parent-every', type=int, default=20)
+    parse.add_argument('--jobs', type=int, default=os.cpu_count() or 4, help="Pool workers")
+    parse.add_argument('--latency-ms', type=float, default=0.0,
+                       help="Extra delay per file read, to model a network-mounted disk")
+    parse.add_argument('--repeat', type=int, default=3, help="Runs per mode (median is reported)")
+    parse.set_defaults(func=bench_parse)
+
+    memory = sub.add_parser('memory', help="Content/search index memory on a large synthetic library")
+    memory.add_argument('--concepts', type=int, default=100)
+    memory.add_argument('--games', type=int, default=500, help="Games per concept")
+    memory.add_argument('--parent-every', type=int, default=20)
+    memory.add_argument('--description-bytes', type=int, default=1500, help="Approximate size of each game body")
+    memory.set_defaults(func=bench_memory)
+
+    api = sub.add_parser('api', help="HTTP API latency/throughput against an in-process server")
+    api.add_argument('--concepts', type=int, default=50)
+    api.add_argument('--games', type=int, default=100, help="Games per concept")
+    api.add_argument('--parent-every', type=int, default=20)
+    api.add_argument('--workers', type=int, default=16, help="Server worker threads")
+    api.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32], help="Parallel clients per level")
+    api.add_argument('--requests', type=int, default=1000, help="Requests per concurrency level")
+    api.add_argument('--write-ratio', type=float, default=0.05, help="Share of requests that save a game")
+    api.add_argument('--keep-alive', action='store_true',
+                     help="Each client reuses one HTTP/1.1 connection instead of connecting per request")
+    api.add_argument('--seed', type=int, default=1)
+    api.set_defaults(func=bench_api)
+
+    compare = sub.add_parser('compare', help="Diff two --output files (e.g. from two commits)")
+    compare.add_argument('baseline')
+    compare.add_argument('current')
+    compare.set_defaults(func=compare_results)
+
+    args = parser.parse_args()
+    results = args.func(args)
+    if results is None:
+        return
+    rss = peak_rss_mb()
+    if rss is not None:
+        print(f"Peak RSS: {rss:.1f} MiB")
+    if args.output:
+        report = {
+            'command': args.command,
+            'args': {k: v for k, v in vars(args).items() if k not in ('func', 'output')},
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'peak_rss_mb': rss,
+            'results': results,
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
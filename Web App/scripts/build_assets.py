@@ -0,0 +1,210 @@
+import os
+import re
+import json
+import hashlib
+import threading
+
+from atomic_io import atomic_write
+from generate_content import encode_body
+
+# Paths relative to this script
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+WEB_APP_DIR = os.path.abspath(os.path.join(BASE_DIR, '..'))
+ASSETS_DIR = os.path.join(WEB_APP_DIR, 'data', 'assets')
+# URL of ASSETS_DIR as seen by the browser, relative to index.html
+ASSETS_URL = 'data/assets'
+MANIFEST_NAME = 'manifest.json'
+
+# Fingerprinted: every module under js/ and the stylesheet
+ASSET_DIRS = {'js': '.js', 'css': '.css'}
+# Hex digits of the content hash put in a fingerprinted name
+HASH_LENGTH = 10
+
+# Relative ES module specifiers: import ... from './x.js', import './x.js', import('./x.js')
+IMPORT_RE = re.compile(r'''(\bfrom\s*|\bimport\s*\(?\s*)(['"])\./([\w.-]+\.js)\2''')
+# Asset references in index.html, with or without an old ?v= cache buster
+HTML_REF_RE = re.compile(r'''(src|href)="((?:js|css)/[\w.-]+\.(?:js|css))(?:\?v=\d+)?"''')
+
+# Precompressed copies a static export keeps next to a file (see export_site.py)
+COMPRESSED_SUFFIXES = ('.gz', '.br')
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+def asset_sources(web_dir=WEB_APP_DIR):
+    """Source paths relative to web_dir ('js/app.js', 'css/style.css', ...), sorted."""
+    sources = []
+    for folder, extension in ASSET_DIRS.items():
+        try:
+            with os.scandir(os.path.join(web_dir, folder)) as it:
+                sources += [f"{folder}/{e.name}" for e in it if e.is_file() and e.name.endswith(extension)]
+        except FileNotFoundError:
+            continue
+    return sorted(sources)
+
+def fingerprinted_name(source, text):
+    stem, extension = os.path.splitext(source)
+    digest = hashlib.sha256(text.encode('utf-8')).hexdigest()[:HASH_LENGTH]
+    return f"{stem}.{digest}{extension}"
+
+def build_assets(web_dir=WEB_APP_DIR, out_dir=ASSETS_DIR):
+    """
+    Writes a content-hashed copy of every asset into out_dir (js/app.<hash>.js)
+    and a manifest mapping each source to its URL. Imports between modules are
+    rewritten to the fingerprinted names first, so a module's hash changes when
+    anything it imports changes. Files from builds older than the previous
+    manifest are removed. Returns {source: url}.
+    """
+    texts = {}
+    for source in asset_sources(web_dir):
+        with open(os.path.join(web_dir, source), 'r', encoding='utf-8') as f:
+            texts[source] = f.read()
+
+    built = {}       # source -> (fingerprinted relative name, rewritten text)
+    visiting = set()
+
+    def build(source):
+        if source in built:
+            return built[source][0]
+        visiting.add(source)
+        folder = os.path.dirname(source)
+
+        def rewrite(match):
+            target = f"{folder}/{match.group(3)}"
+            if target not in texts:
+                return match.group(0)
+            if target in visiting:
+                print(f"Warning: import cycle through {target}; {source} imports it unfingerprinted")
+                return match.group(0)
+            return f"{match.group(1)}{match.group(2)}./{os.path.basename(build(target))}{match.group(2)}"
+
+        text = IMPORT_RE.sub(rewrite, texts[source]) if source.endswith('.js') else texts[source]
+        visiting.discard(source)
+        built[source] = (fingerprinted_name(source, text), text)
+        return built[source][0]
+
+    for source in texts:
+        build(source)
+
+    manifest = {}
+    for source, (name, text) in built.items():
+        path = os.path.join(out_dir, *name.split('/'))
+        # Content-addressed: an existing file already has these bytes
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            atomic_write(path, text)
+        manifest[source] = f"{ASSETS_URL}/{name}"
+
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    previous = read_manifest(out_dir)
+    if previous != manifest:
+        os.makedirs(out_dir, exist_ok=True)
+        atomic_write(manifest_path, json.dumps(manifest, indent=2, sort_keys=True))
+        # Pages loaded before this build may still ask for the previous files
+        prune_assets(set(manifest.values()) | set(previous.values()), out_dir)
+    return manifest
+
+def read_manifest(out_dir=ASSETS_DIR):
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def prune_assets(keep_urls, out_dir=ASSETS_DIR):
+    """Deletes fingerprinted files (and their .gz/.br copies) whose URL is not in keep_urls. Returns how many were removed."""
+    removed = 0
+    for folder in ASSET_DIRS:
+        try:
+            it = os.scandir(os.path.join(out_dir, folder))
+        except FileNotFoundError:
+            continue
+        with it:
+            for entry in it:
+                name = entry.name
+                for suffix in COMPRESSED_SUFFIXES:
+                    name = name.removesuffix(suffix)
+                if entry.is_file() and f"{ASSETS_URL}/{folder}/{name}" not in keep_urls:
+                    os.remove(entry.path)
+                    removed += 1
+    return removed
+
+def asset_path(url, out_dir=ASSETS_DIR):
+    """File in out_dir behind a fingerprinted URL ('data/assets/js/app.<hash>.js'), or None for any other URL."""
+    parts = url.lstrip('/').split('/')
+    if '/'.join(parts[:2]) != ASSETS_URL or len(parts) != 4 or parts[2] not in ASSET_DIRS or parts[3] in ('', '.', '..'):
+        return None
+    return os.path.join(out_dir, parts[2], parts[3])
+
+def render_index(html, manifest):
+    """index.html with each js/ and css/ reference pointed at its fingerprinted URL."""
+    def replace(match):
+        url = manifest.get(match.group(2), match.group(2))
+        return f'{match.group(1)}="{url}"'
+    return HTML_REF_RE.sub(replace, html)
+
+class AssetManifest:
+    """
+    Fingerprinted assets for the server: rebuilt whenever a source file
+    changes, and kept encoded in memory (see encode_body) along with the
+    rendered index.html that points at them.
+    """
+
+    def __init__(self, web_dir=WEB_APP_DIR, out_dir=ASSETS_DIR):
+        self.web_dir = web_dir
+        self.out_dir = out_dir
+        self.lock = threading.Lock()
+        self.stamp = None
+        self.manifest = {}
+        self.payloads = {}   # '/data/assets/...' URL path -> encoded payload
+        self.index = None    # encoded payload of the rendered index.html
+
+    def refresh(self):
+        """Rebuilds if any source (or index.html) was added, changed or removed since the last build."""
+        paths = [os.path.join(self.web_dir, s) for s in asset_sources(self.web_dir)]
+        paths.append(os.path.join(self.web_dir, 'index.html'))
+        stamp = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+                stamp.append((path, st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                pass
+        stamp = tuple(stamp)
+
+        with self.lock:
+            if stamp == self.stamp:
+                return
+            self.manifest = build_assets(self.web_dir, self.out_dir)
+            self.payloads = {}
+            for url in self.manifest.values():
+                with open(asset_path(url, self.out_dir), 'rb') as f:
+                    self.payloads['/' + url] = encode_body(f.read())
+            try:
+                with open(os.path.join(self.web_dir, 'index.html'), 'r', encoding='utf-8') as f:
+                    self.index = encode_body(render_index(f.read(), self.manifest).encode('utf-8'))
+            except FileNotFoundError:
+                self.index = None
+            self.stamp = stamp
+
+    def asset(self, url_path):
+        """Encoded payload for a fingerprinted URL path, or None. Files of the previous build are read from disk."""
+        with self.lock:
+            payload = self.payloads.get(url_path)
+        if payload is not None:
+            return payload
+        path = asset_path(url_path, self.out_dir)
+        if path is None:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                return encode_body(f.read())
+        except (FileNotFoundError, IsADirectoryError):
+            return None
+
+def main():
+    manifest = build_assets()
+    for source, url in sorted(manifest.items()):
+        print(f"{source} -> {url}")
+
+if __name__ == "__main__":
+    main()
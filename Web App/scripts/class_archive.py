@@ -0,0 +1,253 @@
+import io
+import os
+import json
+import time
+import hashlib
+import tarfile
+import posixpath
+
+from generate_content import IMAGE_EXTENSIONS
+from class_store import class_slots
+
+# Last member of every archive: what it holds and the sha256 of each file
+ARCHIVE_MANIFEST = 'eco-archive.json'
+ARCHIVE_FORMAT = 1
+CLASSES_FOLDER = 'Saved Classes'
+CONCEPTS_FOLDER = 'Concepts'
+
+# Read/write size while streaming a file into or out of an archive
+CHUNK_SIZE = 64 * 1024
+# Upper bounds for one imported archive (a gzipped one can unpack to far more than was uploaded)
+MAX_ARCHIVE_FILES = 10000
+MAX_UNPACKED_BYTES = 1024 * 1024 * 1024
+
+def sha256_file(path):
+    """Hex sha256 of a file's bytes, or None if it doesn't exist."""
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+def archive_name(project_root, path):
+    """Archive member name (project-relative, '/'-separated) for a path, or None for one outside project_root."""
+    rel = os.path.relpath(path, project_root)
+    if rel.startswith('..') or os.path.isabs(rel):
+        return None
+    return rel.replace(os.sep, '/')
+
+def member_path(name):
+    """
+    The project-relative path an archive member may be imported to; raises
+    ValueError for anything else (absolute, '..', a nested class file, a file
+    in Concepts/ the content index wouldn't read).
+    """
+    rel = posixpath.normpath(name)
+    parts = rel.split('/')
+    if name.startswith('/') or '\\' in name or '..' in parts or rel in ('.', ''):
+        raise ValueError(f"Unsafe path in archive: {name!r}")
+    if parts[0] == CLASSES_FOLDER:
+        if len(parts) != 2 or not parts[1].endswith('.json') or parts[1].startswith('.'):
+            raise ValueError(f"Not a saved class file: {name!r}")
+    elif parts[0] == CONCEPTS_FOLDER:
+        if len(parts) < 3 or parts[-1].startswith('.') or \
+                not (parts[-1].endswith('.md') or parts[-1].lower().endswith(IMAGE_EXTENSIONS)):
+            raise ValueError(f"Not a concept or game file: {name!r}")
+    else:
+        raise ValueError(f"Outside {CLASSES_FOLDER}/ and {CONCEPTS_FOLDER}/: {name!r}")
+    return rel
+
+def archive_files(index, class_store, filenames, project_root):
+    """
+    Everything an archive of the given saved class files needs, as
+    (sorted member names, ids of games the classes use that aren't in the index):
+    the class files, each game they use and the games it inherits from, and
+    the markdown and images of each class's concept and each game's concept folder.
+    """
+    names = {f"{CLASSES_FOLDER}/{filename}" for filename in filenames}
+    concept_ids, folders, game_ids = set(), set(), set()
+    for filename in filenames:
+        loaded = class_store.load_raw(filename)
+        if loaded is None:
+            continue
+        class_data = json.loads(loaded[0])
+        if class_data.get('conceptId'):
+            concept_ids.add(class_data['conceptId'])
+        game_ids.update(game_id for _, _, game_id in class_slots(class_data))
+
+    missing = []
+    seen = set()
+    for game_id in sorted(game_ids):
+        game = index.find_game(game_id)
+        if game is None:
+            missing.append(game_id)
+        # Variations only make sense with the games they inherit from
+        while game is not None and game['id'] not in seen:
+            seen.add(game['id'])
+            folders.add(game['category'])
+            name = archive_name(project_root, game['path'])
+            if name:
+                names.add(name)
+            game = index.find_game(game['parentId']) if game.get('parentId') else None
+
+    concepts = [index.find_concept(concept_id) for concept_id in concept_ids]
+    with index.lock:
+        concepts += [index.concepts.get(folder) for folder in folders]
+    for concept in concepts:
+        if concept is None:
+            continue
+        for path in [concept['path']] + [os.path.join(project_root, *image.split('/')) for image in concept['images']]:
+            name = archive_name(project_root, path)
+            if name:
+                names.add(name)
+    return sorted(names), missing
+
+class ChunkedWriter:
+    """File-like wrapper that sends what is written to it with HTTP/1.1 chunked transfer coding."""
+
+    def __init__(self, wfile):
+        self.wfile = wfile
+
+    def write(self, data):
+        if data:
+            self.wfile.write(b'%x\r\n' % len(data) + bytes(data) + b'\r\n')
+        return len(data)
+
+    def close(self):
+        """Sends the terminating zero-length chunk."""
+        self.wfile.write(b'0\r\n\r\n')
+
+class HashingReader:
+    """File-like wrapper that hashes what is read through it."""
+
+    def __init__(self, f):
+        self.f = f
+        self.digest = hashlib.sha256()
+
+    def read(self, size=-1):
+        data = self.f.read(size)
+        self.digest.update(data)
+        return data
+
+class LimitedReader:
+    """Reads at most `length` bytes from a stream (a request body), then reports EOF."""
+
+    def __init__(self, f, length):
+        self.f = f
+        self.left = length
+
+    def read(self, size=-1):
+        if self.left <= 0:
+            return b''
+        if size < 0 or size > self.left:
+            size = self.left
+        data = self.f.read(size)
+        self.left -= len(data)
+        return data
+
+def write_archive(out, project_root, names, classes, compress=False, missing_games=()):
+    """
+    Streams a tar of the given member names to out (anything with write()),
+    one file at a time, followed by the manifest. Each file is hashed as it is
+    read into the archive, so the manifest matches the bytes sent even if the
+    file changes meanwhile. Files gone since they were listed are left out.
+    Returns the manifest.
+    """
+    files = {}
+    with tarfile.open(fileobj=out, mode='w|gz' if compress else 'w|', format=tarfile.PAX_FORMAT) as tar:
+        for name in names:
+            try:
+                f = open(os.path.join(project_root, *name.split('/')), 'rb')
+            except FileNotFoundError:
+                continue
+            with f:
+                st = os.fstat(f.fileno())
+                info = tarfile.TarInfo(name)
+                info.size = st.st_size
+                info.mtime = int(st.st_mtime)
+                info.mode = 0o644
+                reader = HashingReader(f)
+                tar.addfile(info, reader)
+                files[name] = reader.digest.hexdigest()
+
+        manifest = {
+            'format': ARCHIVE_FORMAT,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'classes': sorted(classes),
+            'files': files,
+            'missingGames': sorted(missing_games),
+        }
+        body = json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8')
+        info = tarfile.TarInfo(ARCHIVE_MANIFEST)
+        info.size = len(body)
+        info.mtime = int(time.time())
+        info.mode = 0o644
+        tar.addfile(info, io.BytesIO(body))
+    return manifest
+
+def read_archive(stream, staging):
+    """
+    Reads a tar (plain or gzipped) from a non-seekable stream, writing each
+    file into the staging directory as it arrives and hashing it on the way.
+    The manifest (last member) is then checked against what arrived: every
+    file listed, nothing extra, every hash matching, and each class file a
+    JSON object. Returns {member name: (staged path, sha256)}; raises
+    ValueError for an archive that is malformed or fails verification.
+    """
+    staged = {}
+    manifest = None
+    unpacked = 0
+    try:
+        with tarfile.open(fileobj=stream, mode='r|*') as tar:
+            for info in tar:
+                if info.isdir():
+                    continue
+                if not info.isfile():
+                    raise ValueError(f"Not a regular file in archive: {info.name!r}")
+                if info.name == ARCHIVE_MANIFEST:
+                    manifest = json.loads(tar.extractfile(info).read().decode('utf-8'))
+                    continue
+                if manifest is not None:
+                    raise ValueError(f"{ARCHIVE_MANIFEST} must be the last member")
+                name = member_path(info.name)
+                if name in staged:
+                    raise ValueError(f"Duplicate path in archive: {name!r}")
+                if len(staged) >= MAX_ARCHIVE_FILES:
+                    raise ValueError(f"Too many files in archive (max {MAX_ARCHIVE_FILES})")
+                unpacked += info.size
+                if unpacked > MAX_UNPACKED_BYTES:
+                    raise ValueError(f"Archive unpacks to more than {MAX_UNPACKED_BYTES} bytes")
+
+                path = os.path.join(staging, str(len(staged)))
+                source = HashingReader(tar.extractfile(info))
+                with open(path, 'wb') as f:
+                    for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+                        f.write(chunk)
+                staged[name] = (path, source.digest.hexdigest())
+    except tarfile.TarError as e:
+        raise ValueError(f"Not a readable tar archive: {e}")
+
+    if not isinstance(manifest, dict) or not isinstance(manifest.get('files'), dict):
+        raise ValueError(f"Archive has no {ARCHIVE_MANIFEST}")
+    if manifest.get('format') != ARCHIVE_FORMAT:
+        raise ValueError(f"Unsupported archive format: {manifest.get('format')!r}")
+    expected = manifest['files']
+    for name in sorted(set(expected) | set(staged)):
+        if name not in staged:
+            raise ValueError(f"Listed in {ARCHIVE_MANIFEST} but missing: {name}")
+        if name not in expected:
+            raise ValueError(f"Not listed in {ARCHIVE_MANIFEST}: {name}")
+        if staged[name][1] != expected[name]:
+            raise ValueError(f"Hash mismatch: {name}")
+        if name.startswith(CLASSES_FOLDER + '/'):
+            try:
+                with open(staged[name][0], 'rb') as f:
+                    class_data = json.loads(f.read().decode('utf-8'))
+            except (UnicodeDecodeError, ValueError):
+                class_data = None
+            if not isinstance(class_data, dict):
+                raise ValueError(f"Not a saved class: {name}")
+    return staged
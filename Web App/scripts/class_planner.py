@@ -0,0 +1,278 @@
+import heapq
+from collections import namedtuple
+
+# Mirrors CLASS_TEMPLATE in js/app.js and Class Design/ClassStructure.md.
+# minutes: (min, max) for the segment; games: (min, max) number of games;
+# categories: game categories to draw from, None for the class's own concept,
+# () for a segment without games (its time is fixed at min).
+Segment = namedtuple('Segment', 'id title minutes games categories warmup')
+SEGMENTS = (
+    Segment('standing', 'Standing', (10, 10), (1, 2), ('Standing', 'Grips'), True),
+    Segment('mobility', 'Mobility', (10, 15), (2, 3), ('Mobility',), True),
+    Segment('takedowns', 'Takedowns', (10, 15), (1, 2), ('Standing',), False),
+    Segment('discussion', 'Concept Discussion', (5, 5), (0, 0), (), False),
+    Segment('applications', 'Concept Applications', (25, 30), (4, 5), None, False),
+    Segment('review', 'Review', (5, 5), (0, 0), (), False),
+)
+# Free roll takes whatever time is left, but at least this much (3 full rounds)
+ROLLING_SEGMENT = 'rolling'
+MIN_ROLLING_MINUTES = 15
+
+DEFAULT_ROUND_MINUTES = 5
+DEFAULT_PLAYERS = 2
+
+# Penalties; a plan's score is minus their sum, so 0 is a perfect plan
+MINUTE_OFF_TARGET = 1.0     # per minute away from the middle of a segment's range
+RECENT_GAME = 10.0          # a game from the newest saved class; older classes cost proportionally less
+HARD_IN_WARMUP = 3.0        # an adversarial game in standing/mobility
+UNFILLED_SEGMENT = 100.0    # a segment the catalog can't fill within its limits
+REUSED_GAME = 20.0          # a game already used in an earlier segment (only when no plan avoids it)
+
+# Bounds that keep a request fast on a large catalog
+MAX_CANDIDATES = 12         # best-scoring games considered per segment, for each distinct game length
+OPTIONS_PER_LENGTH = 40     # best game combinations kept per segment, for each whole-minute total
+SEGMENT_NODES = 50000       # search steps per segment before settling for the combinations found
+MAX_NODES = 200000          # search steps across segments before returning the best plans found so far
+
+INTENSITY_LEVELS = {'flow': 1, 'low': 1, 'cooperative': 2, 'adversarial': 3}
+
+def game_minutes(game):
+    """Minutes a game takes in class, computed the way the class preview does."""
+    round_minutes = game.get('duration') or DEFAULT_ROUND_MINUTES
+    if game.get('type') == 'Round Switching':
+        return round_minutes * (game.get('players') or DEFAULT_PLAYERS)
+    return round_minutes
+
+def whole(minutes):
+    return int(minutes) if float(minutes).is_integer() else minutes
+
+def intensity_level(game):
+    return INTENSITY_LEVELS.get(str(game.get('intensity') or '').lower())
+
+class ClassPlanner:
+    """
+    Fills the class template's segments from the game catalog.
+
+    Each segment's valid game combinations (time and game-count limits) are
+    enumerated with branch and bound, keeping the best few of each length;
+    plans are then searched across segments, pruning on the time left for free roll,
+    duplicate games and a score bound against the current k-th best plan.
+    """
+
+    def __init__(self, games, segments=SEGMENTS, max_nodes=MAX_NODES):
+        # First record wins if two files produce the same id, as in the catalog
+        by_id = {}
+        for g in games:
+            if g.get('id'):
+                by_id.setdefault(g['id'], g)
+        self.games = list(by_id.values())
+        self.segments = segments
+        self.max_nodes = max_nodes
+        self.nodes = 0            # search steps taken by the last plan()
+        self.truncated = False    # last plan() ran out of steps and returned the best found by then
+
+    def plan(self, concept_category, total_minutes, alternatives=3, recent=None, max_difficulty=None):
+        """
+        Up to `alternatives` plans, best first. recent maps game id -> penalty
+        weight in (0, 1] for games used in recent classes; max_difficulty
+        (a difficultyLevel) leaves out harder games. Raises ValueError if
+        total_minutes can't fit every segment's minimum.
+        """
+        fixed = sum(s.minutes[0] for s in self.segments) + MIN_ROLLING_MINUTES
+        if total_minutes < fixed:
+            raise ValueError(f"{total_minutes} minutes is too short; the class template needs at least {fixed}")
+
+        self.nodes = 0
+        self.truncated = False
+        recent = recent or {}
+        games = [g for g in self.games
+                 if max_difficulty is None or not g.get('difficultyLevel') or g['difficultyLevel'] <= max_difficulty]
+
+        options, warnings = [], {}
+        for segment in self.segments:
+            categories = (concept_category,) if segment.categories is None else segment.categories
+            pool = [g for g in games if g['category'] in categories]
+            segment_options = self._segment_options(segment, pool, recent)
+            if not segment_options:
+                warnings[segment.id] = f"not enough {' / '.join(categories) or 'matching'} games to fill " \
+                                       f"{segment.minutes[0]}-{segment.minutes[1]} min"
+                segment_options = [self._partial_option(segment, pool, recent)]
+            options.append(segment_options)
+
+        plans = self._search(options, total_minutes - MIN_ROLLING_MINUTES, alternatives)
+        reused = not plans
+        if reused:
+            # Segments sharing a small pool (Standing feeds standing, takedowns and
+            # applications) may have no plan without repeats; repeat games rather than give up
+            plans = self._search(options, total_minutes - MIN_ROLLING_MINUTES, alternatives,
+                                 reuse_penalty=REUSED_GAME)
+
+        results = []
+        for rank, (penalty, chosen) in enumerate(plans, 1):
+            segments = {ROLLING_SEGMENT: []}
+            minutes = {}
+            for segment, (_, segment_minutes, picked) in zip(self.segments, chosen):
+                # Warm-ups first, hardest last within a segment
+                ordered = sorted(picked, key=lambda g: (intensity_level(g) or 0, g['id']))
+                segments[segment.id] = [{'gameId': g['id']} for g in ordered]
+                minutes[segment.id] = whole(segment_minutes)
+            minutes[ROLLING_SEGMENT] = whole(total_minutes - sum(minutes.values()))
+            plan_warnings = [warnings[s.id] for s in self.segments if s.id in warnings]
+            if reused:
+                plan_warnings.append('not enough distinct games for every segment; some games are used twice')
+            results.append({
+                'rank': rank,
+                'score': round(-penalty, 2),
+                'minutes': minutes,
+                'segments': segments,
+                'recentGames': sorted(g['id'] for _, _, picked in chosen for g in picked if g['id'] in recent),
+                'warnings': plan_warnings,
+            })
+        return results
+
+    def _game_penalty(self, segment, game, recent):
+        penalty = RECENT_GAME * recent.get(game['id'], 0)
+        if segment.warmup and (intensity_level(game) or 0) >= 3:
+            penalty += HARD_IN_WARMUP
+        return penalty
+
+    def _segment_options(self, segment, pool, recent):
+        """Best (penalty, minutes, games) combinations that meet the segment's limits, best first."""
+        low, high = segment.minutes
+        min_games, max_games = segment.games
+        if max_games == 0:
+            return [(0.0, low, ())]
+
+        target = (low + high) / 2
+        # Keeping the best few of each length (rather than the best few overall)
+        # leaves combinations that add up to the segment's time
+        by_length = {}
+        for candidate in sorted(((self._game_penalty(segment, g, recent), game_minutes(g), g) for g in pool),
+                                key=lambda c: (c[0], c[2]['id'])):
+            by_length.setdefault(candidate[1], []).append(candidate)
+        scored = sorted((c for group in by_length.values() for c in group[:MAX_CANDIDATES]),
+                        key=lambda c: (c[0], c[2]['id']))
+        # Best combinations per whole-minute length, so the plan search can
+        # trade time between segments: max-heaps via negated penalty, and the
+        # penalty a new combination of that length has to beat
+        best = {length: [] for length in range(int(low), int(high) + 1)}
+        limit = dict.fromkeys(best, float('inf'))
+        # Time penalty of each length (fractional minutes count as the whole minute below)
+        off_target = {length: MINUTE_OFF_TARGET * abs(length - target) for length in best}
+        count = [0]
+        budget = self.nodes + SEGMENT_NODES
+
+        def hopeless(penalty, minutes):
+            """No combination extending one with this penalty and time can make any length's cut."""
+            return all(penalty + off_target[length] >= limit[length]
+                       for length in best if length + 1 > minutes)
+
+        def visit(start, penalty, minutes, picked):
+            self.nodes += 1
+            if min_games <= len(picked) and low <= minutes <= high:
+                length = int(minutes)
+                total = penalty + off_target[length]
+                if total < limit[length]:
+                    count[0] += 1
+                    heap = best[length]
+                    entry = (-total, -count[0], minutes, tuple(picked))
+                    if len(heap) >= OPTIONS_PER_LENGTH:
+                        heapq.heapreplace(heap, entry)
+                    else:
+                        heapq.heappush(heap, entry)
+                    if len(heap) >= OPTIONS_PER_LENGTH:
+                        limit[length] = -heap[0][0]
+            if len(picked) == max_games:
+                return
+            for i in range(start, len(scored)):
+                if self.nodes >= budget:
+                    self.truncated = True
+                    return
+                game_penalty, game_min, game = scored[i]
+                # Candidates are sorted by penalty, so no later one can do better
+                if hopeless(penalty + game_penalty, minutes):
+                    break
+                if minutes + game_min > high:
+                    continue
+                picked.append(game)
+                visit(i + 1, penalty + game_penalty, minutes + game_min, picked)
+                picked.pop()
+
+        visit(0, 0.0, 0, [])
+        return sorted(((-neg, minutes, picked) for heap in best.values() for neg, _, minutes, picked in heap),
+                      key=lambda o: (o[0], [g['id'] for g in o[2]]))
+
+    def _partial_option(self, segment, pool, recent):
+        """Best effort for a segment with no valid combination: whatever fits, the segment's minimum time reserved."""
+        picked, minutes = [], 0
+        for g in sorted(pool, key=lambda g: (self._game_penalty(segment, g, recent), g['id'])):
+            if len(picked) < segment.games[1] and minutes + game_minutes(g) <= segment.minutes[1]:
+                picked.append(g)
+                minutes += game_minutes(g)
+        return (UNFILLED_SEGMENT, segment.minutes[0], tuple(picked))
+
+    def _search(self, options, minutes_budget, k, reuse_penalty=None):
+        """
+        k best combinations of one option per segment within minutes_budget. No
+        game is used twice, unless reuse_penalty is given: then each repeat costs that much.
+        """
+        n = len(options)
+        # rest[i][m]: least penalty segments i.. can add within m minutes (inf if they
+        # can't fit). Option lengths are rounded down, which keeps it a lower bound.
+        span = int(minutes_budget)
+        rest = [[0.0] * (span + 1) for _ in range(n + 1)]
+        for i in range(n - 1, -1, -1):
+            cheapest = {}  # whole minutes -> least penalty of an option that long
+            for option_penalty, option_minutes, _ in options[i]:
+                length = int(option_minutes)
+                cheapest[length] = min(cheapest.get(length, float('inf')), option_penalty)
+            for m in range(span + 1):
+                rest[i][m] = min((p + rest[i + 1][m - length] for length, p in cheapest.items() if length <= m),
+                                 default=float('inf'))
+
+        best = []  # max-heap of the k best: (-penalty, -sequence, choice)
+        limit = [float('inf')]  # penalty a plan must beat to make the k best
+        sequence = [0]
+        budget = self.nodes + self.max_nodes
+
+        def visit(i, penalty, minutes, used, chosen):
+            self.nodes += 1
+            if i == n:
+                sequence[0] += 1
+                entry = (-penalty, -sequence[0], tuple(chosen))
+                if len(best) >= k:
+                    heapq.heapreplace(best, entry)
+                else:
+                    heapq.heappush(best, entry)
+                if len(best) >= k:
+                    limit[0] = -best[0][0]
+                return
+            unconstrained = rest[i + 1][span]
+            for option in options[i]:
+                option_penalty, option_minutes, picked = option
+                # Options are sorted by penalty, so the bound only gets worse from here
+                if penalty + option_penalty + unconstrained >= limit[0]:
+                    break
+                if self.nodes >= budget:
+                    self.truncated = True
+                    return
+                left = minutes_budget - minutes - option_minutes
+                if left < 0 or penalty + option_penalty + rest[i + 1][int(left)] >= limit[0]:
+                    continue
+                repeats = sum(1 for g in picked if used.get(g['id']))
+                if repeats:
+                    if reuse_penalty is None:
+                        continue
+                    option_penalty += reuse_penalty * repeats
+                    if penalty + option_penalty + rest[i + 1][int(left)] >= limit[0]:
+                        continue
+                chosen.append(option)
+                for g in picked:
+                    used[g['id']] = used.get(g['id'], 0) + 1
+                visit(i + 1, penalty + option_penalty, minutes + option_minutes, used, chosen)
+                for g in picked:
+                    used[g['id']] -= 1
+                chosen.pop()
+
+        visit(0, 0.0, 0, {}, [])
+        return sorted(((-neg, list(choice)) for neg, _, choice in best), key=lambda p: p[0])
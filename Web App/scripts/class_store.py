@@ -0,0 +1,243 @@
+import os
+import json
+import hashlib
+import sqlite3
+import threading
+
+# Paths relative to this script
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CLASS_INDEX_FILE = os.path.join(BASE_DIR, '../data/class_index.sqlite')
+
+# Bump whenever the tables change shape; the index is rebuilt from the JSON files
+SCHEMA_VERSION = 2
+
+def class_name(filename):
+    """Display name of a saved class file, as shown in the Load Class list."""
+    return filename[:-len('.json')].replace('_', ' ')
+
+def class_slots(class_data):
+    """
+    (segment id, slot index, game id) for every filled slot. Saved classes come
+    in two shapes: {segmentId: [{gameId}, ...]} and [{id, slots: [{index, gameId}]}].
+    """
+    segments = class_data.get('segments') or {}
+    slots = []
+    if isinstance(segments, dict):
+        for segment_id, games in segments.items():
+            for index, slot in enumerate(games or []):
+                if isinstance(slot, dict) and slot.get('gameId'):
+                    slots.append((segment_id, index, slot['gameId']))
+    else:
+        for segment in segments:
+            if not isinstance(segment, dict):
+                continue
+            for position, slot in enumerate(segment.get('slots') or []):
+                if isinstance(slot, dict) and slot.get('gameId'):
+                    slots.append((segment.get('id'), slot.get('index', position), slot['gameId']))
+    return slots
+
+class ClassStore:
+    """
+    SQLite index over the Saved Classes/*.json files: name, date, concept and
+    the game in every segment slot, so listing, filtering and "which classes
+    use this game" are index lookups instead of opening every file.
+
+    The JSON files stay the source of truth; sync() reconciles the index with
+    them (by mtime/size) and put() records a class the server just wrote.
+    """
+
+    def __init__(self, classes_dir, db_path=CLASS_INDEX_FILE):
+        self.classes_dir = classes_dir
+        self.lock = threading.Lock()
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        if self.conn.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+            self.conn.execute('DROP TABLE IF EXISTS class_games')
+            self.conn.execute('DROP TABLE IF EXISTS classes')
+            self.conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS classes (
+                filename TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                title TEXT,
+                date TEXT,
+                concept_id TEXT,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                version TEXT NOT NULL,
+                data TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS class_games (
+                filename TEXT NOT NULL,
+                segment_id TEXT,
+                slot INTEGER,
+                game_id TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS classes_name ON classes(name);
+            CREATE INDEX IF NOT EXISTS classes_date ON classes(date);
+            CREATE INDEX IF NOT EXISTS classes_concept ON classes(concept_id, date);
+            CREATE INDEX IF NOT EXISTS class_games_game ON class_games(game_id);
+            CREATE INDEX IF NOT EXISTS class_games_class ON class_games(filename);
+        ''')
+        self.conn.commit()
+
+    def path_for(self, filename):
+        return os.path.join(self.classes_dir, filename)
+
+    def sync(self):
+        """Re-indexes class files added, changed or deleted since the last run. Returns (updated, removed)."""
+        if not os.path.exists(self.classes_dir):
+            os.makedirs(self.classes_dir)
+
+        with os.scandir(self.classes_dir) as it:
+            on_disk = {entry.name: entry.stat() for entry in it
+                       if entry.is_file() and entry.name.endswith('.json')}
+
+        with self.lock:
+            known = {filename: (mtime_ns, size) for filename, mtime_ns, size
+                     in self.conn.execute('SELECT filename, mtime_ns, size FROM classes')}
+            removed = [filename for filename in known if filename not in on_disk]
+            for filename in removed:
+                self._delete(filename)
+            updated = 0
+            for filename, st in on_disk.items():
+                if known.get(filename) != (st.st_mtime_ns, st.st_size):
+                    if self._index_file(filename, st):
+                        updated += 1
+            self.conn.commit()
+        return updated, len(removed)
+
+    def put(self, filename, class_data, version):
+        """Indexes a class file the caller has just written (version: its atomic_io.file_version)."""
+        st = os.stat(self.path_for(filename))
+        with self.lock:
+            self._index(filename, class_data, st, version)
+            self.conn.commit()
+
+    def load_raw(self, filename):
+        """
+        (JSON text, version) of a class file, or None if it doesn't exist. Served
+        from the index while the file's mtime/size match, so only a stat hits the disk.
+        """
+        try:
+            st = os.stat(self.path_for(filename))
+        except FileNotFoundError:
+            with self.lock:
+                self._delete(filename)
+                self.conn.commit()
+            return None
+
+        with self.lock:
+            row = self.conn.execute('SELECT mtime_ns, size, data, version FROM classes WHERE filename = ?',
+                                    (filename,)).fetchone()
+            if row and (row[0], row[1]) == (st.st_mtime_ns, st.st_size):
+                return row[2], row[3]
+            # Edited outside the server (or not indexed yet)
+            if not self._index_file(filename, st):
+                return None
+            self.conn.commit()
+            return self.conn.execute('SELECT data, version FROM classes WHERE filename = ?', (filename,)).fetchone()
+
+    def names(self):
+        with self.lock:
+            return [name for (name,) in self.conn.execute('SELECT name FROM classes ORDER BY name')]
+
+    def list(self, concept_id=None, game_id=None, date_from=None, date_to=None, limit=None):
+        """
+        Class summaries, newest first, optionally filtered by concept, a game
+        used in any slot, and an inclusive date range (YYYY-MM-DD).
+        """
+        sql = ['SELECT c.filename, c.name, c.title, c.date, c.concept_id,',
+               '(SELECT COUNT(*) FROM class_games g WHERE g.filename = c.filename) FROM classes c']
+        where, params = [], []
+        if concept_id:
+            where.append('c.concept_id = ?')
+            params.append(concept_id)
+        if game_id:
+            where.append('c.filename IN (SELECT filename FROM class_games WHERE game_id = ?)')
+            params.append(game_id)
+        if date_from:
+            where.append('c.date >= ?')
+            params.append(date_from)
+        if date_to:
+            where.append('c.date <= ?')
+            params.append(date_to)
+        if where:
+            sql.append('WHERE ' + ' AND '.join(where))
+        # Newest first; SQLite sorts NULL dates last in DESC order
+        sql.append('ORDER BY c.date DESC, c.name')
+        if limit:
+            sql.append('LIMIT ?')
+            params.append(int(limit))
+
+        with self.lock:
+            rows = self.conn.execute(' '.join(sql), params).fetchall()
+        return [{'name': name, 'title': title, 'date': date, 'conceptId': concept, 'games': games}
+                for filename, name, title, date, concept, games in rows]
+
+    def classes_using(self, game_id):
+        """Every slot that holds game_id, with its class, newest class first."""
+        with self.lock:
+            rows = self.conn.execute('''
+                SELECT c.name, c.date, g.segment_id, g.slot FROM class_games g
+                JOIN classes c ON c.filename = g.filename
+                WHERE g.game_id = ?
+                ORDER BY c.date DESC, c.name, g.segment_id, g.slot
+            ''', (game_id,)).fetchall()
+        return [{'name': name, 'date': date, 'segment': segment, 'slot': slot}
+                for name, date, segment, slot in rows]
+
+    def recent_games(self, classes):
+        """
+        Games used in the newest `classes` saved classes, as game id -> weight:
+        1.0 for the newest class, falling off linearly for older ones.
+        """
+        with self.lock:
+            rows = self.conn.execute('''
+                SELECT c.filename, g.game_id FROM classes c
+                JOIN class_games g ON g.filename = c.filename
+                WHERE c.filename IN (SELECT filename FROM classes ORDER BY date DESC, name LIMIT ?)
+                ORDER BY c.date DESC, c.name
+            ''', (int(classes),)).fetchall()
+        weights, order = {}, []
+        for filename, game_id in rows:
+            if filename not in order:
+                order.append(filename)
+            weights.setdefault(game_id, (classes - order.index(filename)) / classes)
+        return weights
+
+    def _index_file(self, filename, st):
+        try:
+            with open(self.path_for(filename), 'rb') as f:
+                raw = f.read()
+            class_data = json.loads(raw.decode('utf-8'))
+            if not isinstance(class_data, dict):
+                raise ValueError("not a class object")
+        except (OSError, ValueError) as e:
+            print(f"Warning: could not index saved class {filename}: {e}")
+            self._delete(filename)
+            return False
+        # Same hash as atomic_io.file_version, without reading the file twice
+        self._index(filename, class_data, st, hashlib.sha256(raw).hexdigest()[:16])
+        return True
+
+    def _index(self, filename, class_data, st, version):
+        self._delete(filename)
+        self.conn.execute('INSERT INTO classes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', (
+            filename, class_name(filename), class_data.get('title'), class_data.get('date'),
+            class_data.get('conceptId'), st.st_mtime_ns, st.st_size, version, json.dumps(class_data)))
+        self.conn.executemany('INSERT INTO class_games VALUES (?, ?, ?, ?)',
+                              [(filename, segment, slot, game) for segment, slot, game in class_slots(class_data)])
+
+    def _delete(self, filename):
+        self.conn.execute('DELETE FROM class_games WHERE filename = ?', (filename,))
+        self.conn.execute('DELETE FROM classes WHERE filename = ?', (filename,))
+
+    def close(self):
+        with self.lock:
+            self.conn.commit()
+            self.conn.close()
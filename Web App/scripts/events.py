@@ -0,0 +1,258 @@
+import json
+import time
+import socket
+import selectors
+import threading
+from collections import deque
+
+from generate_content import CONCEPT_DETAIL_FIELDS, GAME_DETAIL_FIELDS
+
+# Changes arriving this close together (a batch, a git pull) go out as one event
+COALESCE_SECONDS = 0.05
+# Comment line sent to every client this often so proxies keep the stream open
+# and dead peers are noticed
+HEARTBEAT_SECONDS = 15
+# A client that falls this far behind (unsent bytes) is dropped; it reconnects
+# and replays from its Last-Event-ID
+MAX_CLIENT_BUFFER = 1024 * 1024
+# Recent events kept for Last-Event-ID replay; older ids get a reset event
+HISTORY_SIZE = 256
+# Browsers wait this long before reconnecting a dropped stream (ms)
+RETRY_MS = 3000
+
+def describe_change(kind, old, new):
+    """
+    Wire form of one ContentIndex change: a 'removed' entry for an id that went
+    away and an 'added'/'updated' entry carrying the new catalog record
+    (detail fields stripped, as in catalog.json).
+    """
+    detail = CONCEPT_DETAIL_FIELDS if kind == 'concept' else GAME_DETAIL_FIELDS
+    changes = []
+    if old and (not new or old['id'] != new['id']):
+        changes.append({'kind': kind, 'action': 'removed', 'id': old['id']})
+    if new:
+        action = 'updated' if old and old['id'] == new['id'] else 'added'
+        data = {k: new[k] for k in new if k not in detail}
+        changes.append({'kind': kind, 'action': action, 'id': new['id'], 'data': data})
+    return changes
+
+def format_event(event, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return ('\n'.join(lines) + '\n\n').encode('utf-8')
+
+class EventBroadcaster:
+    """
+    Server-sent event stream of content index changes.
+
+    Request handlers only write the response headers and hand the socket over
+    (add_client); from then on a single thread multiplexes every open stream
+    with a selector, so idle browsers cost a file descriptor, not a worker.
+    Subscribe it to a ContentIndex (attach) to start broadcasting.
+    """
+
+    def __init__(self, coalesce=COALESCE_SECONDS, heartbeat=HEARTBEAT_SECONDS,
+                 max_buffer=MAX_CLIENT_BUFFER, history=HISTORY_SIZE):
+        self.coalesce = coalesce
+        self.heartbeat = heartbeat
+        self.max_buffer = max_buffer
+        self.lock = threading.Lock()
+        self.pending = {}        # (kind, id) -> latest change, in arrival order
+        self.pending_reset = False
+        self.new_clients = []    # (socket, first bytes) waiting for the loop to register them
+        self.clients = {}        # socket -> bytearray of output not yet accepted by the kernel
+        # Ids are <process epoch>-<counter> so a Last-Event-ID from before a restart is recognised as stale
+        self.epoch = format(int(time.time()), 'x')
+        self.counter = 0
+        self.history = deque(maxlen=history)  # (counter, encoded event)
+        self.thread = None
+        self.selector = None
+        self._wake_r = self._wake_w = None
+
+    def attach(self, content_index):
+        content_index.subscribe(self.on_change)
+
+    def on_change(self, kind, key, old, new):
+        # Called with the content index lock held: just queue and wake the loop
+        if self.thread is None:
+            return  # nobody has ever connected, so there is nothing to replay later
+        with self.lock:
+            if kind == 'reset':
+                self.pending = {}
+                self.pending_reset = True
+            elif kind in ('concept', 'game'):
+                for change in describe_change(kind, old, new):
+                    ident = (change['kind'], change['id'])
+                    # Re-insert so the latest change for an id keeps its place at the end
+                    self.pending.pop(ident, None)
+                    self.pending[ident] = change
+        self._wake()
+
+    def add_client(self, sock, last_event_id=None):
+        """
+        Takes ownership of sock, whose response headers have been sent.
+        Events after last_event_id are replayed; an id this process can't
+        replay gets a reset event so the client reloads the catalog.
+        """
+        self.start()
+        first = f"retry: {RETRY_MS}\n\n".encode('ascii')
+        with self.lock:
+            if last_event_id:
+                first += self._replay(last_event_id)
+            self.new_clients.append((sock, first))
+        self._wake()
+
+    def client_count(self):
+        with self.lock:
+            return len(self.clients) + len(self.new_clients)
+
+    def start(self):
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.selector = selectors.DefaultSelector()
+            self._wake_r, self._wake_w = socket.socketpair()
+            self._wake_r.setblocking(False)
+            self._wake_w.setblocking(False)
+            self.selector.register(self._wake_r, selectors.EVENT_READ)
+            self.thread = threading.Thread(target=self._run, name='eco-events', daemon=True)
+            self.thread.start()
+
+    def _replay(self, last_event_id):
+        epoch, _, counter = last_event_id.partition('-')
+        try:
+            counter = int(counter)
+        except ValueError:
+            counter = -1
+        if epoch == self.epoch and counter == self.counter:
+            return b''
+        if epoch == self.epoch and self.history and self.history[0][0] <= counter + 1 and counter < self.counter:
+            return b''.join(event for n, event in self.history if n > counter)
+        return format_event('reset', {})
+
+    def _wake(self):
+        if self._wake_w is None:
+            return
+        try:
+            self._wake_w.send(b'\0')
+        except BlockingIOError:
+            pass  # already a wake-up byte waiting
+
+    def _run(self):
+        flush_at = None
+        next_heartbeat = time.monotonic() + self.heartbeat
+        while True:
+            now = time.monotonic()
+            timeout = next_heartbeat - now
+            if flush_at is not None:
+                timeout = min(timeout, flush_at - now)
+            for key, mask in self.selector.select(max(0, timeout)):
+                if key.fileobj is self._wake_r:
+                    try:
+                        while self._wake_r.recv(4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                    continue
+                sock = key.fileobj
+                if mask & selectors.EVENT_READ and not self._readable(sock):
+                    continue
+                if mask & selectors.EVENT_WRITE:
+                    self._flush(sock)
+
+            now = time.monotonic()
+            event = None
+            # New clients and the next event are taken together, so a client's
+            # replay and the broadcast it joins never skip or repeat an event
+            with self.lock:
+                new_clients, self.new_clients = self.new_clients, []
+                if (self.pending or self.pending_reset) and flush_at is None:
+                    flush_at = now + self.coalesce
+                if flush_at is not None and now >= flush_at:
+                    flush_at = None
+                    event = self._take_pending()
+            for sock, first in new_clients:
+                sock.setblocking(False)
+                self.clients[sock] = bytearray()
+                self.selector.register(sock, selectors.EVENT_READ)
+                self._send(sock, first)
+
+            if event:
+                self._broadcast(event)
+            if now >= next_heartbeat:
+                next_heartbeat = now + self.heartbeat
+                self._broadcast(b': ping\n\n')
+
+    def _take_pending(self):
+        """Encodes the queued changes as the next event. Call with self.lock held."""
+        self.counter += 1
+        event_id = f"{self.epoch}-{self.counter}"
+        if self.pending_reset:
+            event = format_event('reset', {}, event_id)
+        else:
+            event = format_event('change', {'changes': list(self.pending.values())}, event_id)
+        self.pending = {}
+        self.pending_reset = False
+        self.history.append((self.counter, event))
+        return event
+
+    def _broadcast(self, data):
+        for sock in list(self.clients):
+            self._send(sock, data)
+
+    def _send(self, sock, data):
+        buffer = self.clients.get(sock)
+        if buffer is None:
+            return
+        was_empty = not buffer
+        buffer += data
+        if len(buffer) > self.max_buffer:
+            print(f"Dropping event stream client that fell {len(buffer)} bytes behind")
+            self._drop(sock)
+        elif was_empty:
+            self._flush(sock)
+
+    def _flush(self, sock):
+        buffer = self.clients.get(sock)
+        if buffer is None:
+            return
+        try:
+            while buffer:
+                sent = sock.send(buffer)
+                del buffer[:sent]
+        except BlockingIOError:
+            pass
+        except OSError:
+            self._drop(sock)
+            return
+        # Only watch for writability while output is backed up
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if buffer else 0)
+        if self.selector.get_key(sock).events != events:
+            self.selector.modify(sock, events)
+
+    def _readable(self, sock):
+        """Browsers never send on an event stream, so readable means closed. Returns False if dropped."""
+        try:
+            data = sock.recv(4096)
+        except BlockingIOError:
+            return True
+        except OSError:
+            data = b''
+        if data:
+            return True
+        self._drop(sock)
+        return False
+
+    def _drop(self, sock):
+        self.clients.pop(sock, None)
+        try:
+            self.selector.unregister(sock)
+        except (KeyError, ValueError):
+            pass
+        try:
+            sock.close()
+        except OSError:
+            pass
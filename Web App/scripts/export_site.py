@@ -0,0 +1,319 @@
+import os
+import re
+import html
+import json
+import gzip
+import shutil
+import hashlib
+from urllib.parse import quote
+
+import image_derivatives
+from generate_content import PROJECT_ROOT, compact_json
+from build_assets import WEB_APP_DIR, COMPRESSED_SUFFIXES, build_assets, render_index
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+EXPORT_DIR = os.path.join(WEB_APP_DIR, 'dist')
+# Output path -> signature of what it was built from; lets a re-export skip unchanged files
+EXPORT_MANIFEST = '.export-manifest.json'
+
+# Text outputs at least this big get .gz (and .br) siblings for gzip_static-style servers
+MIN_COMPRESS_BYTES = 256
+
+# Device names Windows won't create a file under, whatever the extension
+WINDOWS_RESERVED = frozenset(['CON', 'PRN', 'AUX', 'NUL'] + [f'{port}{n}' for port in ('COM', 'LPT') for n in range(1, 10)])
+# Entry fields a published copy shouldn't carry (absolute local file paths). Only the
+# export drops them: the live API keeps 'path', which the editor saves and deletes by
+PRIVATE_FIELDS = ('path',)
+
+PAGE_TEMPLATE = '''<!DOCTYPE html>
+<html lang="en">
+
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{title} - BJJ Class Planner</title>
+    <link rel="stylesheet" href="{root}{stylesheet}">
+</head>
+
+<body>
+    <div id="app">
+        <header class="app-header">
+            <div class="logo"><a href="{root}index.html">BJJ Class Planner</a></div>
+            <nav><a href="{root}browse.html">Concepts &amp; Games</a></nav>
+        </header>
+        <main class="main-container">
+            <section class="panel">
+{body}
+            </section>
+        </main>
+    </div>
+</body>
+
+</html>
+'''
+
+def marked_parse(text):
+    """markedParse from js/utils.js, on HTML-escaped text so a static page can't carry markup from a file."""
+    if not text:
+        return ''
+    text = html.escape(text, quote=False)
+    text = re.sub(r'^# (.*)$', r'<h4>\1</h4>', text, flags=re.M)
+    text = re.sub(r'^## (.*)$', r'<h5>\1</h5>', text, flags=re.M)
+    text = re.sub(r'^### (.*)$', r'<h6>\1</h6>', text, flags=re.M)
+    text = re.sub(r'^#### (.*)$', r'<strong>\1</strong>', text, flags=re.M)
+    text = re.sub(r'\*\*(.*)\*\*', r'<strong>\1</strong>', text)
+    return text.replace('\n', '<br>')
+
+def page_name(item_id):
+    """
+    File name (before .json/.html) for an id's page and document, or None for
+    an empty id: the id percent-encoded, so ids with <, >, :, ? and the like
+    make files Windows can create too, with a trailing dot and device names
+    escaped as well. pageName in js/utils.js applies the same rule.
+    """
+    if not item_id:
+        return None
+    name = quote(item_id, safe='')
+    if name.endswith('.'):
+        name = name[:-1] + '%2E'
+    if name.split('.')[0].upper() in WINDOWS_RESERVED:
+        name = f"%{ord(name[0]):02X}{name[1:]}"
+    return name
+
+def page_url(kind, item_id, root=''):
+    return f"{root}{kind}/{quote(page_name(item_id))}.html"
+
+def public(item):
+    """An entry without PRIVATE_FIELDS."""
+    return {key: value for key, value in item.items() if key not in PRIVATE_FIELDS}
+
+def relative_srcset(srcset, root):
+    return ', '.join(f"{root}{candidate.strip()}" for candidate in srcset.split(','))
+
+class SiteWriter:
+    """
+    Writes files into an export directory, skipping any whose signature (a
+    content hash, or a copied file's size and mtime) matches the last export,
+    and removing what the last export wrote that this one didn't.
+    """
+
+    def __init__(self, out_dir):
+        self.out_dir = out_dir
+        try:
+            with open(os.path.join(out_dir, EXPORT_MANIFEST), 'r', encoding='utf-8') as f:
+                self.previous = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.previous = {}
+        self.outputs = {}
+        self.written = 0
+        self.unchanged = 0
+
+    def path(self, rel):
+        return os.path.join(self.out_dir, *rel.split('/'))
+
+    def _skip(self, rel, signature):
+        self.outputs[rel] = signature
+        if self.previous.get(rel) == signature and os.path.exists(self.path(rel)):
+            self.unchanged += 1
+            return True
+        self.written += 1
+        return False
+
+    def put(self, rel, body):
+        """A text output (bytes), with precompressed siblings."""
+        if self._skip(rel, hashlib.sha256(body).hexdigest()[:32]):
+            return
+        path = self.path(rel)
+        write_file(path, body)
+        write_siblings(path, body)
+
+    def copy(self, rel, source):
+        """A file copied as is (images)."""
+        st = os.stat(source)
+        if self._skip(rel, f"{st.st_size}:{st.st_mtime_ns}"):
+            return
+        path = self.path(rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        shutil.copy2(source, tmp_path)
+        os.replace(tmp_path, path)
+
+    def finish(self):
+        """Removes stale outputs and records this export. Returns (written, unchanged, removed)."""
+        removed = 0
+        for rel in self.previous:
+            if rel in self.outputs:
+                continue
+            path = self.path(rel)
+            for stale in (path,) + tuple(path + suffix for suffix in COMPRESSED_SUFFIXES):
+                try:
+                    os.remove(stale)
+                except FileNotFoundError:
+                    continue
+            removed += 1
+        os.makedirs(self.out_dir, exist_ok=True)
+        write_file(os.path.join(self.out_dir, EXPORT_MANIFEST),
+                   json.dumps(self.outputs, indent=1, sort_keys=True).encode('utf-8'))
+        return self.written, self.unchanged, removed
+
+def write_file(path, body):
+    # Write under a temp name so a static server never serves half a file
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(body)
+    os.replace(tmp_path, path)
+
+def write_siblings(path, body):
+    """path.gz and path.br next to path (or neither, for a body too small to gain from it)."""
+    siblings = {}
+    if len(body) >= MIN_COMPRESS_BYTES:
+        siblings['.gz'] = gzip.compress(body, compresslevel=9, mtime=0)
+        if brotli:
+            siblings['.br'] = brotli.compress(body)
+    for suffix in COMPRESSED_SUFFIXES:
+        if suffix in siblings:
+            write_file(path + suffix, siblings[suffix])
+        elif os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+def export_site(index, out_dir=EXPORT_DIR, web_dir=WEB_APP_DIR):
+    """
+    Writes a read-only copy of the site into out_dir that any static file
+    server can host: index.html with fingerprinted assets, the same data/
+    documents the server answers from memory (catalog, content, one per
+    concept and game), a pre-rendered HTML page per concept and game plus
+    browse.html, and the concept images. Text files get .gz/.br siblings.
+    Only files whose inputs changed since the last export are rewritten.
+    Returns (written, unchanged, removed).
+    """
+    writer = SiteWriter(out_dir)
+
+    assets_dir = os.path.join(out_dir, 'data', 'assets')
+    manifest = build_assets(web_dir, assets_dir)
+    # Fingerprinted, so a sibling that exists is already right
+    wanted = COMPRESSED_SUFFIXES if brotli else ('.gz',)
+    for url in manifest.values():
+        path = os.path.join(out_dir, *url.split('/'))
+        if not all(os.path.exists(path + suffix) for suffix in wanted):
+            with open(path, 'rb') as f:
+                write_siblings(path, f.read())
+    stylesheet = manifest.get('css/style.css', 'css/style.css')
+
+    with open(os.path.join(web_dir, 'index.html'), 'r', encoding='utf-8') as f:
+        writer.put('index.html', render_index(f.read(), manifest).encode('utf-8'))
+
+    with index.lock:
+        data = index.to_dict()
+        catalog = index.catalog()
+        concept_folders = {concept['id']: name for name, concept in sorted(index.concepts.items(), reverse=True)}
+        concept_games = {name: [index.games[p] for p in sorted(paths) if p in index.games]
+                         for name, paths in index.concept_games.items()}
+        children = {parent: sorted(index.games[p]['id'] for p in paths if p in index.games)
+                    for parent, paths in index.children.items()}
+
+    for document in (data, catalog):
+        document['concepts'] = [public(c) for c in document['concepts']]
+        document['games'] = [public(g) for g in document['games']]
+    writer.put('data/content.json', compact_json(data))
+    writer.put('data/catalog.json', compact_json(catalog))
+
+    # First entry in catalog order wins if two files produce the same id, as on the server
+    concepts, games = {}, {}
+    for kind, items, by_id in (('concepts', data['concepts'], concepts), ('games', data['games'], games)):
+        for item in items:
+            if item['id'] in by_id:
+                continue
+            if page_name(item['id']) is None:
+                print(f"Warning: {kind} without an id left out of the export")
+                continue
+            by_id[item['id']] = item
+
+    for concept_id, concept in concepts.items():
+        name = page_name(concept_id)
+        writer.put(f"data/concepts/{name}.json", compact_json(concept))
+        folder_games = concept_games.get(concept_folders.get(concept_id), [])
+        writer.put(f"concepts/{name}.html", render_concept_page(concept, folder_games, stylesheet))
+        for image in concept.get('images', []):
+            source = os.path.join(PROJECT_ROOT, *image.split('/'))
+            if os.path.isfile(source):
+                writer.copy(image, source)
+        for variant in concept.get('imageVariants', {}).values():
+            for name in image_derivatives.srcset_files(variant['srcset']):
+                source = os.path.join(index.derivatives_dir, name)
+                if os.path.isfile(source):
+                    writer.copy(f"{image_derivatives.DERIVATIVES_URL}/{name}", source)
+
+    for game_id, game in games.items():
+        name = page_name(game_id)
+        writer.put(f"data/games/{name}.json", compact_json(game))
+        parent = games.get(game.get('parentId'))
+        variations = [games[i] for i in children.get(game_id, []) if i in games]
+        writer.put(f"games/{name}.html", render_game_page(game, parent, variations, stylesheet))
+
+    writer.put('browse.html', render_browse_page(concepts.values(), data['categories'], games, stylesheet))
+    return writer.finish()
+
+def render_page(title, body, stylesheet, root):
+    return PAGE_TEMPLATE.format(title=html.escape(title), body=body, stylesheet=stylesheet, root=root).encode('utf-8')
+
+def game_links(games, root):
+    if not games:
+        return '<p class="segment-note">No games yet.</p>'
+    items = ''.join(f'<li><a href="{page_url("games", g["id"], root)}">{html.escape(g["title"])}</a></li>'
+                    for g in games if page_name(g['id']))
+    return f'<ul>{items}</ul>'
+
+def render_concept_page(concept, games, stylesheet):
+    root = '../'
+    images = ''
+    if concept.get('images'):
+        variants = concept.get('imageVariants', {})
+        tags = []
+        for image in concept['images']:
+            v = variants.get(image)
+            extra = (f' srcset="{html.escape(relative_srcset(v["srcset"], root))}" sizes="320px"'
+                     f' width="{v["width"]}" height="{v["height"]}"') if v else ''
+            tags.append(f'<img src="{root}{quote(image)}"{extra} alt="{html.escape(concept["title"])}" loading="lazy">')
+        images = f'<div class="theory-images">{"".join(tags)}</div>'
+    body = f'''<h2>{html.escape(concept['title'])}</h2>
+<div class="theory-content">{marked_parse(concept.get('content', ''))}{images}</div>
+<h3>Games</h3>
+{game_links(games, root)}'''
+    return render_page(concept['title'], body, stylesheet, root)
+
+def render_game_page(game, parent, variations, stylesheet):
+    root = '../'
+    tags = [f"⏱ {game['duration']} min" if game.get('duration') else '',
+            f"👥 {game['players']}" if game.get('players') else '',
+            game.get('type', ''), game.get('intensity', ''), game.get('difficulty', ''), game.get('category', '')]
+    meta = ''.join(f'<span class="meta-tag">{html.escape(str(t))}</span>' for t in tags if t)
+    rows = ''.join(f'<div class="game-info-row"><strong>{label}:</strong> {html.escape(game[key])}</div>'
+                   for label, key in (('Goals', 'goals'), ('Purpose', 'purpose'), ('Focus', 'focus')) if game.get(key))
+    if game.get('description'):
+        rows += f'<div class="game-info-row game-description">{marked_parse(game["description"])}</div>'
+    if parent:
+        rows += (f'<div class="game-info-row"><strong>Variation of:</strong> '
+                 f'<a href="{page_url("games", parent["id"], root)}">{html.escape(parent["title"])}</a></div>')
+    body = f'''<div class="game-card">
+<h2 class="game-title">{html.escape(game['title'])}</h2>
+<div class="game-meta-inline">{meta}</div>
+<div class="game-card-content">{rows}</div>
+</div>'''
+    if variations:
+        body += f'\n<h3>Variations</h3>\n{game_links(variations, root)}'
+    return render_page(game['title'], body, stylesheet, root)
+
+def render_browse_page(concepts, categories, games, stylesheet):
+    concept_items = ''.join(f'<li><a href="{page_url("concepts", c["id"])}">{html.escape(c["title"])}</a></li>'
+                            for c in concepts)
+    sections = [f'<h2>Concepts</h2>\n<ul>{concept_items}</ul>']
+    for category in categories:
+        listed = [games[i] for i in category['games'] if i in games]
+        sections.append(f"<h3>{html.escape(category['title'])}</h3>\n{game_links(listed, '')}")
+    return render_page('Concepts & Games', '\n'.join(sections), stylesheet, '')
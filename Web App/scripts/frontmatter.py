@@ -0,0 +1,138 @@
+import re
+
+DELIMITER = '---'
+# A header with no closing delimiter this far in is treated as unterminated
+MAX_HEADER_LINES = 200
+
+KEY_RE = re.compile(r'^[A-Za-z_][\w-]*$')
+NUMBER_RE = re.compile(r'^\d+(?:\.\d+)?')
+
+# The editor used to write missing values out literally as "None"
+NULL_VALUES = {'', 'none', 'null', '~'}
+
+# Fields coerced to numbers so they can be sorted and filtered; everything else stays text
+INT_FIELDS = ('players',)
+NUMBER_FIELDS = ('duration',)  # minutes per round, may be fractional
+# Difficulty stays the level name the editor shows; its rank is added as difficultyLevel
+DIFFICULTY_LEVELS = {'beginner': 1, 'intermediate': 2, 'advanced': 3}
+
+class Frontmatter:
+    """
+    Header of a markdown file: typed fields, the raw strings they came from,
+    and diagnostics for anything that couldn't be read. The body after the
+    closing delimiter is only read from disk when .body is first used.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.found = False      # file starts with a complete frontmatter block
+        self.raw = {}           # key -> value string as written
+        self.fields = {}        # key -> typed value (None for empty/"None")
+        self.diagnostics = []   # "line N: message" strings
+        self.body_offset = None
+        self._body = None
+
+    @property
+    def body(self):
+        if self._body is None:
+            if self.body_offset is None:
+                self._body = ''
+            else:
+                with open(self.path, 'rb') as f:
+                    f.seek(self.body_offset)
+                    self._body = f.read().decode('utf-8')
+        return self._body
+
+def read_frontmatter(path, with_body=False):
+    """
+    Reads the frontmatter block at the top of path line by line, stopping at
+    the closing delimiter. with_body also reads the rest of the file through
+    the same handle, for callers that know they need it.
+    """
+    doc = Frontmatter(path)
+    with open(path, 'rb') as f:
+        _parse_header(f, doc)
+        if with_body and doc.found:
+            doc._body = f.read().decode('utf-8')
+    if doc.found:
+        _coerce_fields(doc)
+    return doc
+
+def _parse_header(f, doc):
+    first = f.readline().decode('utf-8').lstrip('\ufeff').rstrip('\r\n')
+    if first.rstrip() != DELIMITER:
+        doc.diagnostics.append("line 1: no frontmatter (file must start with '---'); file skipped")
+        return
+
+    key = None
+    for number in range(2, MAX_HEADER_LINES + 2):
+        raw_line = f.readline()
+        if not raw_line:
+            doc.diagnostics.append("no closing '---' before the end of the file; file skipped")
+            return
+        line = raw_line.decode('utf-8').rstrip('\r\n')
+        if line.rstrip() == DELIMITER:
+            doc.found = True
+            doc.body_offset = f.tell()
+            return
+        if not line.strip() or line.lstrip().startswith('#'):
+            continue
+
+        # An indented line continues the previous value (a wrapped long "focus:" etc.)
+        if line[0] in ' \t' and key is not None:
+            doc.raw[key] = f"{doc.raw[key]} {line.strip()}".strip()
+            continue
+
+        name, sep, value = line.partition(':')
+        name = name.strip()
+        if not sep or not KEY_RE.match(name):
+            doc.diagnostics.append(f"line {number}: expected 'key: value', got {line.strip()!r}; ignored")
+            key = None
+            continue
+        if name in doc.raw:
+            doc.diagnostics.append(f"line {number}: duplicate key '{name}'; the last value wins")
+        key = name
+        doc.raw[key] = _unquote(value.strip())
+
+    doc.diagnostics.append(f"no closing '---' within {MAX_HEADER_LINES} lines; file skipped")
+
+def _unquote(value):
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in '"\'':
+        return value[1:-1]
+    return value
+
+def _coerce_fields(doc):
+    for key, value in doc.raw.items():
+        if value.strip().lower() in NULL_VALUES:
+            doc.fields[key] = None
+        elif key in INT_FIELDS or key in NUMBER_FIELDS:
+            doc.fields[key] = _number(key, value, key in INT_FIELDS, doc.diagnostics)
+        elif key == 'difficulty':
+            level = DIFFICULTY_LEVELS.get(value.strip().lower())
+            if level is None:
+                doc.diagnostics.append(f"difficulty: unknown level {value!r} "
+                                       f"(expected one of {', '.join(l.title() for l in DIFFICULTY_LEVELS)})")
+                doc.fields[key] = value
+            else:
+                doc.fields[key] = value.strip().title()
+        else:
+            doc.fields[key] = value
+
+def _number(key, value, integer, diagnostics):
+    # Leading number wins, so "5 min" reads as 5
+    match = NUMBER_RE.match(value.strip())
+    if not match:
+        diagnostics.append(f"{key}: expected a number, got {value!r}")
+        return None
+    number = float(match.group(0))
+    if integer and not number.is_integer():
+        diagnostics.append(f"{key}: expected a whole number, got {value!r}")
+    if match.group(0) != value.strip():
+        diagnostics.append(f"{key}: read {value!r} as {match.group(0)}")
+    return int(number) if integer or number.is_integer() else number
+
+def difficulty_level(difficulty):
+    """Numeric rank (1 = Beginner) of a difficulty name, or None."""
+    if not difficulty:
+        return None
+    return DIFFICULTY_LEVELS.get(str(difficulty).lower())
@@ -0,0 +1,185 @@
+import os
+import sys
+from operator import attrgetter
+from collections.abc import Mapping
+
+from frontmatter import read_frontmatter
+
+# Every key a game record can have, in the order they appear in content.json
+GAME_FIELDS = ('title', 'description', 'category', 'goals', 'purpose', 'focus', 'duration', 'players',
+               'type', 'intensity', 'difficulty', 'parentId', 'id', 'path', 'version',
+               'inherited', 'difficultyLevel', 'inheritanceError')
+# Values shared by many games (or used as dict keys elsewhere in the index) are
+# interned, so 50k games with the same category hold one string, not 50k copies
+INTERNED_FIELDS = frozenset(('category', 'type', 'intensity', 'difficulty', 'parentId', 'id', 'path'))
+
+_FIELD_SET = frozenset(GAME_FIELDS)
+_ABSENT = object()  # slot value for a key the record doesn't have
+# Every slot value in GAME_FIELDS order, in one call (records are built and
+# serialized tens of thousands at a time, so per-field Python calls add up)
+_slot_values = attrgetter(*GAME_FIELDS)
+
+class Description:
+    """
+    A game's body text left on disk: its byte range in the file and the
+    file's mtime/size when it was parsed. load() reads it back; if the file
+    has changed since (the watcher hasn't caught up yet) its current body is read instead.
+    """
+
+    __slots__ = ('path', 'offset', 'length', 'mtime_ns', 'size')
+
+    def __init__(self, path, offset, length, st):
+        self.path = path
+        self.offset = offset
+        self.length = length
+        self.mtime_ns = st.st_mtime_ns
+        self.size = st.st_size
+
+    def __bool__(self):
+        return self.length > 0
+
+    def __eq__(self, other):
+        return isinstance(other, Description) and self._key() == other._key()
+
+    __hash__ = None
+
+    def _key(self):
+        return (self.path, self.offset, self.length, self.mtime_ns, self.size)
+
+    def load(self):
+        try:
+            with open(self.path, 'rb') as f:
+                st = os.fstat(f.fileno())
+                if (st.st_mtime_ns, st.st_size) == (self.mtime_ns, self.size):
+                    f.seek(self.offset)
+                    return f.read(self.length).decode('utf-8')
+            return read_frontmatter(self.path, with_body=True).body.strip()
+        except (OSError, UnicodeDecodeError):
+            return ''
+
+class GameRecord(Mapping):
+    """
+    One game in the content index. Reads like the dict it replaces
+    (record['title'], record.get('players'), iteration in content.json key
+    order) but stores its fields in slots, interns the repetitive ones and
+    keeps the description on disk until record['description'] is read.
+
+    Iterating keys is cheap; items()/values() load the description, so code
+    that skips detail fields should filter keys first (see as_dict).
+    """
+
+    __slots__ = GAME_FIELDS
+
+    def __init__(self, fields=()):
+        get = (fields if isinstance(fields, dict) else dict(fields)).get
+        for name in GAME_FIELDS:
+            value = get(name, _ABSENT)
+            if type(value) is str and name in INTERNED_FIELDS:
+                value = sys.intern(value)
+            setattr(self, name, value)
+        if self.inherited is not _ABSENT and not self.inherited:
+            self.inherited = None
+
+    def _set(self, name, value):
+        if name in INTERNED_FIELDS and type(value) is str:
+            value = sys.intern(value)
+        elif name == 'inherited' and value is not _ABSENT and not value:
+            value = None  # most games inherit nothing; don't keep an empty dict per game
+        object.__setattr__(self, name, value)
+
+    def __getitem__(self, key):
+        value = self.get(key, _ABSENT)
+        if value is _ABSENT:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        # Mapping.get goes through __getitem__ and a KeyError; this is called far more often
+        if key not in _FIELD_SET:
+            return default
+        value = object.__getattribute__(self, key)
+        if value is _ABSENT:
+            return default
+        if type(value) is Description:
+            return value.load()
+        if key == 'inherited':
+            return dict(value or {})
+        return value
+
+    def __setitem__(self, key, value):
+        if key not in _FIELD_SET:
+            raise KeyError(key)
+        self._set(key, value)
+
+    def __contains__(self, key):
+        return key in _FIELD_SET and object.__getattribute__(self, key) is not _ABSENT
+
+    def __iter__(self):
+        for name in GAME_FIELDS:
+            if object.__getattribute__(self, name) is not _ABSENT:
+                yield name
+
+    def __len__(self):
+        return sum(1 for value in _slot_values(self) if value is not _ABSENT)
+
+    def __bool__(self):
+        # Every record has an id; without this, `if record:` would count its keys
+        return True
+
+    def __eq__(self, other):
+        if not isinstance(other, GameRecord):
+            return NotImplemented
+        return _slot_values(self) == _slot_values(other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"GameRecord({self.stored('id')!r})"
+
+    def stored(self, key):
+        """The value as held, without loading a Description; None for a missing key."""
+        value = object.__getattribute__(self, key) if key in _FIELD_SET else None
+        return None if value is _ABSENT else value
+
+    def copy(self):
+        record = GameRecord.__new__(GameRecord)
+        for name, value in zip(GAME_FIELDS, _slot_values(self)):
+            setattr(record, name, value)
+        return record
+
+    def as_dict(self, exclude=()):
+        """Plain dict for JSON, leaving out the keys in exclude (their values are never loaded)."""
+        data = {}
+        for name, value in zip(GAME_FIELDS, _slot_values(self)):
+            if value is _ABSENT or name in exclude:
+                continue
+            if type(value) is Description:
+                value = value.load()
+            elif name == 'inherited':
+                value = dict(value or {})
+            data[name] = value
+        return data
+
+def deep_size(root, seen):
+    """
+    Bytes held by root and everything it references, skipping objects whose
+    id is already in seen (and adding the rest), so shared strings and records
+    are counted once across several calls. Descriptions count their slots,
+    not the text on disk.
+    """
+    total = 0
+    stack = [root]
+    while stack:
+        obj = stack.pop()
+        if obj is None or obj is _ABSENT or id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif isinstance(obj, (GameRecord, Description)):
+            stack.extend(object.__getattribute__(obj, name) for name in type(obj).__slots__)
+    return total
@@ -1,6 +1,21 @@
 import os
+import sys
 import json
 import re
+import gzip
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import image_derivatives
+from atomic_io import atomic_write, file_version
+from frontmatter import read_frontmatter, difficulty_level
+from game_records import GameRecord, Description, deep_size
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 # Paths relative to this script
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -11,192 +26,936 @@ THEORY_DIR = os.path.join(PROJECT_ROOT, 'Concepts') # Updated to Concepts
 GAMES_DIR = os.path.join(PROJECT_ROOT, 'Games')
 
 OUTPUT_FILE = os.path.join(WEB_APP_DATA_DIR, 'content.json')
+PARSE_CACHE_FILE = os.path.join(WEB_APP_DATA_DIR, 'parse_cache.sqlite')
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+
+# Bulky fields left out of the slim catalog and served by the detail documents
+CONCEPT_DETAIL_FIELDS = ('content', 'images', 'imageVariants')
+GAME_DETAIL_FIELDS = ('description',)
+
+# Pools a full build can parse game files on (ContentIndex jobs > 1): threads
+# overlap file I/O (network disks), processes also spread the parsing across cores
+PARSE_POOLS = ('thread', 'process')
+# Files are handed to the pool in about this many batches per worker, so a
+# 50k-file tree costs a few hundred tasks (and pickles), not 50k
+BATCHES_PER_WORKER = 8
+
+# Seconds write_soon() waits before rewriting content.json, so a burst of saves costs one write
+CONTENT_WRITE_DELAY = 1.0
+
+# Game fields a variation (parent_id) takes from its parent when it leaves them empty
+INHERITED_GAME_FIELDS = ('goals', 'purpose', 'focus', 'duration', 'players', 'type',
+                         'intensity', 'difficulty', 'description')
 
 def parse_game_file(filepath):
     """
-    Parses a game file using YAML frontmatter if available.
+    Parses a game file's frontmatter (see frontmatter.py) and body.
+    Returns (games, diagnostics); a file that can't be read yields no games.
+    The body is not kept: 'descriptionAt' is its [byte offset, byte length]
+    in the file, for a game_records.Description to read back when needed.
     """
-    with open(filepath, 'r', encoding='utf-8') as f:
+    try:
+        doc = read_frontmatter(filepath, with_body=True)
+    except (OSError, UnicodeDecodeError) as e:
+        return [], [f"could not read file: {e}"]
+    if not doc.found:
+        return [], doc.diagnostics
+
+    fields = doc.fields
+    body = doc.body.strip()
+    leading = len(doc.body) - len(doc.body.lstrip())
+    body_at = [doc.body_offset + len(doc.body[:leading].encode('utf-8')), len(body.encode('utf-8'))]
+    diagnostics = list(doc.diagnostics)
+    if not fields.get('title'):
+        diagnostics.append("missing title")
+
+    # Text fields are '' when absent; players/duration are numbers or None
+    game_data = {
+        'title': fields.get('title') or 'Unknown Title',
+        'descriptionAt': body_at,
+        'category': fields.get('category') or 'Uncategorized',
+        'goals': fields.get('goals') or '',
+        'purpose': fields.get('purpose') or '',
+        'focus': fields.get('focus') or '',
+        'duration': fields.get('duration'),
+        'players': fields.get('players'),
+        'type': fields.get('type') or '',
+        'intensity': fields.get('intensity') or '',
+        'difficulty': fields.get('difficulty') or '',
+        'parentId': fields.get('parent_id') or '',
+    }
+
+    # Fallback for old purpose format in body if not in frontmatter
+    if not game_data['purpose']:
+        purpose_match = re.search(r'\*\*Purpose\*\*\s*\n*(.*)', body)
+        if purpose_match:
+            game_data['purpose'] = purpose_match.group(1).strip()
+
+    return [game_data], diagnostics
+
+def parse_concept_file(md_file, concept_name):
+    with open(md_file, 'r', encoding='utf-8') as f:
         content = f.read()
 
-    games = []
-    
-    # Check for Frontmatter
-    if content.startswith('---'):
-        parts = content.split('---', 2)
-        if len(parts) >= 3:
-            frontmatter_raw = parts[1]
-            body = parts[2].strip()
-            
-            metadata = {}
-            for line in frontmatter_raw.strip().split('\n'):
-                if ':' in line:
-                    key, value = line.split(':', 1)
-                    metadata[key.strip()] = value.strip()
-            
-            # Construct game object
-            game_data = {
-                'title': metadata.get('title', 'Unknown Title'),
-                'description': body, 
-                'category': metadata.get('category', 'Uncategorized'),
-                'goals': metadata.get('goals', ''),
-                'purpose': metadata.get('purpose', ''),
-                'focus': metadata.get('focus', ''),
-                'duration': metadata.get('duration', ''),
-                'players': metadata.get('players', ''),
-                'type': metadata.get('type', ''),
-                'intensity': metadata.get('intensity', ''),
-                'difficulty': metadata.get('difficulty', ''),
-                'parentId': metadata.get('parent_id', ''),
-            }
-            
-            # Fallback for old purpose format in body if not in frontmatter
-            if not game_data['purpose']:
-                purpose_match = re.search(r'\*\*Purpose\*\*\s*\n*(.*)', body)
-                if purpose_match:
-                    game_data['purpose'] = purpose_match.group(1).strip()
-            
-            games.append(game_data)
-            return games
-
-    return games
-
-def get_concepts():
-    concepts = []
-    if not os.path.exists(THEORY_DIR):
-        print(f"Warning: {THEORY_DIR} does not exist.")
-        return concepts
-
-    # Iterate top-level folders only
-    for concept_name in os.listdir(THEORY_DIR):
-        concept_path = os.path.join(THEORY_DIR, concept_name)
-        
-        if os.path.isdir(concept_path):
-            # Look for ConceptName.md
-            md_file = os.path.join(concept_path, f"{concept_name}.md")
-            
-            # If strictly matching name doesn't exist, maybe look for any MD that isn't in Games?
-            # But strictly matching is safer and cleaner practice.
-            if not os.path.exists(md_file):
-                 # Try finding *any* .md file at this level (that isn't in a subfolder)
-                 # This handles cases where file casing might differ slightly or legacy naming?
-                 candidates = [f for f in os.listdir(concept_path) if f.endswith('.md')]
-                 if candidates:
-                     md_file = os.path.join(concept_path, candidates[0])
-                 else:
-                     continue
-
-            with open(md_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-
-            # Extract Title
-            title_match = re.match(r'^#\s+(.*)', content)
-            
-            # Prefer title from file content, fallback to folder name
-            title = title_match.group(1).strip() if title_match else concept_name
-            
-            # Images
-            images = []
-            for img_file in os.listdir(concept_path):
-                if img_file.lower().endswith(('.jpg', '.jpeg', '.png', '.gif', '.webp')):
-                    images.append(f"Concepts/{concept_name}/{img_file}")
-
-            concepts.append({
-                'id': title.lower().replace(' ', '-'),
-                'title': title,
-                'content': content,
-                'path': md_file,
-                'images': sorted(images)
-            })
-            
-    return concepts
-
-def get_categories_and_games():
-    categories = {}
-    
-    # Scan Concepts Directory for Games
-    if not os.path.exists(THEORY_DIR):
-        print(f"Warning: {THEORY_DIR} does not exist.")
-        return [], []
-
-    all_games = []
-
-    # Iterate over each Concept folder
-    for concept_name in os.listdir(THEORY_DIR):
-        concept_path = os.path.join(THEORY_DIR, concept_name)
-        if not os.path.isdir(concept_path):
-            continue
-            
-        # Check for Games subfolder
-        games_dir = os.path.join(concept_path, 'Games')
-        if not os.path.exists(games_dir):
+    # Extract Title
+    title_match = re.match(r'^#\s+(.*)', content)
+
+    # Prefer title from file content, fallback to folder name
+    title = title_match.group(1).strip() if title_match else concept_name
+
+    return {'title': title, 'content': content, 'version': file_version(md_file)}
+
+def scan_concept_dir(concept_path):
+    """
+    Lists a concept folder in one os.scandir pass.
+    Returns (markdown DirEntries by name, image file names, Games DirEntry or None).
+    """
+    md_entries = {}
+    images = []
+    games_entry = None
+    with os.scandir(concept_path) as it:
+        for entry in it:
+            if entry.is_dir():
+                if entry.name == 'Games':
+                    games_entry = entry
+            elif entry.name.endswith('.md'):
+                md_entries[entry.name] = entry
+            elif entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                images.append(entry.name)
+    return md_entries, images, games_entry
+
+def scan_games(games_dir):
+    """
+    DirEntries of every game .md under games_dir, at any depth, so variation
+    folders like Games/Butterfly/ are included. Missing folders yield nothing.
+    """
+    found = []
+    stack = [games_dir]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except (FileNotFoundError, NotADirectoryError):
             continue
-            
-        # Initialize category (Concept name is the category)
-        if concept_name not in categories:
-            categories[concept_name] = {
-                "id": concept_name.lower().replace(" ", "-"),
-                "title": concept_name,
-                "description": "", # Could read concept file for this?
-                "games": []
+        with it:
+            for entry in it:
+                if entry.is_dir():
+                    stack.append(entry.path)
+                elif entry.name.endswith('.md'):
+                    found.append(entry)
+    return found
+
+def parse_concept_dir(concept_path, concept_name, cache=None, listing=None, derivatives_dir=None):
+    """
+    Parses a single concept folder (its markdown file and images).
+    Returns None if the folder has no markdown file.
+    listing is a scan_concept_dir() result, if the caller already has one.
+    With derivatives_dir (and Pillow), resized WebP copies of the images are
+    made there and listed under 'imageVariants'.
+    """
+    md_entries, image_names, _ = listing or scan_concept_dir(concept_path)
+
+    # Look for ConceptName.md
+    entry = md_entries.get(f"{concept_name}.md")
+
+    # If strictly matching name doesn't exist, maybe look for any MD that isn't in Games?
+    # But strictly matching is safer and cleaner practice.
+    if entry is None:
+        # Try finding *any* .md file at this level (that isn't in a subfolder)
+        # This handles cases where file casing might differ slightly or legacy naming?
+        if not md_entries:
+            return None
+        entry = md_entries[min(md_entries)]
+
+    md_file = entry.path
+    parsed = cached_parse(cache, md_file, lambda: parse_concept_file(md_file, concept_name), entry)
+    title = parsed['title']
+
+    # Images
+    images = [f"Concepts/{concept_name}/{img_file}" for img_file in image_names]
+
+    concept = {
+        'id': title.lower().replace(' ', '-'),
+        'title': title,
+        'content': parsed['content'],
+        'path': md_file,
+        'version': parsed['version'],
+        'images': sorted(images)
+    }
+    if derivatives_dir and image_derivatives.available():
+        concept['imageVariants'] = image_variants(concept_path, concept_name, image_names, cache, derivatives_dir)
+    return concept
+
+def image_variants(concept_path, concept_name, image_names, cache, derivatives_dir):
+    """
+    Maps each concept image URL to {'srcset', 'width', 'height'}. Derivatives
+    are keyed by content hash, so they are only regenerated when an image changes.
+    """
+    variants = {}
+    for name in sorted(image_names):
+        path = os.path.join(concept_path, name)
+        info = cached_parse(cache, path, lambda: image_derivatives.make_derivatives(path, derivatives_dir))
+        if info and not image_derivatives.derivatives_exist(info, derivatives_dir):
+            # Cache entry outlived its files (data/images was cleared)
+            info = image_derivatives.make_derivatives(path, derivatives_dir)
+        if info:
+            url = f"Concepts/{concept_name}/{name}"
+            variants[url] = {
+                'srcset': image_derivatives.srcset(url, info),
+                'width': info['width'],
+                'height': info['height'],
             }
-            
-        # Scan games in this folder
-        for file in os.listdir(games_dir):
-            if file.endswith('.md'):
-                path = os.path.join(games_dir, file)
-                file_games = parse_game_file(path)
-                
-                for g in file_games:
-                    # Force category to match the folder structure logic
-                    cat_key = concept_name # g.get('category', concept_name)
-                    # Or trust frontmatter? Let's prefer folder structure for consistency now.
-                    g['category'] = cat_key
-                    
-                    g['id'] = (cat_key + '-' + g['title']).lower().replace(' ', '-').replace('/', '-')
-                    g['path'] = path 
-                    categories[cat_key]["games"].append(g['id'])
-                    all_games.append(g)
-
-    return list(categories.values()), all_games
+    return variants
+
+def cached_parse(cache, path, parse, entry=None, st=None):
+    """
+    Returns parse() for path, reusing the cached result while the file's mtime/size are unchanged.
+    Pass the file's DirEntry (or its stat result) to save another os.stat call.
+    """
+    if cache is None:
+        return parse()
+    if st is None:
+        st = entry.stat() if entry else os.stat(path)
+    result = cache.get(path, st)
+    if result is None:
+        result = parse()
+        cache.put(path, st, result)
+    return result
+
+def parse_game_records(path, concept_name):
+    """
+    Parses a game file and stamps the folder-derived category, id and path on each game.
+    Returns {'games': [...], 'diagnostics': [...]}.
+    """
+    games, diagnostics = parse_game_file(path)
+    for g in games:
+        # Force category to match the folder structure logic
+        cat_key = concept_name # g.get('category', concept_name)
+        # Or trust frontmatter? Let's prefer folder structure for consistency now.
+        g['category'] = cat_key
+
+        g['id'] = (cat_key + '-' + g['title']).lower().replace(' ', '-').replace('/', '-')
+        g['path'] = path
+        # Content hash clients send back as baseVersion when saving (see /api/save)
+        g['version'] = file_version(path)
+    return {'games': games, 'diagnostics': diagnostics}
+
+def parse_game_task(task):
+    """
+    parse_game_records for a pool worker, task being (path, concept_name).
+    Returns (result, None), or (None, message) if parsing raised, so one bad
+    file is reported on its own instead of failing the whole build.
+    """
+    path, concept_name = task
+    try:
+        return parse_game_records(path, concept_name), None
+    except Exception as e:
+        return None, f"could not parse: {e!r}"
+
+def parse_game_batch(tasks):
+    return [parse_game_task(task) for task in tasks]
+
+def stat_entries(entries):
+    """DirEntry stats, None for a file that is gone or can't be read."""
+    stats = []
+    for entry in entries:
+        try:
+            stats.append(entry.stat())
+        except OSError:
+            stats.append(None)
+    return stats
+
+def batches(items, workers):
+    size = max(1, -(-len(items) // (workers * BATCHES_PER_WORKER)))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def path_signature(path):
+    """What a file or folder looks like on disk, cheaply: (mtime, size, inode), or None if it's gone."""
+    try:
+        st = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+def make_game_record(parsed, path, st):
+    """GameRecord for a parse_game_records() game, its description left on disk."""
+    fields = dict(parsed)
+    offset, length = fields.pop('descriptionAt')
+    fields['description'] = Description(path, offset, length, st) if length else ''
+    fields['path'] = path
+    return GameRecord(fields)
+
+def get_concepts(jobs=1, pool='thread'):
+    index = ContentIndex(jobs=jobs, pool=pool)
+    index.build()
+    return index.to_dict()['concepts']
+
+def get_categories_and_games(jobs=1, pool='thread'):
+    index = ContentIndex(jobs=jobs, pool=pool)
+    index.build()
+    data = index.to_dict()
+    return data['categories'], data['games']
+
+def make_category(concept_name):
+    return {
+        "id": concept_name.lower().replace(" ", "-"),
+        "title": concept_name,
+        "description": "", # Could read concept file for this?
+        "games": []
+    }
+
+class ContentIndex:
+    """
+    In-memory concept/game index that can be patched one path at a time.
+
+    The server keeps one of these alive so a write only re-parses the file it
+    touched instead of rescanning the whole Concepts tree.
+    """
+
+    def __init__(self, concepts_dir=THEORY_DIR, cache=None, derivatives_dir=None, output_file=OUTPUT_FILE,
+                 jobs=1, pool='thread'):
+        if pool not in PARSE_POOLS:
+            raise ValueError(f"unknown parse pool {pool!r}; expected one of {', '.join(PARSE_POOLS)}")
+        self.concepts_dir = os.path.abspath(concepts_dir)
+        self.output_file = output_file  # where write() puts content.json
+        self.cache = cache      # optional ParseCache shared across runs
+        self.derivatives_dir = derivatives_dir  # where resized images go; None disables them
+        self.jobs = jobs        # game files a full build parses at once; 1 parses them one by one
+        self.pool = pool        # 'thread' or 'process' (see PARSE_POOLS)
+        self.concepts = {}      # concept folder name -> concept dict
+        self.games = {}         # game file path -> game dict with inheritance resolved
+        self.raw_games = {}     # game file path -> game dict as written in its file
+        self.game_ids = {}      # game id -> tuple of file paths producing it (almost always one)
+        self.children = {}      # parent game id -> set of file paths naming it as parent_id
+        self.concept_games = {} # concept folder name -> set of its game file paths
+        self.game_dirs = set()  # concept folder names that have a Games folder
+        self.diagnostics = {}   # game file path -> problems found parsing it
+        # Callables (kind, key, old, new) told about every entry change; kind is
+        # 'concept' (key = folder name), 'game' (key = file path) or 'reset' before a full build
+        self.listeners = []
+        # Guards the dicts above; the threaded server patches and reads the index concurrently
+        self.lock = threading.RLock()
+        # Bumped on every change so cached payloads know when to rebuild
+        self.version = 0
+        # Entries (concepts, games, Games folders) changed so far; refresh_paths reports the difference
+        self.changes = 0
+        # Path -> path_signature when refresh_paths last looked at it (see is_current)
+        self._refreshed = {}
+        # During a full build games are resolved once at the end, not as each file arrives
+        self._deferred_resolve = False
+        # Game path -> (stat, parse result, parsed fresh) made ahead of a full build's serial pass
+        self._prefetched = {}
+        self._payloads = {}
+        self._ids = None
+        self._payload_version = None
+        # Encoded payloads served from / built into the cache, for /api/metrics
+        self.payload_hits = 0
+        self.payload_misses = 0
+        # Serializes content.json writes, which run outside self.lock
+        self._write_lock = threading.Lock()
+        self._write_timer = None    # pending write_soon(), if any
+        self._written_version = None
+
+    def subscribe(self, listener):
+        with self.lock:
+            self.listeners.append(listener)
+
+    def _notify(self, kind, key, old, new):
+        if old == new:
+            return
+        self._changed()
+        for listener in self.listeners:
+            listener(kind, key, old, new)
+
+    def build(self):
+        """Full scan of the Concepts tree."""
+        with self.lock:
+            self._build()
+            if self.cache:
+                evicted = self.cache.prune(self._indexed_files())
+                if evicted:
+                    print(f"Evicted {evicted} deleted file(s) from parse cache")
+                self.cache.commit()
+            if self.derivatives_dir:
+                keep = set()
+                for concept in self.concepts.values():
+                    for variant in concept.get('imageVariants', {}).values():
+                        keep |= image_derivatives.srcset_files(variant['srcset'])
+                removed = image_derivatives.prune_derivatives(keep, self.derivatives_dir)
+                if removed:
+                    print(f"Removed {removed} stale image derivative(s)")
+
+    def _build(self):
+        self.version += 1
+        self.concepts = {}
+        self.games = {}
+        self.raw_games = {}
+        self.game_ids = {}
+        self.children = {}
+        self.concept_games = {}
+        self.game_dirs = set()
+        self.diagnostics = {}
+        for listener in self.listeners:
+            listener('reset', None, None, None)
+
+        if not os.path.exists(self.concepts_dir):
+            print(f"Warning: {self.concepts_dir} does not exist.")
+            return
+
+        # Single pass: each folder is scandir'ed once and DirEntry stats feed the parse cache
+        with os.scandir(self.concepts_dir) as it:
+            concept_names = [entry.name for entry in it if entry.is_dir()]
+        self._deferred_resolve = True
+        try:
+            if self.jobs > 1:
+                self._prefetched = self._parse_games_in_parallel(concept_names)
+            for concept_name in concept_names:
+                self._refresh_concept(concept_name, with_games=True)
+        finally:
+            self._deferred_resolve = False
+            self._prefetched = {}
+        self._resolve_games(self.raw_games)
+
+    def _parse_games_in_parallel(self, concept_names):
+        """
+        Stats and parses every game file on a pool of self.jobs workers ahead
+        of the serial pass, which then indexes them in the usual (sorted) order,
+        so the result doesn't depend on which file finished first. Files the
+        parse cache already has are not re-parsed.
+        """
+        entries = [(entry, concept_name) for concept_name in concept_names
+                   for entry in scan_games(os.path.join(self.concepts_dir, concept_name, 'Games'))]
+        with ThreadPoolExecutor(self.jobs) as threads:
+            stats = [st for batch in threads.map(stat_entries, batches([e for e, _ in entries], self.jobs))
+                     for st in batch]
+
+        prefetched, tasks, task_stats = {}, [], []
+        for (entry, concept_name), st in zip(entries, stats):
+            if st is None:
+                continue  # gone already; the serial pass sees that too
+            cached = self.cache.get(entry.path, st) if self.cache else None
+            if cached is not None:
+                prefetched[entry.path] = (st, cached, False)
+            else:
+                tasks.append((entry.path, concept_name))
+                task_stats.append(st)
+
+        executor = ProcessPoolExecutor(self.jobs) if self.pool == 'process' else ThreadPoolExecutor(self.jobs)
+        with executor:
+            results = [r for batch in executor.map(parse_game_batch, batches(tasks, self.jobs)) for r in batch]
+            for (path, _), st, (parsed, error) in zip(tasks, task_stats, results):
+                if error:
+                    prefetched[path] = (st, {'games': [], 'diagnostics': [error]}, False)
+                else:
+                    prefetched[path] = (st, parsed, True)
+        return prefetched
+
+    def _changed(self):
+        self.version += 1
+        self.changes += 1
+
+    def refresh_path(self, path):
+        """
+        Re-parses whatever a changed (created, saved or deleted) path affects.
+        Files outside the Concepts tree are ignored. Returns how many entries
+        changed (0 if the path's files parse to what the index already had).
+        """
+        return self.refresh_paths([path])
+
+    def refresh_paths(self, paths):
+        """refresh_path for several paths under one lock and one cache commit."""
+        with self.lock:
+            before = self.changes
+            for path in paths:
+                path = os.path.abspath(path)
+                self._refresh_path(path)
+                self._refreshed[path] = path_signature(path)
+            if self.cache:
+                self.cache.commit()
+            return self.changes - before
+
+    def is_current(self, path):
+        """True if path is as it was when refresh_paths last looked at it (a watcher seeing the server's own save)."""
+        path = os.path.abspath(path)
+        with self.lock:
+            return path in self._refreshed and self._refreshed[path] == path_signature(path)
+
+    def _indexed_files(self):
+        files = set(self.games) | {c['path'] for c in self.concepts.values()}
+        # Image derivative results are cached under the source image path
+        project_dir = os.path.dirname(self.concepts_dir)
+        for concept in self.concepts.values():
+            files.update(os.path.join(project_dir, *url.split('/')) for url in concept.get('imageVariants', ()))
+        return files
+
+    def _refresh_path(self, path):
+        rel = os.path.relpath(path, self.concepts_dir)
+        if rel == os.curdir:
+            self._build()
+            return
+        if rel == os.pardir or rel.startswith(os.pardir + os.sep):
+            return
+
+        parts = rel.split(os.sep)
+        concept_name = parts[0]
+        # A Games folder appearing or going changes the categories without changing an entry
+        had_games = concept_name in self.game_dirs
+        self._refresh_concept_path(path, parts, concept_name)
+        if (concept_name in self.game_dirs) != had_games:
+            self._changed()
+
+    def _refresh_concept_path(self, path, parts, concept_name):
+
+        # Only the concept folder's own files (markdown, images, Games folder) affect the concept entry
+        if len(parts) == 1 or (len(parts) == 2 and parts[1] == 'Games'):
+            # The concept folder or its Games folder was created or deleted
+            self._refresh_concept(concept_name, with_games=True)
+        elif len(parts) == 2:
+            self._refresh_concept(concept_name)
+        elif parts[1] == 'Games':
+            if path.endswith('.md') and not os.path.isdir(path):
+                self._refresh_game(path, concept_name)
+            elif os.path.isdir(path) or self._has_games_under(path, concept_name):
+                self._refresh_games_dir(concept_name)
+
+    def _has_games_under(self, path, concept_name):
+        prefix = path + os.sep
+        return any(p.startswith(prefix) for p in self.concept_games.get(concept_name, ()))
+
+    def _refresh_concept(self, concept_name, with_games=False):
+        concept_path = os.path.join(self.concepts_dir, concept_name)
+        try:
+            listing = scan_concept_dir(concept_path)
+        except (FileNotFoundError, NotADirectoryError):
+            listing = None
+
+        concept = None
+        if listing:
+            concept = parse_concept_dir(concept_path, concept_name, self.cache, listing, self.derivatives_dir)
+
+        previous = self.concepts.pop(concept_name, None)
+        if previous and self.cache and (not concept or concept['path'] != previous['path']):
+            self.cache.delete(previous['path'])
+        if concept:
+            self.concepts[concept_name] = concept
+        self._notify('concept', concept_name, previous, concept)
+
+        if listing and listing[2] is not None:
+            self.game_dirs.add(concept_name)
+        else:
+            self.game_dirs.discard(concept_name)
+
+        if with_games:
+            self._refresh_games_dir(concept_name)
+
+    def _refresh_games_dir(self, concept_name):
+        games_dir = os.path.join(self.concepts_dir, concept_name, 'Games')
+        entries = {entry.path: entry for entry in scan_games(games_dir)}
+
+        for path in self.concept_games.get(concept_name, set()) - entries.keys():
+            self._remove_game(path, concept_name)
+
+        for path, entry in entries.items():
+            self._refresh_game(path, concept_name, entry)
+
+    def _refresh_game(self, path, concept_name, entry=None):
+        # One string object for the path, shared by every map keyed on it and the record itself
+        path = sys.intern(path)
+        prefetched = self._prefetched.pop(path, None)
+        if prefetched:
+            st, parsed, fresh = prefetched
+            if fresh and self.cache:
+                self.cache.put(path, st, parsed)
+        else:
+            try:
+                # Stat before parsing: if the file changes in between, the recorded stat
+                # is the older one and the description is re-read (see Description.load)
+                st = entry.stat() if entry else os.stat(path)
+            except (FileNotFoundError, NotADirectoryError):
+                self._remove_game(path, concept_name)
+                return
+            parsed = cached_parse(self.cache, path, lambda: parse_game_records(path, concept_name), st=st)
+
+        self.game_dirs.add(concept_name)
+        records = parsed['games']
+        self._set_diagnostics(path, parsed['diagnostics'])
+        if records:
+            self.concept_games.setdefault(concept_name, set()).add(path)
+        self._set_raw_game(path, make_game_record(records[-1], path, st) if records else None)
+
+    def _set_diagnostics(self, path, messages):
+        previous = self.diagnostics.pop(path, [])
+        if messages:
+            self.diagnostics[path] = messages
+            if messages != previous:
+                for message in messages:
+                    print(f"Warning: {path}: {message}")
+
+    def diagnostics_report(self):
+        """[{'path', 'diagnostics'}] for every game file with parse problems, by path."""
+        with self.lock:
+            return [{'path': path, 'diagnostics': list(self.diagnostics[path])}
+                    for path in sorted(self.diagnostics)]
+
+    def _remove_game(self, path, concept_name):
+        self._set_diagnostics(path, [])
+        self.concept_games.get(concept_name, set()).discard(path)
+        if self.cache:
+            self.cache.delete(path)
+        self._set_raw_game(path, None)
+
+    def _set_raw_game(self, path, record):
+        """
+        Stores (or, with None, drops) the parsed game at path and re-resolves it
+        plus every game that inherits from it, directly or further down the chain.
+        """
+        old = self.raw_games.pop(path, None)
+        if old:
+            remaining = tuple(p for p in self.game_ids.get(old['id'], ()) if p != path)
+            if remaining:
+                self.game_ids[old['id']] = remaining
+            else:
+                self.game_ids.pop(old['id'], None)
+            if old.get('parentId'):
+                self.children.get(old['parentId'], set()).discard(path)
+        if record:
+            self.raw_games[path] = record
+            paths = self.game_ids.get(record['id'], ())
+            if path not in paths:
+                self.game_ids[record['id']] = paths + (path,)
+            if record.get('parentId'):
+                self.children.setdefault(record['parentId'], set()).add(path)
+
+        if self._deferred_resolve:
+            return
+
+        # Walk the reverse-dependency index from both the old and new id: a renamed
+        # game orphans the variations of its old id and may adopt those of its new one
+        affected = {path}
+        pending = [r['id'] for r in (old, record) if r]
+        seen = set()
+        while pending:
+            game_id = pending.pop()
+            if game_id in seen:
+                continue
+            seen.add(game_id)
+            for child in self.children.get(game_id, ()):
+                if child not in affected:
+                    affected.add(child)
+                    pending.append(self.raw_games[child]['id'])
+
+        self._resolve_games(affected)
+
+    def _resolve_games(self, paths):
+        for p in sorted(paths):
+            previous = self.games.pop(p, None)
+            game = self._resolve_game(p) if p in self.raw_games else None
+            if game:
+                self.games[p] = game
+                if game.get('inheritanceError') and game['inheritanceError'] != (previous or {}).get('inheritanceError'):
+                    print(f"Warning: {game['id']} ({p}): {game['inheritanceError']}")
+            self._notify('game', p, previous, game)
+
+    def _resolve_game(self, path):
+        """
+        Effective game at path: empty inheritable fields are filled from the
+        nearest ancestor that sets them. 'inherited' maps each filled field to the
+        ancestor id it came from, so the file's own values remain recoverable.
+        A cycle in the parent chain disables inheritance for that game.
+        """
+        raw = self.raw_games[path]
+        game = raw.copy()
+        inherited = {}
+        error = None
+        chain = [path]
+        parent_id = raw.get('parentId')
+        while parent_id:
+            paths = self.game_ids.get(parent_id)
+            if not paths:
+                error = f"parent '{parent_id}' not found"
+                break
+            # Same tie-break as _id_maps: first path in catalog order wins
+            parent_path = min(paths)
+            if parent_path in chain:
+                error = f"parent_id cycle via '{parent_id}'"
+                game = raw.copy()
+                inherited = {}
+                break
+            chain.append(parent_path)
+            parent = self.raw_games[parent_path]
+            for field in INHERITED_GAME_FIELDS:
+                # stored() so an inherited description is shared, not read from disk
+                if not game.stored(field) and parent.stored(field):
+                    game[field] = parent.stored(field)
+                    inherited[field] = parent['id']
+            parent_id = parent.get('parentId')
+
+        game['inherited'] = inherited
+        # Numeric rank for sorting/filtering, from the effective (possibly inherited) difficulty
+        game['difficultyLevel'] = difficulty_level(game.get('difficulty'))
+        if error:
+            game['inheritanceError'] = error
+        return game
+
+    def to_dict(self):
+        with self.lock:
+            return self._expand(self._snapshot())
+
+    def _snapshot(self):
+        """The parts of to_dict() that need the lock. Entries are replaced on change, never edited, so they can be read after."""
+        games = self.game_list()
+        return self.version, {
+            "concepts": [self.concepts[name] for name in sorted(self.concepts)],
+            "categories": self._categories(games),
+            "games": games
+        }
+
+    @staticmethod
+    def _expand(snapshot):
+        """to_dict() from a snapshot: game descriptions are read back from disk here."""
+        _, data = snapshot
+        return dict(data, games=[g.as_dict() for g in data['games']])
+
+    def catalog(self):
+        """
+        Slim index for first paint: ids, titles, categories and frontmatter
+        fields, without concept markdown or game descriptions.
+        """
+        with self.lock:
+            games = self.game_list()
+            return {
+                "concepts": [{k: v for k, v in self.concepts[name].items() if k not in CONCEPT_DETAIL_FIELDS}
+                             for name in sorted(self.concepts)],
+                "categories": self._categories(games),
+                "games": [g.as_dict(GAME_DETAIL_FIELDS) for g in games]
+            }
+
+    def game_list(self):
+        """GameRecords in catalog order, descriptions still on disk."""
+        with self.lock:
+            return [self.games[path] for path in sorted(self.games)]
+
+    def _categories(self, games):
+        categories = {name: make_category(name) for name in sorted(self.game_dirs)}
+        for g in games:
+            if g['category'] in categories:
+                categories[g['category']]['games'].append(g['id'])
+        return list(categories.values())
+
+    def memory_report(self):
+        """
+        Approximate bytes held by the index, by part. Objects shared between
+        parts (interned strings, records in several maps) count once, in the
+        first part that holds them; descriptions left on disk are listed separately.
+        """
+        with self.lock:
+            seen = set()
+            parts = {
+                'games': deep_size(self.games, seen),
+                'raw_games': deep_size(self.raw_games, seen),
+                'concepts': deep_size(self.concepts, seen),
+                'lookups': deep_size((self.game_ids, self.children, self.concept_games, self.game_dirs,
+                                      self.diagnostics, self._ids), seen),
+                'payload_cache': deep_size(self._payloads, seen),
+            }
+            on_disk = {id(d): d.length for d in (g.stored('description') for g in self.raw_games.values())
+                       if isinstance(d, Description)}
+            return {
+                'concepts': len(self.concepts),
+                'games': len(self.games),
+                'bytes': parts,
+                'total_bytes': sum(parts.values()),
+                'description_bytes_on_disk': sum(on_disk.values()),
+            }
+
+    def find_concept(self, concept_id):
+        with self.lock:
+            return self._id_maps()[0].get(concept_id)
+
+    def find_game(self, game_id):
+        with self.lock:
+            return self._id_maps()[1].get(game_id)
+
+    def _sync_caches(self):
+        """Drops derived caches (payloads, id maps) built before the last change."""
+        if self._payload_version != self.version:
+            self._payloads = {}
+            self._ids = None
+            self._payload_version = self.version
+
+    def _id_maps(self):
+        self._sync_caches()
+        if self._ids is None:
+            # First entry in catalog order wins if two files produce the same id
+            concepts = {}
+            for name in sorted(self.concepts, reverse=True):
+                concepts[self.concepts[name]['id']] = self.concepts[name]
+            games = {}
+            for path in sorted(self.games, reverse=True):
+                games[self.games[path]['id']] = self.games[path]
+            self._ids = (concepts, games)
+        return self._ids
+
+    def payload(self, name='content'):
+        """
+        Encoded payload (see encode_payload) for one of the served documents:
+        'content' (everything), 'catalog' (slim index), 'concepts/<id>' or
+        'games/<id>' (details). Cached until the index next changes; None if
+        there is no such document.
+        """
+        with self.lock:
+            self._sync_caches()
+            if name in self._payloads:
+                self.payload_hits += 1
+            else:
+                self.payload_misses += 1
+                data = self._document(name)
+                self._payloads[name] = encode_payload(data) if data is not None else None
+            return self._payloads[name]
+
+    def _document(self, name):
+        if name == 'content':
+            return self.to_dict()
+        if name == 'catalog':
+            return self.catalog()
+        kind, _, item_id = name.partition('/')
+        if kind == 'concepts':
+            return self.find_concept(item_id)
+        if kind == 'games':
+            game = self.find_game(item_id)
+            return game.as_dict() if game else None
+        return None
+
+    def write(self, output_file=None):
+        """
+        Writes content.json. Only the snapshot is taken under self.lock;
+        reading descriptions back and serializing (the slow part, one open per
+        game file) happen outside it, so requests aren't held up meanwhile.
+        """
+        with self._write_lock:
+            with self.lock:
+                snapshot = self._snapshot()
+            write_content(self._expand(snapshot), output_file or self.output_file)
+            if output_file is None:
+                self._written_version = snapshot[0]
+
+    def write_soon(self, delay=CONTENT_WRITE_DELAY):
+        """
+        write() after delay seconds on a background thread, once for however
+        many calls arrive meanwhile. The server does this after each change:
+        it answers from memory, so content.json only has to catch up.
+        """
+        with self._write_lock:
+            if self._write_timer is not None:
+                return
+            self._write_timer = threading.Timer(delay, self._deferred_write)
+            self._write_timer.daemon = True
+            self._write_timer.start()
+
+    def _deferred_write(self):
+        with self._write_lock:
+            self._write_timer = None
+        with self.lock:
+            current = self._written_version == self.version
+        if not current:
+            self.write()
+
+    def flush(self):
+        """Does a pending write_soon() now (at shutdown)."""
+        with self._write_lock:
+            timer, self._write_timer = self._write_timer, None
+        if timer is not None:
+            timer.cancel()
+            self._deferred_write()
+
+def encode_payload(data):
+    """
+    Serializes data for the wire: compact JSON, a content-hash ETag and
+    gzip (plus brotli, if installed) encodings.
+    """
+    return encode_body(compact_json(data))
+
+def compact_json(data):
+    """The JSON bytes served for a document: no whitespace, UTF-8."""
+    return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+def encode_body(body):
+    """encode_payload for a body that is already bytes: ETag and compressed encodings."""
+    encodings = {'gzip': gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli:
+        encodings['br'] = brotli.compress(body)
+    return {
+        'body': body,
+        'etag': hashlib.sha256(body).hexdigest()[:32],
+        'encodings': encodings
+    }
+
+def write_content(data, output_file=OUTPUT_FILE):
+    output_dir = os.path.dirname(output_file)
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    atomic_write(output_file, json.dumps(data, indent=2))
 
 def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate data/content.json from the Concepts tree")
+    parser.add_argument('--watch', action='store_true',
+                        help="Keep running and update content.json as files change")
+    parser.add_argument('--poll', action='store_true',
+                        help="With --watch, poll mtimes instead of using inotify")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Re-parse every file instead of reusing data/parse_cache.sqlite")
+    parser.add_argument('--jobs', type=int, default=1,
+                        help="Parse game files on this many workers (helps most on network disks)")
+    parser.add_argument('--pool', choices=PARSE_POOLS, default='thread',
+                        help="With --jobs, parse on threads (I/O-bound) or processes (CPU-bound)")
+    parser.add_argument('--export', nargs='?', const='', metavar='DIR',
+                        help="Also write a static, read-only copy of the site (default: Web App/dist)")
+    args = parser.parse_args()
+
     print("Generating content...")
-    concepts = get_concepts()
-    print(f"Found {len(concepts)} concepts.")
-    
-    categories, games = get_categories_and_games()
-    print(f"Found {len(categories)} categories and {len(games)} games.")
-    
-    data = {
-        "concepts": concepts, 
-        "categories": categories,
-        "games": games
-    }
-    
-    if not os.path.exists(WEB_APP_DATA_DIR):
-        os.makedirs(WEB_APP_DATA_DIR)
-        
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2)
-        
+    cache = None
+    if not args.no_cache:
+        from parse_cache import ParseCache
+        cache = ParseCache(PARSE_CACHE_FILE)
+    index = ContentIndex(cache=cache, derivatives_dir=image_derivatives.DERIVATIVES_DIR, jobs=args.jobs, pool=args.pool)
+    index.build()
+    if cache:
+        print(f"Parse cache: {cache.hits} unchanged, {cache.misses} parsed.")
+    data = index.to_dict()
+    print(f"Found {len(data['concepts'])} concepts.")
+    print(f"Found {len(data['categories'])} categories and {len(data['games'])} games.")
+
+    write_content(data)
     print(f"Content generated at {OUTPUT_FILE}")
 
-    # Auto-Cache Busting for index.html
-    import time
-    index_path = os.path.join(BASE_DIR, '../index.html')
-    if os.path.exists(index_path):
-        with open(index_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        
-        # Replace existing version param or add one
-        timestamp = int(time.time())
-        # Regex to find src="js/app.js..."
-        new_html = re.sub(r'src="js/app\.js(\?v=\d+)?"', f'src="js/app.js?v={timestamp}"', html_content)
-        
-        with open(index_path, 'w', encoding='utf-8') as f:
-            f.write(new_html)
-        print(f"Updated index.html with version {timestamp}")
+    from build_assets import build_assets
+    manifest = build_assets()
+    print(f"Fingerprinted {len(manifest)} asset(s); the server points index.html at them")
+
+    export = None
+    if args.export is not None:
+        from export_site import export_site, EXPORT_DIR
+        out_dir = os.path.abspath(args.export or EXPORT_DIR)
+
+        def export():
+            written, unchanged, removed = export_site(index, out_dir)
+            print(f"Static export in {out_dir}: {written} written, {unchanged} unchanged, {removed} removed")
+        export()
+
+    if args.watch:
+        from watcher import ContentWatcher
+
+        def on_change(paths):
+            index.write()
+            if export:
+                export()
+        watcher = ContentWatcher(index, on_change=on_change, force_polling=args.poll)
+        try:
+            watcher.run()
+        except KeyboardInterrupt:
+            pass
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,97 @@
+import os
+import hashlib
+from urllib.parse import quote
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+# Paths relative to this script
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DERIVATIVES_DIR = os.path.abspath(os.path.join(BASE_DIR, '../data/images'))
+# URL of DERIVATIVES_DIR as seen by the browser (served by the static handler)
+DERIVATIVES_URL = 'data/images'
+
+# Concept images render as cards at most 200px tall, so two widths cover 1x and 2x screens
+DERIVATIVE_WIDTHS = (320, 640)
+WEBP_QUALITY = 80
+
+def available():
+    """Derivatives need Pillow; without it concepts keep serving the original images."""
+    return Image is not None
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(chunk)
+    return h.hexdigest()[:24]
+
+def make_derivatives(source, out_dir=DERIVATIVES_DIR):
+    """
+    Writes resized WebP copies of the image at source into out_dir, named
+    <content hash>-<width>.webp, skipping any that already exist.
+    Returns {'width', 'height', 'variants': [[file name, width], ...]}, or
+    None if Pillow is missing or the file can't be decoded.
+    """
+    if Image is None:
+        return None
+
+    digest = file_digest(source)
+    try:
+        with Image.open(source) as img:
+            img = ImageOps.exif_transpose(img)
+            width, height = img.size
+            variants = []
+            for target in DERIVATIVE_WIDTHS:
+                if target >= width:
+                    break
+                name = f"{digest}-{target}.webp"
+                variants.append([name, target])
+                out_path = os.path.join(out_dir, name)
+                if os.path.exists(out_path):
+                    continue
+
+                if not os.path.exists(out_dir):
+                    os.makedirs(out_dir, exist_ok=True)
+                resized = img.resize((target, max(1, round(height * target / width))), Image.LANCZOS)
+                if resized.mode not in ('RGB', 'RGBA'):
+                    resized = resized.convert('RGBA' if 'A' in resized.getbands() else 'RGB')
+                # Write under a temp name so a concurrent reader never sees half a file
+                tmp_path = out_path + '.tmp'
+                resized.save(tmp_path, 'WEBP', quality=WEBP_QUALITY, method=6)
+                os.replace(tmp_path, out_path)
+    except (OSError, ValueError) as e:
+        print(f"Warning: could not make derivatives of {source}: {e}")
+        return None
+
+    return {'width': width, 'height': height, 'variants': variants}
+
+def derivatives_exist(info, out_dir=DERIVATIVES_DIR):
+    return all(os.path.exists(os.path.join(out_dir, name)) for name, _ in info['variants'])
+
+def srcset(original_url, info):
+    """srcset value listing the derivatives plus the original at its native width."""
+    entries = [f"{DERIVATIVES_URL}/{name} {width}w" for name, width in info['variants']]
+    # Spaces and commas would split the candidate list
+    entries.append(f"{quote(original_url)} {info['width']}w")
+    return ', '.join(entries)
+
+def srcset_files(value):
+    """Derivative file names referenced by a srcset() value."""
+    prefix = DERIVATIVES_URL + '/'
+    urls = (candidate.strip().split(' ')[0] for candidate in value.split(','))
+    return {url[len(prefix):] for url in urls if url.startswith(prefix)}
+
+def prune_derivatives(keep, out_dir=DERIVATIVES_DIR):
+    """Deletes derivative files whose name is not in keep (their source changed or was removed)."""
+    if not os.path.isdir(out_dir):
+        return 0
+    removed = 0
+    with os.scandir(out_dir) as it:
+        for entry in it:
+            if entry.is_file() and entry.name not in keep:
+                os.remove(entry.path)
+                removed += 1
+    return removed
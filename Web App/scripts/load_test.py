@@ -0,0 +1,139 @@
+import os
+import sys
+import time
+import socket
+import argparse
+import threading
+import http.client
+from urllib.parse import quote
+
+# Paths relative to this script
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+WEB_APP_DIR = os.path.abspath(os.path.join(BASE_DIR, '..'))
+sys.path.insert(0, WEB_APP_DIR)
+
+import server
+
+# Keep the per-request access log out of the results
+server.EcoHandler.log_message = lambda self, *args: None
+
+def pick_paths():
+    """Read-only endpoints a coach's browser hits on page load."""
+    paths = ['/', '/js/app.js', '/data/catalog.json', '/data/content.json', '/api/list_classes']
+
+    # Largest concept image, to mix in a slow-ish static transfer
+    concepts_dir = os.path.join(server.PROJECT_ROOT, 'Concepts')
+    images = []
+    for root, dirs, files in os.walk(concepts_dir):
+        for file in files:
+            if file.lower().endswith(('.jpg', '.jpeg', '.png', '.webp')):
+                full = os.path.join(root, file)
+                images.append((os.path.getsize(full), full))
+    if images:
+        rel = os.path.relpath(max(images)[1], server.PROJECT_ROOT).replace(os.sep, '/')
+        paths.append('/' + quote(rel))
+    return paths
+
+def hold_slow_client(port, stop):
+    """Opens a connection and trickles a request, like a tablet on bad Wi-Fi."""
+    sock = socket.create_connection(('127.0.0.1', port))
+    try:
+        sock.sendall(b'GET /data/content.json HTTP/1.1\r\n')
+        while not stop.is_set():
+            sock.sendall(b'X-Slow: 1\r\n')
+            stop.wait(0.5)
+        sock.sendall(b'\r\n')
+        while sock.recv(65536):
+            pass
+    except OSError:
+        pass
+    finally:
+        sock.close()
+
+def run_client(port, paths, requests_per_client, latencies, errors):
+    for i in range(requests_per_client):
+        path = paths[i % len(paths)]
+        start = time.perf_counter()
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            conn.request('GET', path)
+            resp = conn.getresponse()
+            resp.read()
+            conn.close()
+            if resp.status >= 400:
+                errors.append(f"{path}: {resp.status}")
+        except OSError as e:
+            errors.append(f"{path}: {e}")
+        latencies.append(time.perf_counter() - start)
+
+def run_mode(workers, clients, requests_per_client, slow_clients):
+    httpd = server.create_server(0, workers, host='127.0.0.1')
+    port = httpd.server_address[1]
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+
+    stop = threading.Event()
+    slow_threads = [threading.Thread(target=hold_slow_client, args=(port, stop), daemon=True)
+                    for _ in range(slow_clients)]
+    for t in slow_threads:
+        t.start()
+    time.sleep(0.2)
+
+    paths = pick_paths()
+    latencies = []
+    errors = []
+    threads = [threading.Thread(target=run_client, args=(port, paths, requests_per_client, latencies, errors))
+               for _ in range(clients)]
+
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    httpd.shutdown()
+    httpd.server_close()
+
+    latencies.sort()
+    total = len(latencies)
+    return {
+        'workers': workers,
+        'requests': total,
+        'errors': len(errors),
+        'elapsed': elapsed,
+        'throughput': total / elapsed if elapsed else 0.0,
+        'p50': latencies[total // 2] if total else 0.0,
+        'p95': latencies[min(total - 1, int(total * 0.95))] if total else 0.0,
+    }
+
+def main():
+    server.CONTENT_INDEX.build()
+    server.CLASS_STORE.sync()
+
+    parser = argparse.ArgumentParser(description="Load test server.py with parallel clients")
+    parser.add_argument('--clients', type=int, default=32, help="Parallel clients")
+    parser.add_argument('--requests', type=int, default=50, help="Requests per client")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, server.DEFAULT_WORKERS],
+                        help="Worker counts to compare (1 = single-threaded)")
+    parser.add_argument('--slow-clients', type=int, default=0,
+                        help="Connections that trickle their request headers during the run")
+    args = parser.parse_args()
+
+    # The slow clients hold a worker for the whole run, so a server without
+    # spare workers would stall every other client until the run times out
+    if args.slow_clients:
+        skipped = [w for w in args.workers if w <= args.slow_clients]
+        args.workers = [w for w in args.workers if w > args.slow_clients]
+        if skipped:
+            print(f"Skipping workers={skipped}: every worker would be stuck on a slow client")
+
+    print(f"{args.clients} clients x {args.requests} requests, {args.slow_clients} slow clients")
+    print(f"{'workers':>8} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for workers in args.workers:
+        r = run_mode(workers, args.clients, args.requests, args.slow_clients)
+        print(f"{r['workers']:>8} {r['requests']:>9} {r['errors']:>7} {r['throughput']:>9.1f} "
+              f"{r['p50'] * 1000:>8.1f} {r['p95'] * 1000:>8.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+import io
+import os
+import sys
+import time
+import pstats
+import cProfile
+import threading
+
+# Histogram bucket upper bounds (seconds), from a cached 304 up to a full rebuild
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+try:
+    import resource
+except ImportError:
+    resource = None  # Windows: peak RSS is not reported
+
+def process_memory():
+    """{'rss_bytes', 'peak_rss_bytes'} of this process; None where the platform doesn't say."""
+    rss = None
+    try:
+        # Linux: second field of statm is resident pages
+        with open('/proc/self/statm') as f:
+            rss = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    peak = None
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS bytes
+        peak = peak if sys.platform == 'darwin' else peak * 1024
+    return {'rss_bytes': rss, 'peak_rss_bytes': peak}
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    pairs = []
+    for key, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{key}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+def format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+class Metrics:
+    """
+    In-process counters and histograms rendered in the Prometheus text format.
+
+    Metrics are created on first use: inc() for counters, observe() for
+    histograms. Values owned by other objects (cache hit counts, open event
+    streams) are read at scrape time by collectors registered with add_collector.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.lock = threading.Lock()
+        self.help = {}        # metric name -> help text
+        self.counters = {}    # name -> {label tuple: value}
+        self.histograms = {}  # name -> {label tuple: [bucket counts..., sum, count]}
+        self.collectors = []
+
+    def describe(self, name, text):
+        self.help[name] = text
+
+    def inc(self, name, labels=(), value=1):
+        key = tuple(sorted(labels.items())) if isinstance(labels, dict) else tuple(labels)
+        with self.lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name, labels, seconds):
+        key = tuple(sorted(labels.items())) if isinstance(labels, dict) else tuple(labels)
+        with self.lock:
+            series = self.histograms.setdefault(name, {})
+            state = series.get(key)
+            if state is None:
+                state = series[key] = [0] * len(self.buckets) + [0.0, 0]
+            # Buckets are cumulative in the exposition, so only count the first one that fits here
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += seconds
+            state[-1] += 1
+
+    def stopwatch(self, operation):
+        return Stopwatch(self, operation)
+
+    def add_collector(self, collector):
+        """collector() returns [(name, 'counter'|'gauge', help, [(labels dict, value), ...]), ...]"""
+        self.collectors.append(collector)
+
+    def render(self):
+        lines = []
+
+        def header(name, kind, text):
+            lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self.lock:
+            counters = {name: dict(series) for name, series in self.counters.items()}
+            histograms = {name: {k: list(v) for k, v in series.items()} for name, series in self.histograms.items()}
+
+        for name in sorted(counters):
+            header(name, 'counter', self.help.get(name, name))
+            for labels, value in sorted(counters[name].items()):
+                lines.append(f"{name}{format_labels(labels)} {format_value(value)}")
+
+        for name in sorted(histograms):
+            header(name, 'histogram', self.help.get(name, name))
+            for labels, state in sorted(histograms[name].items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, state):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{format_labels(labels + (('le', format_value(bound)),))} {cumulative}")
+                lines.append(f"{name}_bucket{format_labels(labels + (('le', '+Inf'),))} {state[-1]}")
+                lines.append(f"{name}_sum{format_labels(labels)} {format_value(state[-2])}")
+                lines.append(f"{name}_count{format_labels(labels)} {state[-1]}")
+
+        for collector in self.collectors:
+            for name, kind, text, samples in collector():
+                header(name, kind, text)
+                for labels, value in samples:
+                    lines.append(f"{name}{format_labels(tuple(sorted(labels.items())))} {format_value(value)}")
+
+        return '\n'.join(lines) + '\n'
+
+class Stopwatch:
+    """
+    Times consecutive stages of one operation: each lap(stage) records the
+    time since the previous lap (or since creation) under
+    eco_stage_duration_seconds{operation, stage}.
+    """
+
+    def __init__(self, metrics, operation):
+        self.metrics = metrics
+        self.operation = operation
+        self.last = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        self.metrics.observe('eco_stage_duration_seconds', {'operation': self.operation, 'stage': stage},
+                             now - self.last)
+        self.last = now
+
+class SamplingProfiler:
+    """
+    Runs cProfile over every Nth request and accumulates the results, so a
+    long load test shows where handler time goes without profiling every
+    request. Only one request is profiled at a time; others are skipped.
+    """
+
+    def __init__(self, every=0):
+        self.every = every  # 0 disables profiling
+        self.lock = threading.Lock()
+        self.busy = threading.Lock()
+        self.seen = 0
+        self.samples = 0
+        self.stats = None
+
+    @property
+    def enabled(self):
+        return self.every > 0
+
+    def start(self):
+        """A running profiler if this request is sampled, else None. Pass it to stop()."""
+        if not self.every:
+            return None
+        with self.lock:
+            self.seen += 1
+            if self.seen % self.every:
+                return None
+        if not self.busy.acquire(blocking=False):
+            return None
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def stop(self, profiler):
+        if profiler is None:
+            return
+        profiler.disable()
+        try:
+            with self.lock:
+                self.samples += 1
+                if self.stats is None:
+                    self.stats = pstats.Stats(profiler)
+                else:
+                    self.stats.add(profiler)
+        finally:
+            self.busy.release()
+
+    def report(self, sort='cumulative', limit=50):
+        """pstats listing of the accumulated samples."""
+        out = io.StringIO()
+        with self.lock:
+            out.write(f"{self.samples} sampled request(s), 1 in {self.every}\n")
+            if self.stats is not None:
+                self.stats.stream = out
+                self.stats.sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+    def reset(self):
+        with self.lock:
+            self.samples = 0
+            self.stats = None
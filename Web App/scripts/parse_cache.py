@@ -0,0 +1,84 @@
+import os
+import json
+import sqlite3
+import threading
+
+# Bump whenever the parsers' output changes shape, so stale entries are dropped
+CACHE_VERSION = 4
+
+class ParseCache:
+    """
+    On-disk cache of parsed concept/game files keyed by (path, mtime_ns, size).
+
+    All rows are loaded into memory on open, so lookups during a scan cost a
+    dict access; writes are batched until commit().
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        if self.conn.execute('PRAGMA user_version').fetchone()[0] != CACHE_VERSION:
+            self.conn.execute('DROP TABLE IF EXISTS entries')
+            self.conn.execute(f'PRAGMA user_version = {CACHE_VERSION}')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS entries (
+                path TEXT PRIMARY KEY,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                result TEXT NOT NULL
+            )
+        ''')
+        self.conn.commit()
+
+        self.entries = {
+            path: (mtime_ns, size, result)
+            for path, mtime_ns, size, result in self.conn.execute('SELECT path, mtime_ns, size, result FROM entries')
+        }
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path, st):
+        """Returns the cached parse result for path if its stat still matches, else None."""
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+                self.hits += 1
+                return json.loads(entry[2])
+            self.misses += 1
+            return None
+
+    def put(self, path, st, result):
+        encoded = json.dumps(result)
+        with self.lock:
+            self.entries[path] = (st.st_mtime_ns, st.st_size, encoded)
+            self.conn.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)',
+                              (path, st.st_mtime_ns, st.st_size, encoded))
+
+    def delete(self, path):
+        with self.lock:
+            if self.entries.pop(path, None) is not None:
+                self.conn.execute('DELETE FROM entries WHERE path = ?', (path,))
+
+    def prune(self, keep):
+        """Evicts every entry whose path is not in keep (files deleted since the last run)."""
+        with self.lock:
+            stale = [path for path in self.entries if path not in keep]
+            for path in stale:
+                del self.entries[path]
+            self.conn.executemany('DELETE FROM entries WHERE path = ?', [(p,) for p in stale])
+        return len(stale)
+
+    def commit(self):
+        with self.lock:
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.commit()
+            self.conn.close()
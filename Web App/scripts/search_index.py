@@ -0,0 +1,173 @@
+import re
+import sys
+import math
+import heapq
+import bisect
+import threading
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# How much a token counts depending on the field it appears in
+GAME_FIELD_WEIGHTS = {
+    'title': 5.0,
+    'goals': 2.0,
+    'purpose': 2.0,
+    'focus': 2.0,
+    'description': 1.0,
+}
+CONCEPT_FIELD_WEIGHTS = {
+    'title': 5.0,
+    'content': 1.0,
+}
+
+# A query term that only matches as a prefix ("butt" -> "butterfly") scores less than an exact hit
+PREFIX_MATCH_FACTOR = 0.5
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+def tokenize(text):
+    if not text:
+        return []
+    return TOKEN_RE.findall(str(text).lower())
+
+class SearchIndex:
+    """
+    Inverted index over game and concept text with prefix matching.
+
+    Subscribe it to a ContentIndex (attach) and it is kept up to date entry by
+    entry as files are saved, instead of being rebuilt.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.postings = {}  # token -> {doc key: score}
+        self.docs = {}      # doc key -> result summary + the tokens it was indexed under
+        self.vocab = []     # sorted tokens, for prefix lookups
+        # Scores take few distinct values; sharing one float object per value
+        # (and interning tokens) keeps a large library's postings small
+        self.score_values = {}
+
+    def attach(self, content_index):
+        content_index.subscribe(self.on_change)
+
+    def on_change(self, kind, key, old, new):
+        if kind == 'reset':
+            self.clear()
+        elif kind in ('concept', 'game'):
+            if old:
+                self.remove(old['path'])
+            if new:
+                self.add(kind, new)
+
+    def clear(self):
+        with self.lock:
+            self.postings = {}
+            self.docs = {}
+            self.vocab = []
+
+    def add(self, kind, record):
+        weights = GAME_FIELD_WEIGHTS if kind == 'game' else CONCEPT_FIELD_WEIGHTS
+        counts = {}
+        for field, weight in weights.items():
+            for token in tokenize(record.get(field)):
+                token = sys.intern(token)
+                counts.setdefault(token, {})
+                counts[token][field] = counts[token].get(field, 0) + 1
+
+        key = record['path']
+        with self.lock:
+            self._remove(key)
+            for token, fields in counts.items():
+                # Sublinear term frequency so a long description can't drown out a title hit
+                score = sum(weights[f] * (1 + math.log(tf)) for f, tf in fields.items())
+                score = self.score_values.setdefault(score, score)
+                if token not in self.postings:
+                    self.postings[token] = {}
+                    bisect.insort(self.vocab, token)
+                self.postings[token][key] = score
+
+            self.docs[key] = {
+                'kind': kind,
+                'id': record.get('id'),
+                'title': record.get('title'),
+                'category': record.get('category', ''),
+                'tokens': tuple(counts),
+            }
+
+    def remove(self, key):
+        with self.lock:
+            self._remove(key)
+
+    def _remove(self, key):
+        doc = self.docs.pop(key, None)
+        if not doc:
+            return
+        for token in doc['tokens']:
+            postings = self.postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(key, None)
+            if not postings:
+                del self.postings[token]
+                i = bisect.bisect_left(self.vocab, token)
+                if i < len(self.vocab) and self.vocab[i] == token:
+                    del self.vocab[i]
+
+    def _term_scores(self, term):
+        """Scores per doc for one query term: exact token hits plus prefix expansions."""
+        scores = dict(self.postings.get(term, {}))
+        i = bisect.bisect_left(self.vocab, term)
+        while i < len(self.vocab) and self.vocab[i].startswith(term):
+            token = self.vocab[i]
+            if token != term:
+                for key, score in self.postings[token].items():
+                    scores[key] = max(scores.get(key, 0.0), score * PREFIX_MATCH_FACTOR)
+            i += 1
+        return scores
+
+    def search(self, query, kind=None, page=1, limit=DEFAULT_PAGE_SIZE):
+        """
+        Ranked results for query; every term must match (exactly or as a prefix).
+        kind restricts results to 'game' or 'concept'. page is 1-based.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        page = max(1, int(page))
+
+        with self.lock:
+            totals = None
+            # Rarest term first keeps the candidate set small
+            for term_scores in sorted((self._term_scores(t) for t in terms), key=len):
+                if totals is None:
+                    totals = term_scores
+                else:
+                    totals = {k: s + term_scores[k] for k, s in totals.items() if k in term_scores}
+                if not totals:
+                    break
+
+            totals = totals or {}
+            if kind:
+                totals = {k: s for k, s in totals.items() if self.docs[k]['kind'] == kind}
+
+            # Only the requested page needs ordering, not every match
+            start = (page - 1) * limit
+            ranked = heapq.nsmallest(start + limit, totals.items(),
+                                     key=lambda item: (-item[1], self.docs[item[0]]['title'] or ''))
+            results = []
+            for key, score in ranked[start:]:
+                doc = self.docs[key]
+                results.append({
+                    'kind': doc['kind'],
+                    'id': doc['id'],
+                    'title': doc['title'],
+                    'category': doc['category'],
+                    'score': round(score, 3),
+                })
+
+        return {
+            'query': query,
+            'total': len(totals),
+            'page': page,
+            'limit': limit,
+            'results': results,
+        }
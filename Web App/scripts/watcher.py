@@ -0,0 +1,220 @@
+import os
+import time
+import struct
+import select
+import ctypes
+import ctypes.util
+import threading
+
+# inotify event masks (see inotify(7))
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+
+EVENT_HEADER = struct.Struct('iIII')
+
+# Quiet period before a burst of changes (git pull, editor save dance) is applied
+DEBOUNCE_SECONDS = 0.3
+POLL_INTERVAL = 1.0
+
+# Files the server and scripts write on the way to the real one (atomic_write,
+# the static export) and its staging folders (/api/batch, /api/import); never content
+IGNORED_SUFFIXES = ('.tmp',)
+IGNORED_PREFIXES = ('.eco-batch-', '.eco-import-')
+
+class InotifyBackend:
+    """Recursive directory watch built on Linux inotify via ctypes."""
+
+    def __init__(self, root):
+        self.root = root
+        libc_name = ctypes.util.find_library('c')
+        if not libc_name:
+            raise OSError("libc not found")
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self.libc, 'inotify_init1'):
+            raise OSError("inotify not supported on this platform")
+
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches = {}  # watch descriptor -> directory path
+        self._add_tree(root)
+
+    def _add_watch(self, path):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            # The directory may already be gone again; anything else is a real error
+            errno = ctypes.get_errno()
+            if errno not in (2, 20):  # ENOENT, ENOTDIR
+                raise OSError(errno, f"inotify_add_watch failed for {path}")
+            return
+        self.watches[wd] = path
+
+    def _add_tree(self, path):
+        for root, dirs, files in os.walk(path):
+            self._add_watch(root)
+
+    def wait(self, timeout):
+        """Blocks up to timeout seconds and returns the set of changed paths."""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        changed = set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped; the caller has to rescan everything
+                changed.add(self.root)
+                continue
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+
+            directory = self.watches.get(wd)
+            if directory is None:
+                continue
+            path = os.path.join(directory, os.fsdecode(name)) if name else directory
+            changed.add(path)
+
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                self._add_tree(path)
+
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+class PollingBackend:
+    """Fallback that diffs (mtime, size) snapshots of the tree every interval."""
+
+    def __init__(self, root, interval=POLL_INTERVAL):
+        self.root = root
+        self.interval = interval
+        self.snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        for root, dirs, files in os.walk(self.root):
+            for name in dirs + files:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                snapshot[path] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def wait(self, timeout):
+        time.sleep(min(timeout, self.interval))
+        current = self._scan()
+        previous = self.snapshot
+        self.snapshot = current
+        return {path for path in previous.keys() | current.keys()
+                if previous.get(path) != current.get(path)}
+
+    def close(self):
+        pass
+
+def create_backend(root, force_polling=False):
+    if not force_polling:
+        try:
+            return InotifyBackend(root)
+        except (OSError, AttributeError) as e:
+            print(f"inotify unavailable ({e}), falling back to polling")
+    return PollingBackend(root)
+
+def collapse_paths(paths):
+    """Drops paths whose parent directory is already in the set."""
+    paths = set(paths)
+    result = set()
+    for path in paths:
+        parent = os.path.dirname(path)
+        while parent != os.path.dirname(parent) and parent not in paths:
+            parent = os.path.dirname(parent)
+        if parent not in paths:
+            result.add(path)
+    return result
+
+def ignored_path(path):
+    """True for temp files and staging folders (see IGNORED_SUFFIXES and IGNORED_PREFIXES)."""
+    return path.endswith(IGNORED_SUFFIXES) or any(part.startswith(IGNORED_PREFIXES) for part in path.split(os.sep))
+
+class ContentWatcher:
+    """
+    Keeps a ContentIndex in sync with edits made outside the server (text
+    editors, git pull). Bursts of events are debounced and only the touched
+    paths are re-parsed; temp files, the index's own output and paths the
+    index has already refreshed as they are now (the server's own saves) are
+    skipped. on_change(paths) runs after a batch that changed the index.
+    """
+
+    def __init__(self, index, on_change=None, debounce=DEBOUNCE_SECONDS, force_polling=False):
+        self.index = index
+        self.on_change = on_change
+        self.debounce = debounce
+        self.force_polling = force_polling
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Runs the watch loop on a daemon thread."""
+        self._thread = threading.Thread(target=self.run, name='content-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def run(self):
+        backend = create_backend(self.index.concepts_dir, self.force_polling)
+        print(f"Watching {self.index.concepts_dir} ({type(backend).__name__})")
+
+        output_file = os.path.abspath(self.index.output_file)
+        pending = set()
+        last_event = 0.0
+        try:
+            while not self._stop.is_set():
+                changed = {path for path in backend.wait(self.debounce if pending else 1.0)
+                           if not ignored_path(path) and path != output_file}
+                if changed:
+                    pending |= changed
+                    last_event = time.monotonic()
+                elif pending and time.monotonic() - last_event >= self.debounce:
+                    try:
+                        self.apply(pending)
+                    except Exception as e:
+                        print(f"Error reindexing changed files: {e}")
+                    pending = set()
+        finally:
+            backend.close()
+
+    def apply(self, paths):
+        paths = {path for path in collapse_paths(paths) if not self.index.is_current(path)}
+        if not paths or not self.index.refresh_paths(paths):
+            return
+        print(f"Reindexed {len(paths)} changed path(s)")
+        if self.on_change:
+            self.on_change(paths)
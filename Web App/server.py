@@ -1,16 +1,684 @@
 import http.server
 import socketserver
+import io
 import json
 import os
-import subprocess
+import sys
+import time
+import threading
+import argparse
+import shutil
+import tempfile
+import mimetypes
+import gzip
+import email.utils
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from urllib.parse import unquote, urlparse, parse_qs
 
 PORT = 8000
+# Worker threads serving requests; extra connections queue until one frees up
+DEFAULT_WORKERS = 16
+# Seconds a kept-alive connection may sit idle (holding a worker) before it is
+# closed; an editor's burst of calls arrives well within it
+KEEPALIVE_TIMEOUT = 2
+# Once a request has started, seconds a single read or write of it may stall
+# (a paused download, a slow upload) before the connection is dropped
+TRANSFER_TIMEOUT = 60
+# JSON/text API responses at least this big are gzipped for clients that accept it
+GZIP_MIN_BYTES = 1024
+GZIP_LEVEL = 6
+# Upper bound on operations in one /api/batch request
+MAX_BATCH_OPERATIONS = 500
+# Upper bound on an /api/import upload
+MAX_IMPORT_BYTES = 512 * 1024 * 1024
+# Open /api/events streams allowed at once; each holds a socket, not a thread
+MAX_EVENT_CLIENTS = 1000
+# /api/plan defaults: class length (minutes), plans returned, and how many of the
+# newest saved classes count as recent
+DEFAULT_PLAN_MINUTES = 90
+DEFAULT_PLAN_ALTERNATIVES = 3
+MAX_PLAN_ALTERNATIVES = 10
+DEFAULT_PLAN_RECENT_CLASSES = 5
+# Concept files at or under this size are kept in memory, up to the total budget
+STATIC_CACHE_MAX_FILE = 512 * 1024
+STATIC_CACHE_MAX_BYTES = 32 * 1024 * 1024
 # Define root as directory of this script (Web App)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 # Project root is two levels up (Eco-BJJ root)
 PROJECT_ROOT = os.path.abspath(os.path.join(BASE_DIR, '../'))
 
+sys.path.insert(0, os.path.join(BASE_DIR, 'scripts'))
+from generate_content import ContentIndex, PARSE_CACHE_FILE, PARSE_POOLS
+from class_store import ClassStore
+from atomic_io import atomic_write, file_version
+from image_derivatives import DERIVATIVES_DIR
+from parse_cache import ParseCache
+from search_index import SearchIndex, DEFAULT_PAGE_SIZE
+from class_planner import ClassPlanner
+from build_assets import AssetManifest, IMMUTABLE
+from frontmatter import difficulty_level
+from events import EventBroadcaster
+from metrics import Metrics, SamplingProfiler, PROMETHEUS_CONTENT_TYPE, process_memory
+from game_records import deep_size
+from watcher import ContentWatcher, collapse_paths
+from class_archive import (archive_files, write_archive, read_archive, sha256_file,
+                           ChunkedWriter, LimitedReader, CHUNK_SIZE, CLASSES_FOLDER)
+
+# Concept/game index kept in memory; writes patch it instead of re-running the generator
+CONTENT_INDEX = ContentIndex(os.path.join(PROJECT_ROOT, 'Concepts'), derivatives_dir=DERIVATIVES_DIR)
+# Full-text index over the same entries, patched as CONTENT_INDEX changes
+SEARCH_INDEX = SearchIndex()
+SEARCH_INDEX.attach(CONTENT_INDEX)
+# Pushes the same changes to browsers subscribed to /api/events
+EVENTS = EventBroadcaster()
+EVENTS.attach(CONTENT_INDEX)
+# SQLite index over Saved Classes/*.json; sync() it before serving
+CLASS_STORE = ClassStore(os.path.join(PROJECT_ROOT, 'Saved Classes'))
+# Content-fingerprinted js/css and the index.html that points at them
+ASSETS = AssetManifest()
+# Request/stage timings and counters, exposed on /api/metrics
+METRICS = Metrics()
+METRICS.describe('eco_http_requests_total', "HTTP requests by method, endpoint and status")
+METRICS.describe('eco_http_errors_total', "HTTP responses with a 4xx/5xx status")
+METRICS.describe('eco_http_response_bytes_total', "Bytes sent to clients, headers included")
+METRICS.describe('eco_http_request_duration_seconds', "Time from parsing a request to finishing its response")
+METRICS.describe('eco_stage_duration_seconds', "Time spent in each stage of a save, create, reindex, plan or import")
+METRICS.describe('eco_index_refreshes_total', "Content index updates, by what triggered them")
+# Opt-in cProfile of every Nth request (--profile N); report on /api/metrics/profile
+PROFILER = SamplingProfiler()
+
+# /api/ paths reported under their own name; anything else is lumped into /api/other
+METRIC_API_PATHS = {
+    '/api/save', '/api/create', '/api/save_class', '/api/load_class', '/api/delete', '/api/batch',
+    '/api/list_classes', '/api/classes', '/api/classes/using', '/api/search', '/api/events',
+    '/api/metrics', '/api/metrics/profile', '/api/diagnostics', '/api/plan', '/api/memory',
+    '/api/export', '/api/import',
+}
+
+class PathLocks:
+    """
+    Per-path locks, so concurrent writes to the same file are serialized while
+    writes to different files proceed in parallel. A path is held exclusively
+    and every folder above it shared, so deleting a folder waits for writes
+    inside it (and they for the delete) while writes to sibling files don't wait
+    on each other.
+    """
+
+    def __init__(self):
+        self._changed = threading.Condition()
+        self._held = {}  # path -> number of shared holders, or -1 while held exclusively
+
+    @contextmanager
+    def hold(self, *paths):
+        """Holds the given paths (and, shared, their folders) for the duration of the with-block."""
+        exclusive = {}  # path -> held exclusively
+        for path in paths:
+            key = os.path.normcase(os.path.abspath(path))
+            exclusive[key] = True
+            parent = os.path.dirname(key)
+            while parent != key:
+                exclusive.setdefault(parent, False)
+                key, parent = parent, os.path.dirname(parent)
+        # Taken in sorted order (a folder sorts before what's inside it), so two holders can't deadlock
+        taken = []
+        try:
+            for key in sorted(exclusive):
+                self._acquire(key, exclusive[key])
+                taken.append(key)
+            yield
+        finally:
+            for key in reversed(taken):
+                self._release(key, exclusive[key])
+
+    def _acquire(self, key, exclusive):
+        with self._changed:
+            if exclusive:
+                while key in self._held:
+                    self._changed.wait()
+                self._held[key] = -1
+            else:
+                while self._held.get(key, 0) < 0:
+                    self._changed.wait()
+                self._held[key] = self._held.get(key, 0) + 1
+
+    def _release(self, key, exclusive):
+        with self._changed:
+            if exclusive or self._held[key] == 1:
+                del self._held[key]
+            else:
+                self._held[key] -= 1
+            self._changed.notify_all()
+
+PATH_LOCKS = PathLocks()
+
+class StaticFileCache:
+    """
+    Bounded LRU of small file bodies for /Concepts/ assets. Entries are keyed
+    by path and only reused while the file's mtime and size are unchanged.
+    """
+
+    def __init__(self, max_bytes=STATIC_CACHE_MAX_BYTES, max_file=STATIC_CACHE_MAX_FILE):
+        self.max_bytes = max_bytes
+        self.max_file = max_file
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # path -> (mtime_ns, size, body)
+        self.total = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path, st):
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] != st.st_mtime_ns or entry[1] != st.st_size:
+                self._evict(path)
+                self.misses += 1
+                return None
+            self.entries.move_to_end(path)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, path, st, body):
+        if len(body) > self.max_file:
+            return
+        with self.lock:
+            self._evict(path)
+            self.entries[path] = (st.st_mtime_ns, st.st_size, body)
+            self.total += len(body)
+            while self.total > self.max_bytes:
+                self._evict(next(iter(self.entries)))
+
+    def _evict(self, path):
+        entry = self.entries.pop(path, None)
+        if entry:
+            self.total -= len(entry[2])
+
+STATIC_CACHE = StaticFileCache()
+
+def endpoint_label(path):
+    """Metric label for a request path, with ids and file names folded so the label set stays small."""
+    path = unquote(path.split('?', 1)[0])
+    if path.startswith('/api/'):
+        return path if path in METRIC_API_PATHS else '/api/other'
+    if path in ('/', '/index.html', '/data/content.json', '/data/catalog.json'):
+        return path
+    for prefix in ('/data/assets/', '/data/concepts/', '/data/games/', '/data/images/', '/Concepts/'):
+        if path.startswith(prefix):
+            return prefix + '*'
+    return 'static'
+
+def collect_cache_metrics():
+    """Scrape-time values owned by the indexes and caches (see Metrics.add_collector)."""
+    samples = [
+        ('eco_payload_cache_hits_total', 'counter', "Index documents served from the encoded payload cache",
+         [({}, CONTENT_INDEX.payload_hits)]),
+        ('eco_payload_cache_misses_total', 'counter', "Index documents that had to be re-encoded",
+         [({}, CONTENT_INDEX.payload_misses)]),
+        ('eco_static_cache_hits_total', 'counter', "/Concepts/ files served from memory",
+         [({}, STATIC_CACHE.hits)]),
+        ('eco_static_cache_misses_total', 'counter', "/Concepts/ cache lookups that went to disk",
+         [({}, STATIC_CACHE.misses)]),
+        ('eco_static_cache_bytes', 'gauge', "Bytes held by the /Concepts/ file cache",
+         [({}, STATIC_CACHE.total)]),
+        ('eco_index_entries', 'gauge', "Entries in the content index",
+         [({'kind': 'concept'}, len(CONTENT_INDEX.concepts)), ({'kind': 'game'}, len(CONTENT_INDEX.games))]),
+        ('eco_event_stream_clients', 'gauge', "Open /api/events streams",
+         [({}, EVENTS.client_count())]),
+    ]
+    rss = process_memory()['rss_bytes']
+    if rss is not None:
+        samples.append(('eco_process_resident_memory_bytes', 'gauge', "Resident set size of the server process",
+                        [({}, rss)]))
+    cache = CONTENT_INDEX.cache
+    if cache is not None:
+        samples.append(('eco_parse_cache_hits_total', 'counter', "Files whose parse was reused from the parse cache",
+                        [({}, cache.hits)]))
+        samples.append(('eco_parse_cache_misses_total', 'counter', "Files parsed because the parse cache was stale",
+                        [({}, cache.misses)]))
+    return samples
+
+METRICS.add_collector(collect_cache_metrics)
+
+class CountingWriter(io.BufferedIOBase):
+    """Wraps a handler's wfile to count the bytes written to the client."""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.count = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        written = self.raw.write(data)
+        self.count += len(data)
+        return written
+
+    def flush(self):
+        self.raw.flush()
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self.raw.close()
+
+def parse_range(header, size):
+    """
+    (start, end) inclusive for a single "bytes=" range, None to ignore the
+    header (absent, malformed or multi-range), or False if unsatisfiable.
+    """
+    if not header or not header.startswith('bytes=') or ',' in header:
+        return None
+    first, sep, last = header[len('bytes='):].strip().partition('-')
+    if not sep:
+        return None
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+            if last and end < start:
+                return None
+        else:
+            # Suffix range: the last N bytes
+            start = max(size - int(last), 0)
+            end = size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        return False
+    return start, min(end, size - 1)
+
+class DetachableMixin:
+    """
+    Lets a handler take its connection away from the server (detach) so it
+    outlives the request, e.g. an event stream handed to EVENTS; the server
+    then leaves the socket open when the request finishes.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._detached = set()
+        self._detached_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def detach(self, request):
+        with self._detached_lock:
+            self._detached.add(request)
+
+    def shutdown_request(self, request):
+        with self._detached_lock:
+            if request in self._detached:
+                self._detached.discard(request)
+                return
+        super().shutdown_request(request)
+
+class SerialHTTPServer(DetachableMixin, socketserver.TCPServer):
+    """The single-threaded server (workers=1), able to hand off event streams."""
+    # Closes each connection after one request (see EcoHandler.setup)
+    keep_alive = False
+
+class PooledHTTPServer(DetachableMixin, http.server.HTTPServer):
+    """
+    HTTPServer that hands each connection to a bounded pool of worker threads,
+    so one slow request doesn't stall every other browser.
+    """
+    # Deeper accept backlog; the default of 5 drops SYNs when many tablets connect at once
+    request_queue_size = 128
+
+    def __init__(self, server_address, handler_class, workers=DEFAULT_WORKERS):
+        # Set up before binding: a failed bind calls server_close(), which shuts the pool down
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='eco-worker')
+        # Accepted connections still waiting for a worker (see EcoHandler.end_headers)
+        self.queued = 0
+        self.queued_lock = threading.Lock()
+        super().__init__(server_address, handler_class)
+
+    def process_request(self, request, client_address):
+        with self.queued_lock:
+            self.queued += 1
+        self.pool.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        with self.queued_lock:
+            self.queued -= 1
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+def version_conflict(path, base_version):
+    """
+    Why a write based on base_version (None: the client expects no file) would
+    be stale, or None if path is still at that version.
+    """
+    current = file_version(path)
+    if current == base_version:
+        return None
+    if current is None:
+        return "File was deleted"
+    if base_version is None:
+        return "File already exists"
+    return "File was changed by someone else"
+
+def project_path(path):
+    """Absolute form of a client-supplied path; PermissionError unless it lies inside PROJECT_ROOT."""
+    if not os.path.isabs(path):
+        path = os.path.join(PROJECT_ROOT, path)
+    abs_path = os.path.abspath(path)
+    if not abs_path.startswith(PROJECT_ROOT + os.sep):
+        raise PermissionError(f"Forbidden path: {path}")
+    return abs_path
+
+def class_filename(name):
+    """Saved Classes file name for a class name (the inverse of class_store.class_name)."""
+    safe_name = "".join([c for c in name if c.isalnum() or c in " -_"])
+    return safe_name.replace(" ", "_") + ".json"
+
+class BatchTransaction:
+    """
+    File writes and deletes that can all be undone. Whatever a step replaces or
+    deletes is first parked in a staging directory inside PROJECT_ROOT (same
+    filesystem, so parking is a rename), and directories it creates are
+    remembered. rollback() restores everything; commit() drops the backups.
+    """
+
+    def __init__(self):
+        self.staging = tempfile.mkdtemp(prefix='.eco-batch-', dir=PROJECT_ROOT)
+        self.undo = []  # callables, run in reverse order on rollback
+
+    def _backup_path(self):
+        return os.path.join(self.staging, str(len(self.undo)))
+
+    def write(self, path, content):
+        """Creates or replaces the file at path; returns its new version."""
+        self._prepare(path)
+        return atomic_write(path, content)
+
+    def place(self, path, source):
+        """Moves the file at source (on the same filesystem) to path, replacing any file there."""
+        self._prepare(path)
+        os.replace(source, path)
+
+    def _prepare(self, path):
+        """Creates path's missing folders and parks the file it replaces, so both can be undone."""
+        missing = path
+        while not os.path.exists(os.path.dirname(missing)):
+            missing = os.path.dirname(missing)
+        if missing != path:
+            os.makedirs(os.path.dirname(path))
+            self.undo.append(lambda: shutil.rmtree(missing, ignore_errors=True))
+
+        if os.path.exists(path):
+            backup = self._backup_path()
+            # Copy rather than move, so readers never see the file missing
+            shutil.copy2(path, backup)
+            self.undo.append(lambda: os.replace(backup, path))
+        else:
+            self.undo.append(lambda: os.path.exists(path) and os.remove(path))
+
+    def delete(self, path):
+        backup = self._backup_path()
+        os.replace(path, backup)  # files and whole directories alike
+        self.undo.append(lambda: os.replace(backup, path))
+
+    def rollback(self):
+        for step in reversed(self.undo):
+            try:
+                step()
+            except OSError as e:
+                print(f"Error rolling back batch step: {e}")
+        self.undo = []
+        shutil.rmtree(self.staging, ignore_errors=True)
+
+    def commit(self):
+        self.undo = []
+        shutil.rmtree(self.staging, ignore_errors=True)
+
+def plan_batch_operation(op):
+    """
+    Validates one /api/batch operation without touching the disk.
+    Returns (op, absolute path, content); raises ValueError or PermissionError.
+    """
+    if not isinstance(op, dict):
+        raise ValueError("Operation must be an object")
+    kind = op.get('op')
+    if kind == 'create':
+        path, content = plan_create(op)
+    elif kind == 'save':
+        path, content = op.get('path'), op.get('content')
+        if not path or content is None:
+            raise ValueError("Missing path or content")
+    elif kind == 'delete':
+        path, content = op.get('path'), None
+        if not path:
+            raise ValueError("Missing path")
+    else:
+        raise ValueError(f"Unknown op: {kind!r} (expected create, save or delete)")
+    return kind, project_path(path), content
+
+def overlapping_paths(paths):
+    """Pairs where one path is the same as, or inside, another (e.g. a delete of its folder)."""
+    ordered = sorted(paths)
+    return [(a, b) for a, b in zip(ordered, ordered[1:]) if b == a or b.startswith(a + os.sep)]
+
+def plan_create(data):
+    """
+    Path and markdown for an /api/create request (a concept or a game), without
+    touching the disk. Raises ValueError for an invalid request.
+    """
+    type_ = data.get('type')
+    name = data.get('name')
+
+    if not type_ or not name:
+        raise ValueError("Missing type or name")
+
+    # Sanitize name
+    safe_name = "".join([c for c in name if c.isalnum() or c in " -_"])
+    filename = safe_name.replace(" ", "") + ".md"
+
+    if type_ == 'concept':
+        # Create Concepts/safe_name/safe_name.md
+        folder = os.path.join(PROJECT_ROOT, 'Concepts', safe_name.replace(" ", ""))
+        filepath = os.path.join(folder, filename)
+        description = data.get('description', 'Description of the concept.')
+        content = f"# {name}\n\n{description}"
+
+    elif type_ == 'game':
+        category = data.get('category')
+        if not category:
+            raise ValueError("Missing category")
+        # Define fields
+        players = data.get('players')
+        duration = data.get('duration')
+        game_type = data.get('gameType')
+        intensity = data.get('intensity')
+        goals = data.get('goals')
+        purpose = data.get('purpose')
+        focus = data.get('focus')
+        # A variation leaves the body empty to inherit its parent's description
+        description = data.get('description')
+        if description is None:
+            description = '' if data.get('parentId') else f'Description of {name}.'
+
+        # Prepare frontmatter fields
+        fm_fields = [
+            ('title', name),
+            ('category', category),
+            ('players', players),
+            ('duration', duration),
+            ('type', game_type),
+            ('intensity', intensity),
+        ]
+
+        # Optional fields
+        difficulty = data.get('difficulty')
+        if difficulty:
+            fm_fields.append(('difficulty', difficulty))
+
+        parent_id = data.get('parentId')
+        if parent_id:
+            fm_fields.append(('parent_id', parent_id))
+
+        if goals:
+            fm_fields.append(('goals', goals))
+        if purpose:
+            fm_fields.append(('purpose', purpose))
+        if focus:
+            fm_fields.append(('focus', focus))
+
+        # Build Content
+        lines = ["---"]
+        for k, v in fm_fields:
+            # Unset fields are left out, so a variation inherits them from its parent
+            if v:
+                lines.append(f"{k}: {v}")
+
+        lines.append("---\n")
+        lines.append(description)
+
+        content = "\n".join(lines)
+
+        # Construct path for game: Concepts/{Category}/Games/{filename}
+        # Sanitize category just in case, though it should match an existing concept folder
+        safe_category = category.replace(" ", "")
+        concept_dir = os.path.join(PROJECT_ROOT, 'Concepts', safe_category)
+        games_dir = os.path.join(concept_dir, 'Games')
+        # Optional variation folder, e.g. Games/SeatedShinGuard/Level1.md
+        folder = "".join([c for c in data.get('folder') or '' if c.isalnum() or c in "-_"])
+        if folder:
+            games_dir = os.path.join(games_dir, folder)
+        filepath = os.path.join(games_dir, filename)
+    else:
+        raise ValueError("Invalid type")
+
+    return filepath, content
+
 class EcoHandler(http.server.SimpleHTTPRequestHandler):
+    # Persistent connections: every response carries a Content-Length, or
+    # (event streams, errors) says Connection: close
+    protocol_version = 'HTTP/1.1'
+    # Socket timeouts are set per phase instead: KEEPALIVE_TIMEOUT while waiting
+    # for a request line, so an idle connection gives its worker back, then
+    # TRANSFER_TIMEOUT while the request and response bodies are moving
+    timeout = None
+    # Headers and body go out in separate writes; with Nagle on, a reused
+    # connection stalls the body until the client's delayed ACK (~40 ms)
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.wfile = CountingWriter(self.wfile)
+        # With a single worker, one browser's idle connection would block every other one
+        if not getattr(self.server, 'keep_alive', True):
+            self.protocol_version = 'HTTP/1.0'
+
+    def handle_one_request(self):
+        self.request_start = None
+        self.status_code = None
+        self.profiler = None
+        self.headers_sent = False
+        self.connection.settimeout(KEEPALIVE_TIMEOUT)
+        try:
+            super().handle_one_request()
+        finally:
+            PROFILER.stop(self.profiler)
+            # Nothing to record if the connection closed before a request arrived
+            if self.request_start is not None and self.status_code is not None:
+                self.record_request()
+
+    def parse_request(self):
+        # Timing starts once the request line is in, so a slow client's upload of it doesn't count
+        self.request_start = time.perf_counter()
+        self.connection.settimeout(TRANSFER_TIMEOUT)
+        self.wfile.count = 0
+        self.profiler = PROFILER.start()
+        return super().parse_request()
+
+    def send_response(self, code, message=None):
+        self.status_code = code
+        super().send_response(code, message)
+
+    def end_headers(self):
+        # Connections are waiting for a worker: give this one back after the response
+        if not self.close_connection and getattr(self.server, 'queued', 0) > 0:
+            self.send_header('Connection', 'close')
+        super().end_headers()
+        self.headers_sent = True
+
+    def send_error(self, code, message=None, explain=None):
+        # Once a status line is out, an error page would land inside the body
+        # the client is reading; dropping the connection tells it the response is incomplete
+        if self.headers_sent:
+            self.log_error("Response cut short (%d %s)", code, message)
+            self.close_connection = True
+            return
+        super().send_error(code, message, explain)
+
+    def log_error(self, format, *args):
+        # A kept-alive connection going quiet until KEEPALIVE_TIMEOUT is routine
+        if format.startswith('Request timed out') and self.request_start is None:
+            return
+        super().log_error(format, *args)
+
+    def accepted_encodings(self):
+        """Content codings named in Accept-Encoding, leaving out any refused with q=0."""
+        accepted = set()
+        for item in self.headers.get('Accept-Encoding', '').split(','):
+            coding, _, params = item.partition(';')
+            name, _, value = params.partition('=')
+            try:
+                weight = float(value) if name.strip() == 'q' else 1.0
+            except ValueError:
+                weight = 1.0
+            if coding.strip() and weight > 0:
+                accepted.add(coding.strip().lower())
+        return accepted
+
+    def send_json(self, data, code=200, headers=None):
+        self.send_body(json.dumps(data).encode(), 'application/json', code, headers)
+
+    def send_body(self, body, content_type, code=200, headers=None):
+        """
+        A complete response with Content-Length, so the connection can be
+        reused. Bodies of GZIP_MIN_BYTES or more are gzipped for clients that accept it.
+        """
+        compressible = len(body) >= GZIP_MIN_BYTES
+        encoding = 'gzip' if compressible and 'gzip' in self.accepted_encodings() else None
+        if encoding:
+            body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+        self.send_response(code)
+        self.send_header('Content-type', content_type)
+        self.send_header('Content-Length', len(body))
+        if compressible:
+            self.send_header('Vary', 'Accept-Encoding')
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def record_request(self):
+        endpoint = endpoint_label(getattr(self, 'path', '') or '')
+        status = str(self.status_code)
+        METRICS.inc('eco_http_requests_total', {'method': self.command or '-', 'endpoint': endpoint, 'status': status})
+        if self.status_code >= 400:
+            METRICS.inc('eco_http_errors_total', {'endpoint': endpoint, 'status': status})
+        METRICS.inc('eco_http_response_bytes_total', {'endpoint': endpoint}, self.wfile.count)
+        METRICS.observe('eco_http_request_duration_seconds', {'endpoint': endpoint},
+                        time.perf_counter() - self.request_start)
+
     def do_POST(self):
         if self.path == '/api/save':
             self.handle_save()
@@ -22,56 +690,275 @@ class EcoHandler(http.server.SimpleHTTPRequestHandler):
             self.handle_load_class()
         elif self.path == '/api/delete':
             self.handle_delete()
+        elif self.path == '/api/batch':
+            self.handle_batch()
+        elif self.path.split('?', 1)[0] == '/api/import':
+            self.handle_import()
+        else:
+            self.send_error(404, "Endpoint not found")
+
+    def do_DELETE(self):
+        # deleteConcept in app.js sends DELETE /api/delete with a JSON body
+        if self.path == '/api/delete':
+            self.handle_delete()
         else:
             self.send_error(404, "Endpoint not found")
 
     def do_GET(self):
         if self.path == '/api/list_classes':
             self.handle_list_classes()
+        elif self.path.split('?', 1)[0] == '/api/classes':
+            self.handle_query_classes()
+        elif self.path.split('?', 1)[0] == '/api/classes/using':
+            self.handle_classes_using()
+        elif self.path.split('?', 1)[0] == '/api/search':
+            self.handle_search()
+        elif self.path.split('?', 1)[0] == '/api/events':
+            self.handle_events()
+        elif self.path == '/api/diagnostics':
+            self.handle_diagnostics()
+        elif self.path.split('?', 1)[0] == '/api/plan':
+            self.handle_plan()
+        elif self.path.split('?', 1)[0] == '/api/export':
+            self.handle_export()
+        elif self.path == '/api/metrics':
+            self.handle_metrics()
+        elif self.path == '/api/memory':
+            self.handle_memory()
+        elif self.path.split('?', 1)[0] == '/api/metrics/profile':
+            self.handle_profile()
+        elif self.path.split('?', 1)[0] in ('/', '/index.html'):
+            self.serve_index()
+        elif self.path.startswith('/data/assets/'):
+            self.serve_asset()
+        elif self.path.split('?', 1)[0].startswith('/data/') and self.payload_name():
+            self.serve_payload(self.payload_name())
         elif self.path.startswith('/Concepts/'):
             # Serve files from the project root Concepts folder
             self.serve_project_file(self.path)
         else:
             super().do_GET()
 
+    def is_stale(self, data, path):
+        """
+        Optimistic concurrency check for a write: if the request carries a
+        baseVersion (the version the client loaded; null for a file it expects
+        not to exist) and the file has moved on since, answer 409 with the
+        current version and return True. Call with the path's lock held.
+        Requests without baseVersion keep last-writer-wins.
+        """
+        if 'baseVersion' not in data:
+            return False
+        error = version_conflict(path, data['baseVersion'])
+        if error is None:
+            return False
+
+        self.send_json({'status': 'conflict', 'version': file_version(path), 'error': error}, code=409)
+        return True
+
+    def reindex(self, path):
+        """
+        Patch the content index for one changed path. Requests are answered
+        from the index; content.json on disk catches up shortly after (write_soon).
+        """
+        METRICS.inc('eco_index_refreshes_total', {'trigger': 'request'})
+        watch = METRICS.stopwatch('reindex')
+        changed = CONTENT_INDEX.refresh_path(path)
+        watch.lap('refresh')
+        if changed:
+            CONTENT_INDEX.write_soon()
+
+    def reindex_many(self, paths):
+        """One index update (and one deferred content.json write) for everything a batch touched"""
+        METRICS.inc('eco_index_refreshes_total', {'trigger': 'batch'})
+        watch = METRICS.stopwatch('reindex')
+        changed = CONTENT_INDEX.refresh_paths(collapse_paths(paths))
+        watch.lap('refresh')
+        if changed:
+            CONTENT_INDEX.write_soon()
+
+    def payload_name(self):
+        """
+        Maps a /data/ URL onto an in-memory index document:
+        content.json, catalog.json, concepts/<id>.json or games/<id>.json
+        """
+        path = unquote(self.path.split('?', 1)[0])
+        if path == '/data/content.json':
+            return 'content'
+        if path == '/data/catalog.json':
+            return 'catalog'
+        for kind in ('concepts', 'games'):
+            prefix = f'/data/{kind}/'
+            if path.startswith(prefix) and path.endswith('.json'):
+                # The app asks for the id's file name in a static export (page_name), itself percent-encoded
+                return kind + '/' + unquote(path[len(prefix):-len('.json')])
+        return None
+
+    def serve_payload(self, name):
+        """Serve an index document from memory (see send_payload)."""
+        payload = CONTENT_INDEX.payload(name)
+        if payload is None:
+            self.send_error(404, f"Not found: {name}")
+            return
+        self.send_payload(payload, 'application/json')
+
+    def serve_index(self):
+        """index.html with its script and stylesheet pointed at the current fingerprinted assets."""
+        ASSETS.refresh()
+        if ASSETS.index is None:
+            self.send_error(404, "Not found: index.html")
+            return
+        self.send_payload(ASSETS.index, 'text/html; charset=utf-8')
+
+    def serve_asset(self):
+        """A fingerprinted js/css file; its URL changes with its content, so browsers may keep it forever."""
+        path = unquote(self.path.split('?', 1)[0])
+        payload = ASSETS.asset(path)
+        if payload is None:
+            self.send_error(404, f"Not found: {path}")
+            return
+        content_type = 'text/javascript' if path.endswith('.js') else 'text/css'
+        self.send_payload(payload, f'{content_type}; charset=utf-8', cache_control=IMMUTABLE)
+
+    def send_payload(self, payload, content_type, cache_control='no-cache'):
+        """
+        Send an encoded payload (generate_content.encode_body) with a
+        content-hash ETag, answering If-None-Match with a 304 and preferring
+        a precompressed body.
+        """
+        etag = payload['etag']
+
+        # Any encoding of the same body counts as a match
+        if_none_match = self.headers.get('If-None-Match', '')
+        client_tags = [t.strip().removeprefix('W/').strip('"').split('-')[0]
+                       for t in if_none_match.split(',')]
+        if etag in client_tags or '*' in client_tags:
+            self.send_response(304)
+            self.send_header('ETag', f'"{etag}"')
+            self.send_header('Cache-Control', cache_control)
+            self.send_header('Vary', 'Accept-Encoding')
+            self.end_headers()
+            return
+
+        accepted = self.accepted_encodings()
+        encoding = next((e for e in ('br', 'gzip') if e in accepted and e in payload['encodings']), None)
+        body = payload['encodings'][encoding] if encoding else payload['body']
+
+        self.send_response(200)
+        self.send_header('Content-type', content_type)
+        self.send_header('Content-Length', len(body))
+        self.send_header('ETag', f'"{etag}-{encoding}"' if encoding else f'"{etag}"')
+        # no-cache: cacheable, but the browser must revalidate (cheap 304) before reuse
+        self.send_header('Cache-Control', cache_control)
+        self.send_header('Vary', 'Accept-Encoding')
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.end_headers()
+        self.wfile.write(body)
+
     def serve_project_file(self, path):
-        """Serve files from the PROJECT_ROOT directory (for Concepts, Games, etc.)"""
+        """
+        Serve files from the PROJECT_ROOT directory (for Concepts, Games, etc.)
+        with Last-Modified/ETag revalidation and byte ranges. Small files come
+        from STATIC_CACHE; larger ones are streamed with sendfile.
+        """
         try:
-            # Remove leading slash and decode URL encoding
-            from urllib.parse import unquote
-            relative_path = unquote(path.lstrip('/'))
-            file_path = os.path.join(PROJECT_ROOT, relative_path)
-            
+            # Remove leading slash (and any query string) and decode URL encoding
+            relative_path = unquote(path.split('?', 1)[0].lstrip('/'))
+            file_path = os.path.abspath(os.path.join(PROJECT_ROOT, relative_path))
+
             # Security check - ensure we're still within project root
-            file_path = os.path.abspath(file_path)
-            if not file_path.startswith(PROJECT_ROOT):
+            if not file_path.startswith(PROJECT_ROOT + os.sep):
                 self.send_error(403, "Forbidden")
                 return
-            
-            if not os.path.exists(file_path):
+
+            try:
+                st = os.stat(file_path)
+            except (FileNotFoundError, NotADirectoryError):
+                st = None
+            if st is None or not os.path.isfile(file_path):
                 self.send_error(404, f"File not found: {relative_path}")
                 return
-                
+
+            etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+            last_modified = email.utils.formatdate(st.st_mtime, usegmt=True)
+            if self.not_modified(etag, st.st_mtime):
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Last-Modified', last_modified)
+                self.send_header('Cache-Control', 'no-cache')
+                self.end_headers()
+                return
+
+            # If-Range: only honour Range if the client's copy is still current
+            byte_range = parse_range(self.headers.get('Range'), st.st_size)
+            if_range = self.headers.get('If-Range')
+            if byte_range is not None and if_range and if_range not in (etag, last_modified):
+                byte_range = None
+            if byte_range is False:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{st.st_size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            start, end = byte_range or (0, st.st_size - 1)
+
             # Determine content type
-            import mimetypes
             content_type, _ = mimetypes.guess_type(file_path)
             if content_type is None:
                 content_type = 'application/octet-stream'
-            
-            # Read and serve the file
-            with open(file_path, 'rb') as f:
-                content = f.read()
-            
-            self.send_response(200)
+
+            body = None
+            if st.st_size <= STATIC_CACHE.max_file:
+                body = STATIC_CACHE.get(file_path, st)
+                if body is None:
+                    with open(file_path, 'rb') as f:
+                        body = f.read()
+                    STATIC_CACHE.put(file_path, os.stat(file_path), body)
+                # The file may have changed between stat and read; serve what was read
+                end = min(end, len(body) - 1)
+
+            self.send_response(206 if byte_range else 200)
             self.send_header('Content-type', content_type)
-            self.send_header('Content-Length', len(content))
+            self.send_header('Content-Length', max(end - start + 1, 0))
+            if byte_range:
+                self.send_header('Content-Range', f'bytes {start}-{end}/{st.st_size}')
+            self.send_header('Accept-Ranges', 'bytes')
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', last_modified)
+            self.send_header('Cache-Control', 'no-cache')
             self.end_headers()
-            self.wfile.write(content)
-            
+
+            if body is not None:
+                self.wfile.write(body[start:end + 1])
+            elif end >= start:
+                # socket.sendfile uses os.sendfile (zero-copy) where available
+                self.wfile.flush()
+                with open(file_path, 'rb') as f:
+                    self.wfile.count += self.connection.sendfile(f, start, end - start + 1)
+
+        except (BrokenPipeError, ConnectionResetError):
+            # The browser went away mid-transfer (e.g. navigated off a large image)
+            pass
         except Exception as e:
             print(f"Error serving project file: {e}")
             self.send_error(500, str(e))
 
+    def not_modified(self, etag, mtime):
+        """True if If-None-Match (preferred) or If-Modified-Since shows the client's copy is current."""
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            tags = [t.strip().removeprefix('W/') for t in if_none_match.split(',')]
+            return etag in tags or '*' in tags
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            return since is not None and int(mtime) <= since.timestamp()
+        return False
+
     def handle_save_class(self):
         try:
             content_len = int(self.headers.get('Content-Length', 0))
@@ -85,10 +972,8 @@ class EcoHandler(http.server.SimpleHTTPRequestHandler):
                 self.send_error(400, "Missing name or data")
                 return
 
-            # Sanitize name
-            safe_name = "".join([c for c in name if c.isalnum() or c in " -_"])
-            filename = safe_name.replace(" ", "_") + ".json"
-            
+            filename = class_filename(name)
+
             # Save to 'Saved Classes' directory
             classes_dir = os.path.join(PROJECT_ROOT, 'Saved Classes')
             if not os.path.exists(classes_dir):
@@ -96,40 +981,199 @@ class EcoHandler(http.server.SimpleHTTPRequestHandler):
 
             filepath = os.path.join(classes_dir, filename)
 
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(class_data, f, indent=2)
+            with PATH_LOCKS.hold(filepath):
+                if self.is_stale(data, filepath):
+                    return
+                version = atomic_write(filepath, json.dumps(class_data, indent=2))
+                CLASS_STORE.put(filename, class_data, version)
 
             print(f"Saved Class: {filepath}")
 
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps({'status': 'success', 'path': filepath}).encode())
+            self.send_json({'status': 'success', 'path': filepath, 'version': version}, headers={'ETag': f'"{version}"'})
 
         except Exception as e:
             print(f"Error saving class: {e}")
             self.send_error(500, str(e))
 
+    def handle_search(self):
+        try:
+            params = parse_qs(urlparse(self.path).query)
+            query = params.get('q', [''])[0]
+            kind = params.get('kind', [None])[0]
+            page = int(params.get('page', ['1'])[0])
+            limit = int(params.get('limit', [str(DEFAULT_PAGE_SIZE)])[0])
+
+            result = SEARCH_INDEX.search(query, kind=kind, page=page, limit=limit)
+
+            self.send_json(result)
+
+        except ValueError as e:
+            self.send_error(400, f"Invalid search parameters: {e}")
+        except Exception as e:
+            print(f"Error searching: {e}")
+            self.send_error(500, str(e))
+
+    def handle_plan(self):
+        """
+        GET /api/plan?concept=<conceptId>&minutes=90&alternatives=3&recent=5&difficulty=Intermediate
+        Ranked class plans for a concept; segments use the saved-class shape so
+        a plan loads like a saved class. recent=0 allows games from recent classes freely.
+        """
+        try:
+            params = parse_qs(urlparse(self.path).query)
+            get = lambda key, default=None: params.get(key, [default])[0]
+            concept_id = get('concept')
+            if not concept_id:
+                self.send_error(400, "Missing concept")
+                return
+            minutes = int(get('minutes', DEFAULT_PLAN_MINUTES))
+            alternatives = min(int(get('alternatives', DEFAULT_PLAN_ALTERNATIVES)), MAX_PLAN_ALTERNATIVES)
+            recent_classes = int(get('recent', DEFAULT_PLAN_RECENT_CLASSES))
+            max_difficulty = None
+            if get('difficulty'):
+                max_difficulty = difficulty_level(get('difficulty'))
+                if max_difficulty is None:
+                    raise ValueError(f"unknown difficulty {get('difficulty')!r}")
+
+            with CONTENT_INDEX.lock:
+                category = next((name for name, c in CONTENT_INDEX.concepts.items() if c['id'] == concept_id), None)
+                games = CONTENT_INDEX.game_list()
+            if category is None:
+                self.send_error(404, f"Concept not found: {concept_id}")
+                return
+
+            recent = CLASS_STORE.recent_games(recent_classes) if recent_classes > 0 else {}
+            planner = ClassPlanner(games)
+            watch = METRICS.stopwatch('plan')
+            plans = planner.plan(category, minutes, alternatives=max(alternatives, 1),
+                                 recent=recent, max_difficulty=max_difficulty)
+            watch.lap('search')
+
+            self.send_json({
+                'conceptId': concept_id,
+                'minutes': minutes,
+                'plans': plans,
+                'searched': planner.nodes,
+                'exhaustive': not planner.truncated,
+            })
+
+        except ValueError as e:
+            self.send_error(400, f"Invalid plan request: {e}")
+        except Exception as e:
+            print(f"Error planning class: {e}")
+            self.send_error(500, str(e))
+
+    def handle_diagnostics(self):
+        """GET /api/diagnostics - game files with frontmatter problems (skipped files included)"""
+        self.send_json({'files': CONTENT_INDEX.diagnostics_report()})
+
+    def handle_metrics(self):
+        """GET /api/metrics - counters and latency histograms in the Prometheus text format"""
+        self.send_body(METRICS.render().encode('utf-8'), PROMETHEUS_CONTENT_TYPE)
+
+    def handle_memory(self):
+        """
+        GET /api/memory - approximate bytes held by the content index (by part),
+        the search index and the parse cache, plus process RSS. Walks every
+        object, so it takes a moment on a large library; not for frequent scraping.
+        """
+        report = {'process': process_memory(), 'contentIndex': CONTENT_INDEX.memory_report()}
+        # Strings shared with the content index (interned ids, paths, tokens) are counted there
+        seen = set()
+        with CONTENT_INDEX.lock:
+            deep_size((CONTENT_INDEX.games, CONTENT_INDEX.raw_games), seen)
+        with SEARCH_INDEX.lock:
+            report['searchIndexBytes'] = deep_size((SEARCH_INDEX.postings, SEARCH_INDEX.docs, SEARCH_INDEX.vocab), seen)
+        cache = CONTENT_INDEX.cache
+        if cache is not None:
+            with cache.lock:
+                report['parseCacheBytes'] = deep_size(cache.entries, seen)
+
+        self.send_json(report)
+
+    def handle_profile(self):
+        """GET /api/metrics/profile[?sort=tottime&limit=50&reset=1] - accumulated cProfile samples"""
+        if not PROFILER.enabled:
+            self.send_error(404, "Profiling is off; start the server with --profile N")
+            return
+        try:
+            params = parse_qs(urlparse(self.path).query)
+            sort = params.get('sort', ['cumulative'])[0]
+            limit = int(params.get('limit', ['50'])[0])
+            body = PROFILER.report(sort, limit).encode('utf-8')
+        except (ValueError, KeyError) as e:
+            self.send_error(400, f"Invalid profile parameters: {e}")
+            return
+        if params.get('reset'):
+            PROFILER.reset()
+
+        self.send_body(body, 'text/plain; charset=utf-8')
+
+    def handle_events(self):
+        """
+        GET /api/events - server-sent event stream of content index changes.
+        'change' events carry {changes: [{kind, action, id, data}]}; 'reset'
+        means reload catalog.json. The socket is handed to EVENTS, freeing this worker.
+        """
+        if not hasattr(self.server, 'detach'):
+            self.send_error(501, "Event stream not supported by this server")
+            return
+        if EVENTS.client_count() >= MAX_EVENT_CLIENTS:
+            self.send_error(503, "Too many event stream clients")
+            return
+
+        self.send_response(200)
+        self.send_header('Content-type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        # No length: the stream ends when the connection does
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.flush()
+
+        self.close_connection = True
+        self.server.detach(self.connection)
+        EVENTS.add_client(self.connection, self.headers.get('Last-Event-ID'))
+
     def handle_list_classes(self):
         try:
-            classes_dir = os.path.join(PROJECT_ROOT, 'Saved Classes')
-            if not os.path.exists(classes_dir):
-                os.makedirs(classes_dir)
+            classes = CLASS_STORE.names()
 
-            classes = []
-            for filename in os.listdir(classes_dir):
-                if filename.endswith('.json'):
-                    classes.append(filename.replace('.json', '').replace('_', ' '))
-            
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps({'classes': sorted(classes)}).encode())
+            self.send_json({'classes': classes})
 
         except Exception as e:
             print(f"Error listing classes: {e}")
             self.send_error(500, str(e))
 
+    def handle_query_classes(self):
+        """GET /api/classes?concept=&game=&from=&to=&limit= - class summaries, newest first"""
+        try:
+            params = parse_qs(urlparse(self.path).query)
+            get = lambda key: params.get(key, [None])[0]
+            classes = CLASS_STORE.list(concept_id=get('concept'), game_id=get('game'),
+                                       date_from=get('from'), date_to=get('to'), limit=get('limit'))
+
+            self.send_json({'classes': classes})
+
+        except ValueError as e:
+            self.send_error(400, f"Invalid class query: {e}")
+        except Exception as e:
+            print(f"Error querying classes: {e}")
+            self.send_error(500, str(e))
+
+    def handle_classes_using(self):
+        """GET /api/classes/using?game=<gameId> - every saved class slot holding that game"""
+        try:
+            game_id = parse_qs(urlparse(self.path).query).get('game', [''])[0]
+            if not game_id:
+                self.send_error(400, "Missing game")
+                return
+
+            self.send_json({'gameId': game_id, 'uses': CLASS_STORE.classes_using(game_id)})
+
+        except Exception as e:
+            print(f"Error looking up classes: {e}")
+            self.send_error(500, str(e))
+
     def handle_load_class(self):
         try:
             content_len = int(self.headers.get('Content-Length', 0))
@@ -141,22 +1185,18 @@ class EcoHandler(http.server.SimpleHTTPRequestHandler):
                 self.send_error(400, "Missing name")
                 return
 
-            safe_name = "".join([c for c in name if c.isalnum() or c in " -_"])
-            filename = safe_name.replace(" ", "_") + ".json"
-            classes_dir = os.path.join(PROJECT_ROOT, 'Saved Classes')
-            filepath = os.path.join(classes_dir, filename)
+            filename = class_filename(name)
 
-            if not os.path.exists(filepath):
+            # Stored JSON text goes out as-is; no re-read or re-parse of the file
+            loaded = CLASS_STORE.load_raw(filename)
+            if loaded is None:
                 self.send_error(404, "Class not found")
                 return
+            class_json, version = loaded
 
-            with open(filepath, 'r', encoding='utf-8') as f:
-                class_data = json.load(f)
-
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps({'status': 'success', 'data': class_data}).encode())
+            body = (f'{{"status": "success", "version": "{version}", "data": '.encode()
+                    + class_json.encode() + b'}')
+            self.send_body(body, 'application/json', headers={'ETag': f'"{version}"'})
 
         except Exception as e:
             print(f"Error loading class: {e}")
@@ -164,131 +1204,36 @@ class EcoHandler(http.server.SimpleHTTPRequestHandler):
 
     def handle_create(self):
         try:
+            watch = METRICS.stopwatch('create')
             content_len = int(self.headers.get('Content-Length', 0))
             post_body = self.rfile.read(content_len)
             data = json.loads(post_body)
-            
-            type_ = data.get('type')
-            name = data.get('name')
-            
-            if not type_ or not name:
-                self.send_error(400, "Missing type or name")
+
+            try:
+                filepath, content = plan_create(data)
+            except ValueError as e:
+                self.send_error(400, str(e))
                 return
-                
-            # Sanitize name
-            safe_name = "".join([c for c in name if c.isalnum() or c in " -_"])
-            filename = safe_name.replace(" ", "") + ".md"
-            
-            if type_ == 'concept':
-                # Create Concepts/safe_name/safe_name.md
-                folder = os.path.join(PROJECT_ROOT, 'Concepts', safe_name.replace(" ", ""))
-                if not os.path.exists(folder):
-                    os.makedirs(folder)
-                
-                filepath = os.path.join(folder, filename)
-                description = data.get('description', 'Description of the concept.')
-                content = f"# {name}\n\n{description}"
-                
-            elif type_ == 'game':
-                category = data.get('category')
-                # Define fields
-                players = data.get('players')
-                duration = data.get('duration')
-                game_type = data.get('gameType')
-                intensity = data.get('intensity')
-                goals = data.get('goals')
-                purpose = data.get('purpose')
-                focus = data.get('focus')
-                description = data.get('description', f'Description of {name}.')
-
-                # Prepare frontmatter fields
-                fm_fields = [
-                    ('title', name),
-                    ('category', category),
-                    ('players', players),
-                    ('duration', duration),
-                    ('type', game_type),
-                    ('intensity', intensity),
-                ]
-
-                # Optional fields
-                difficulty = data.get('difficulty')
-                if difficulty:
-                    fm_fields.append(('difficulty', difficulty))
-                
-                parent_id = data.get('parentId')
-                if parent_id:
-                    fm_fields.append(('parent_id', parent_id))
-                    
-                if goals:
-                    fm_fields.append(('goals', goals))
-                if purpose:
-                    fm_fields.append(('purpose', purpose))
-                if focus:
-                    fm_fields.append(('focus', focus))
-                    
-                # Build Content
-                lines = ["---"]
-                for k, v in fm_fields:
-                    # Write only if value is not None/Empty, OR if it's a critical field?
-                    # Actually, if we want inheritance, we want to omit fields.
-                    # But if we create a NEW game, we want defaults?
-                    # The frontend should send defaults for new games, and nulls/empty for overrides.
-                    # 'players' default is handled below inside `if v:`.
-                    # But wait, python default '2' was set in data.get call earlier?
-                    
-                    # Correction: I need to change how data is retrieved to avoid defaults if I want inheritance.
-                    # But `data.get('players', '2')` is already done above.
-                    # I should update those lines too.
-                    # Let's just blindly write what we have for now, BUT for parent_id we definitely write it.
-                    # For inheritance, 'players' should only be written if it was explicitly provided?
-                    # But handle_create doesn't know if it was explicit or default.
-                    
-                    # If I rely on Frontend sending nulls, I should change the .get() calls.
-                    # Let's fix the .get() calls in this same replace block or assume I'll fix them next.
-                    # Actually, I can't easily change lines 198-202 without a larger range.
-                    # I will expand the range of this replacement to cover lines 193-226.
-                    
-                    if v:
-                        lines.append(f"{k}: {v}")
-                        
-                lines.append("---\n")
-                lines.append(description)
-                
-                content = "\n".join(lines)
-                
-                # Construct path for game: Concepts/{Category}/Games/{filename}
-                # Sanitize category just in case, though it should match an existing concept folder
-                safe_category = category.replace(" ", "")
-                concept_dir = os.path.join(PROJECT_ROOT, 'Concepts', safe_category)
-                games_dir = os.path.join(concept_dir, 'Games')
-                
-                if not os.path.exists(games_dir):
-                    os.makedirs(games_dir)
-                    
-                filepath = os.path.join(games_dir, filename)
-            else:
-                 self.send_error(400, "Invalid type")
-                 return
-                 
+            watch.lap('parse')
+
             # Write file
-            if os.path.exists(filepath) and not data.get('overwrite', False):
-                 self.send_error(409, "File already exists")
-                 return
+            with PATH_LOCKS.hold(filepath):
+                watch.lap('lock_wait')
+                if os.path.exists(filepath) and not data.get('overwrite', False):
+                     self.send_error(409, "File already exists")
+                     return
 
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(content)
-                
-            print(f"Created: {filepath}")
-            
-            # Regenerate
-            gen_script = os.path.join(BASE_DIR, 'scripts/generate_content.py')
-            subprocess.run(["python3", gen_script], check=True)
+                os.makedirs(os.path.dirname(filepath), exist_ok=True)
+                version = atomic_write(filepath, content)
+                watch.lap('write')
 
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps({'status': 'success', 'path': filepath}).encode())
+                print(f"Created: {filepath}")
+
+                # Update content index
+                self.reindex(filepath)
+                watch.lap('reindex')
+
+            self.send_json({'status': 'success', 'path': filepath, 'version': version}, headers={'ETag': f'"{version}"'})
 
         except Exception as e:
             print(f"Error creating: {e}")
@@ -296,6 +1241,7 @@ class EcoHandler(http.server.SimpleHTTPRequestHandler):
 
     def handle_save(self):
         try:
+            watch = METRICS.stopwatch('save')
             content_len = int(self.headers.get('Content-Length', 0))
             post_body = self.rfile.read(content_len)
             data = json.loads(post_body)
@@ -307,43 +1253,297 @@ class EcoHandler(http.server.SimpleHTTPRequestHandler):
                 self.send_error(400, "Missing path or content")
                 return
 
-            # Security: Ensure path is within Project Root
-            # We assume the frontend sends an absolute path (as read from content.json which has absolute paths)
-            # OR a relative path.
-            # Let's clean the path.
-            
-            # If the path comes from content.json, it's currently absolute on the user's machine?
-            # Let's check generate_content.py
-            # 'path': path (which is os.path.join(root, file)) -> This is absolute in the python execution context.
-            # So the frontend will send an absolute path.
-            
-            abs_path = os.path.abspath(file_path)
-            
-            if not abs_path.startswith(PROJECT_ROOT):
-                 print(f"Blocked write to: {abs_path}")
-                 self.send_error(403, "Forbidden path")
-                 return
-                 
+            # Paths are absolute (as in the catalog) or relative to PROJECT_ROOT, and must stay inside it
+            try:
+                abs_path = project_path(file_path)
+            except PermissionError:
+                print(f"Blocked write to: {file_path}")
+                self.send_error(403, "Forbidden path")
+                return
+            watch.lap('parse')
+
             # Write file
-            with open(abs_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-            
-            print(f"Saved file: {abs_path}")
+            with PATH_LOCKS.hold(abs_path):
+                watch.lap('lock_wait')
+                if self.is_stale(data, abs_path):
+                    return
+                version = atomic_write(abs_path, content)
+                watch.lap('write')
 
-            # Re-generate content.json to reflect changes (if titles changed etc)
-            # Run the generation script
-            gen_script = os.path.join(BASE_DIR, 'scripts/generate_content.py')
-            subprocess.run(["python3", gen_script], check=True)
+                print(f"Saved file: {abs_path}")
 
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps({'status': 'success'}).encode())
+                # Re-index the saved file so content.json reflects changes (if titles changed etc)
+                self.reindex(abs_path)
+                watch.lap('reindex')
+
+            self.send_json({'status': 'success', 'version': version}, headers={'ETag': f'"{version}"'})
             
         except Exception as e:
             print(f"Error saving: {e}")
             self.send_error(500, str(e))
 
+    def handle_batch(self):
+        """
+        POST /api/batch {"operations": [{"op": "create"|"save"|"delete", ...}]}
+
+        Each operation takes the same fields as /api/create, /api/save or
+        /api/delete (save honours baseVersion, create honours overwrite). All
+        operations are validated and checked before any is applied, applied
+        all-or-nothing, and followed by a single index update. The response
+        lists a result per operation, in request order.
+        """
+        try:
+            content_len = int(self.headers.get('Content-Length', 0))
+            post_body = self.rfile.read(content_len)
+            data = json.loads(post_body)
+
+            operations = data.get('operations') if isinstance(data, dict) else None
+            if not isinstance(operations, list) or not operations:
+                self.send_error(400, "Missing operations")
+                return
+            if len(operations) > MAX_BATCH_OPERATIONS:
+                self.send_error(400, f"Too many operations (max {MAX_BATCH_OPERATIONS})")
+                return
+
+            results = [{'index': i, 'op': op.get('op') if isinstance(op, dict) else None, 'status': 'skipped'}
+                       for i, op in enumerate(operations)]
+
+            # 1. Validate everything up front
+            planned = []
+            for i, op in enumerate(operations):
+                try:
+                    kind, path, content = plan_batch_operation(op)
+                except (ValueError, PermissionError) as e:
+                    results[i].update(status='invalid', error=str(e))
+                    continue
+                results[i]['path'] = path
+                planned.append((i, kind, path, content))
+            for a, b in overlapping_paths(path for _, _, path, _ in planned):
+                for result in results:
+                    if result.get('path') == b:
+                        result.update(status='invalid', error=f"Overlaps another operation on {a}")
+            if any(r['status'] == 'invalid' for r in results):
+                self.send_batch_response(400, 'invalid', results)
+                return
+
+            with PATH_LOCKS.hold(*(path for _, _, path, _ in planned)):
+
+                # 2. Preconditions, still before anything is written
+                for i, kind, path, content in planned:
+                    op = operations[i]
+                    if kind == 'delete' and not os.path.exists(path):
+                        results[i].update(status='not_found', error="Path not found")
+                    elif kind == 'create' and os.path.exists(path) and not op.get('overwrite', False):
+                        results[i].update(status='conflict', error="File already exists")
+                    elif kind == 'save' and 'baseVersion' in op:
+                        error = version_conflict(path, op['baseVersion'])
+                        if error:
+                            results[i].update(status='conflict', error=error, version=file_version(path))
+                if any(r['status'] != 'skipped' for r in results):
+                    self.send_batch_response(409, 'conflict', results)
+                    return
+
+                # 3. Apply, undoing everything if any step fails
+                transaction = BatchTransaction()
+                failed = None
+                for i, kind, path, content in planned:
+                    try:
+                        if kind == 'delete':
+                            transaction.delete(path)
+                            results[i]['status'] = 'ok'
+                        else:
+                            results[i].update(status='ok', version=transaction.write(path, content))
+                    except Exception as e:
+                        failed = i
+                        results[i].update(status='failed', error=str(e))
+                        break
+
+                if failed is None:
+                    transaction.commit()
+                else:
+                    transaction.rollback()
+                    for result in results:
+                        if result['status'] == 'ok':
+                            result['status'] = 'rolled_back'
+                            result.pop('version', None)
+
+                # 4. One incremental index update for the whole batch
+                self.reindex_many([path for _, _, path, _ in planned])
+
+            if failed is not None:
+                print(f"Batch failed at operation {failed}, rolled back")
+                self.send_batch_response(500, 'failed', results)
+                return
+
+            print(f"Applied batch of {len(planned)} operation(s)")
+            self.send_batch_response(200, 'success', results)
+
+        except Exception as e:
+            print(f"Error applying batch: {e}")
+            self.send_error(500, str(e))
+
+    def send_batch_response(self, code, status, results):
+        self.send_json({'status': status, 'results': results}, code=code)
+
+    def handle_export(self):
+        """
+        GET /api/export?class=<name>[&class=...] or ?concept=&from=&to= or ?all=1, plus gzip=1 for a .tar.gz
+
+        A tar of the selected saved classes, every game they use (and the games
+        those inherit from) and the markdown and images of their concepts,
+        ending with eco-archive.json: the sha256 of each file. Streamed as it is
+        built, one file at a time, with chunked framing (HTTP/1.0 clients get
+        the archive up to the connection closing).
+        """
+        try:
+            params = parse_qs(urlparse(self.path).query)
+            get = lambda key: params.get(key, [None])[0]
+            if params.get('class'):
+                filenames = sorted({class_filename(name) for name in params['class']})
+                unknown = [f for f in filenames if CLASS_STORE.load_raw(f) is None]
+                if unknown:
+                    self.send_error(404, f"Class not found: {', '.join(unknown)}")
+                    return
+            elif get('all') or get('concept') or get('from') or get('to'):
+                filenames = sorted(class_filename(c['name']) for c in CLASS_STORE.list(
+                    concept_id=get('concept'), date_from=get('from'), date_to=get('to')))
+            else:
+                self.send_error(400, "Select classes with class=, concept=/from=/to= or all=1")
+                return
+            if not filenames:
+                self.send_error(404, "No saved classes match")
+                return
+            names, missing_games = archive_files(CONTENT_INDEX, CLASS_STORE, filenames, PROJECT_ROOT)
+        except Exception as e:
+            print(f"Error preparing export: {e}")
+            self.send_error(500, str(e))
+            return
+
+        compress = bool(get('gzip'))
+        filename = f"eco-classes-{time.strftime('%Y%m%d-%H%M%S')}.tar" + ('.gz' if compress else '')
+        chunked = self.request_version != 'HTTP/1.0'
+        self.send_response(200)
+        self.send_header('Content-type', 'application/gzip' if compress else 'application/x-tar')
+        self.send_header('Content-Disposition', f'attachment; filename="{filename}"')
+        self.send_header('Cache-Control', 'no-store')
+        if chunked:
+            self.send_header('Transfer-Encoding', 'chunked')
+        else:
+            self.send_header('Connection', 'close')
+            self.close_connection = True
+        self.end_headers()
+
+        out = ChunkedWriter(self.wfile) if chunked else self.wfile
+        try:
+            manifest = write_archive(out, PROJECT_ROOT, names, filenames, compress, missing_games)
+            if chunked:
+                out.close()
+        except Exception as e:
+            # Too late for an error status; closing without the last chunk marks the archive incomplete
+            print(f"Error streaming export: {e}")
+            self.close_connection = True
+            return
+        print(f"Exported {len(filenames)} class(es), {len(manifest['files'])} file(s)")
+
+    def handle_import(self):
+        """
+        POST /api/import[?overwrite=1] with an /api/export archive as the body
+
+        The archive is read as it arrives into a staging folder, each file
+        hashed on the way, and checked against its eco-archive.json before
+        anything is applied. Files identical to the ones on disk are left
+        alone; a file that exists with other content is a conflict (409)
+        unless overwrite=1. The rest is applied all-or-nothing under the path
+        locks, followed by one class index sync and one content index update.
+        """
+        length = self.headers.get('Content-Length')
+        if length is None:
+            self.send_error(411, "Content-Length required")
+            return
+        try:
+            length = int(length)
+        except ValueError:
+            self.send_error(400, "Invalid Content-Length")
+            return
+        if length > MAX_IMPORT_BYTES:
+            self.send_error(413, f"Archive too large (max {MAX_IMPORT_BYTES} bytes)")
+            return
+        overwrite = bool(parse_qs(urlparse(self.path).query).get('overwrite'))
+
+        staging = tempfile.mkdtemp(prefix='.eco-import-', dir=PROJECT_ROOT)
+        try:
+            body = LimitedReader(self.rfile, length)
+            watch = METRICS.stopwatch('import')
+            try:
+                staged = read_archive(body, staging)
+            except ValueError as e:
+                # send_error closes the connection, so an unread rest of the body doesn't matter
+                self.send_error(400, f"Invalid archive: {e}")
+                return
+            # tar end-of-archive padding, so the connection can be reused
+            while body.read(CHUNK_SIZE):
+                pass
+            watch.lap('receive')
+
+            results = [{'path': name, 'status': 'skipped'} for name in sorted(staged)]
+            targets = {name: project_path(name) for name in staged}
+
+            with PATH_LOCKS.hold(*targets.values()):
+
+                for result in results:
+                    current = sha256_file(targets[result['path']])
+                    if current == staged[result['path']][1]:
+                        result['status'] = 'unchanged'
+                    elif current is not None and not overwrite:
+                        result.update(status='conflict', error="File exists with different content")
+                if any(r['status'] == 'conflict' for r in results):
+                    self.send_batch_response(409, 'conflict', results)
+                    return
+
+                transaction = BatchTransaction()
+                failed = None
+                for result in results:
+                    if result['status'] != 'skipped':
+                        continue
+                    try:
+                        transaction.place(targets[result['path']], staged[result['path']][0])
+                        result['status'] = 'written'
+                    except Exception as e:
+                        failed = result['path']
+                        result.update(status='failed', error=str(e))
+                        break
+
+                if failed is None:
+                    transaction.commit()
+                else:
+                    transaction.rollback()
+                    for result in results:
+                        if result['status'] == 'written':
+                            result['status'] = 'rolled_back'
+
+                touched = [r['path'] for r in results if r['status'] in ('written', 'rolled_back', 'failed')]
+                if any(name.startswith(CLASSES_FOLDER + '/') for name in touched):
+                    CLASS_STORE.sync()
+                concept_paths = [targets[name] for name in touched if not name.startswith(CLASSES_FOLDER + '/')]
+                if concept_paths:
+                    self.reindex_many(concept_paths)
+                watch.lap('apply')
+
+            if failed is not None:
+                print(f"Import failed at {failed}, rolled back")
+                self.send_batch_response(500, 'failed', results)
+                return
+
+            print(f"Imported archive: {sum(r['status'] == 'written' for r in results)} file(s) written, "
+                  f"{sum(r['status'] == 'unchanged' for r in results)} unchanged")
+            self.send_batch_response(200, 'success', results)
+
+        except Exception as e:
+            print(f"Error importing archive: {e}")
+            self.send_error(500, str(e))
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
     def handle_delete(self):
         try:
             content_len = int(self.headers.get('Content-Length', 0))
@@ -355,55 +1555,87 @@ class EcoHandler(http.server.SimpleHTTPRequestHandler):
                 self.send_error(400, "Missing path")
                 return
 
-            # Security: Ensure path is within Project Root
-            # The path coming from content.json is absolute.
-            # If it is absolute, we check it starts with PROJECT_ROOT.
-            
-            target_path = relative_path
-            if not os.path.isabs(target_path):
-                target_path = os.path.join(PROJECT_ROOT, relative_path)
-            
-            target_path = os.path.abspath(target_path)
-            
-            if not target_path.startswith(PROJECT_ROOT):
-                 print(f"Blocked delete of: {target_path}")
-                 self.send_error(403, "Forbidden path")
-                 return
-
-            if not os.path.exists(target_path):
-                self.send_error(404, "Path not found")
+            try:
+                target_path = project_path(relative_path)
+            except PermissionError:
+                print(f"Blocked delete of: {relative_path}")
+                self.send_error(403, "Forbidden path")
                 return
+
+            with PATH_LOCKS.hold(target_path):
+                if not os.path.exists(target_path):
+                    self.send_error(404, "Path not found")
+                    return
                 
-            # Delete logic
-            if os.path.isdir(target_path):
-                import shutil
-                shutil.rmtree(target_path)
-                print(f"Deleted directory: {target_path}")
-            else:
-                os.remove(target_path)
-                print(f"Deleted file: {target_path}")
+                # Delete logic
+                if os.path.isdir(target_path):
+                    shutil.rmtree(target_path)
+                    print(f"Deleted directory: {target_path}")
+                else:
+                    os.remove(target_path)
+                    print(f"Deleted file: {target_path}")
                 
-            # Regenerate content
-            gen_script = os.path.join(BASE_DIR, 'scripts/generate_content.py')
-            subprocess.run(["python3", gen_script], check=True)
+                # Update content index
+                self.reindex(target_path)
 
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps({'status': 'success'}).encode())
+            self.send_json({'status': 'success'})
 
         except Exception as e:
             print(f"Error deleting: {e}")
             self.send_error(500, str(e))
 
+def create_server(port=PORT, workers=DEFAULT_WORKERS, host=""):
+    """Builds the HTTP server; workers=1 keeps the old single-threaded TCPServer."""
+    handler = partial(EcoHandler, directory=BASE_DIR)
+    if workers <= 1:
+        return SerialHTTPServer((host, port), handler)
+    return PooledHTTPServer((host, port), handler, workers)
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Eco-BJJ web server")
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help="Worker threads serving requests (1 = single-threaded)")
+    parser.add_argument('--watch', action='store_true',
+                        help="Pick up edits made directly in Concepts/ (text editor, git pull)")
+    parser.add_argument('--poll', action='store_true',
+                        help="With --watch, poll mtimes instead of using inotify")
+    parser.add_argument('--parse-jobs', type=int, default=1, metavar='N',
+                        help="Parse game files on N workers at startup (helps most on network disks)")
+    parser.add_argument('--parse-pool', choices=PARSE_POOLS, default='thread',
+                        help="With --parse-jobs, parse on threads (I/O-bound) or processes (CPU-bound)")
+    parser.add_argument('--profile', type=int, default=0, metavar='N',
+                        help="cProfile every Nth request; read the totals at /api/metrics/profile")
+    args = parser.parse_args()
+    PROFILER.every = args.profile
+
     # Change into Web App directory so static files are served correctly from root
     os.chdir(BASE_DIR)
     
     # Allow address reuse
     socketserver.TCPServer.allow_reuse_address = True
     
-    with socketserver.TCPServer(("", PORT), EcoHandler) as httpd:
-        print(f"Eco-BJJ Server running at http://0.0.0.0:{PORT}")
-        print(f"Parsing Project Root: {PROJECT_ROOT}")
-        httpd.serve_forever()
+    print(f"Parsing Project Root: {PROJECT_ROOT}")
+    CONTENT_INDEX.cache = ParseCache(PARSE_CACHE_FILE)
+    CONTENT_INDEX.jobs = args.parse_jobs
+    CONTENT_INDEX.pool = args.parse_pool
+    CONTENT_INDEX.build()
+    CONTENT_INDEX.write()
+    ASSETS.refresh()
+    print(f"Fingerprinted {len(ASSETS.manifest)} asset(s) into {os.path.relpath(ASSETS.out_dir, BASE_DIR)}")
+    updated, removed = CLASS_STORE.sync()
+    print(f"Class index: {updated} saved class(es) reindexed, {removed} removed")
+
+    if args.watch:
+        def on_watch_change(paths):
+            METRICS.inc('eco_index_refreshes_total', {'trigger': 'watcher'})
+            CONTENT_INDEX.write_soon()
+
+        ContentWatcher(CONTENT_INDEX, on_change=on_watch_change, force_polling=args.poll).start()
+
+    with create_server(args.port, args.workers) as httpd:
+        print(f"Eco-BJJ Server running at http://0.0.0.0:{args.port} ({args.workers} workers)")
+        try:
+            httpd.serve_forever()
+        finally:
+            CONTENT_INDEX.flush()
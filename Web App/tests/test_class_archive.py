@@ -0,0 +1,119 @@
+import io
+import os
+import sys
+import json
+import shutil
+import hashlib
+import tarfile
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+from generate_content import ContentIndex
+from class_store import ClassStore
+from class_archive import ARCHIVE_MANIFEST, ARCHIVE_FORMAT, archive_files, write_archive, read_archive
+
+FILES = {
+    'Concepts/Guard/Guard.md': '# Guard\n\nKeeping the guard.\n',
+    'Concepts/Guard/Games/Parent.md': '---\ntitle: Parent\nduration: 4\n---\nParent description.\n',
+    'Concepts/Guard/Games/Child.md': '---\ntitle: Child\nparent_id: guard-parent\n---\n',
+    'Concepts/Guard/Games/Unused.md': '---\ntitle: Unused\n---\n',
+    'Concepts/Mobility/Mobility.md': '# Mobility\n',
+    'Saved Classes/Night.json': json.dumps({'segments': {'applications': [
+        {'gameId': 'guard-child'}, {'gameId': 'guard-gone'}]}}),
+}
+
+def tar_bytes(members, manifest=None):
+    """A tar of (name, bytes) members, followed by manifest (a dict) if given."""
+    out = io.BytesIO()
+    with tarfile.open(fileobj=out, mode='w') as tar:
+        entries = list(members)
+        if manifest is not None:
+            entries.append((ARCHIVE_MANIFEST, json.dumps(manifest).encode('utf-8')))
+        for name, data in entries:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    out.seek(0)
+    return out
+
+def manifest_for(members):
+    return {'format': ARCHIVE_FORMAT, 'files': {name: hashlib.sha256(data).hexdigest() for name, data in members}}
+
+class ClassArchiveTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix='eco-test-')
+        for name, text in FILES.items():
+            path = os.path.join(self.root, *name.split('/'))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+        self.staging = os.path.join(self.root, 'staging')
+        os.mkdir(self.staging)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_round_trip(self):
+        index = ContentIndex(os.path.join(self.root, 'Concepts'), output_file=None)
+        index.build()
+        store = ClassStore(os.path.join(self.root, 'Saved Classes'), db_path=os.path.join(self.root, 'classes.sqlite'))
+        try:
+            store.sync()
+            names, missing = archive_files(index, store, ['Night.json'], self.root)
+        finally:
+            store.close()
+        # The game, the game it inherits from and their concept; not the unused game or other concepts
+        self.assertEqual(names, ['Concepts/Guard/Games/Child.md', 'Concepts/Guard/Games/Parent.md',
+                                 'Concepts/Guard/Guard.md', 'Saved Classes/Night.json'])
+        self.assertEqual(missing, ['guard-gone'])
+
+        for compress in (False, True):
+            with self.subTest(compress=compress):
+                out = io.BytesIO()
+                manifest = write_archive(out, self.root, names, ['Night.json'], compress=compress,
+                                         missing_games=missing)
+                self.assertEqual(manifest['missingGames'], ['guard-gone'])
+                out.seek(0)
+                staged = read_archive(out, self.staging)
+                self.assertEqual(sorted(staged), names)
+                for name, (path, digest) in staged.items():
+                    with open(path, 'rb') as f:
+                        data = f.read()
+                    self.assertEqual(data, FILES[name].encode('utf-8'))
+                    self.assertEqual(digest, manifest['files'][name])
+
+    def test_hash_mismatch_is_rejected(self):
+        members = [('Saved Classes/A.json', b'{}')]
+        manifest = manifest_for(members)
+        manifest['files']['Saved Classes/A.json'] = '0' * 64
+        with self.assertRaisesRegex(ValueError, 'Hash mismatch'):
+            read_archive(tar_bytes(members, manifest), self.staging)
+
+    def test_unlisted_and_missing_files_are_rejected(self):
+        members = [('Saved Classes/A.json', b'{}')]
+        with self.assertRaisesRegex(ValueError, 'Not listed'):
+            read_archive(tar_bytes(members, manifest_for([])), self.staging)
+        manifest = manifest_for(members + [('Saved Classes/B.json', b'{}')])
+        with self.assertRaisesRegex(ValueError, 'missing'):
+            read_archive(tar_bytes(members, manifest), self.staging)
+        with self.assertRaisesRegex(ValueError, ARCHIVE_MANIFEST):
+            read_archive(tar_bytes(members), self.staging)
+
+    def test_unsafe_member_names_are_rejected(self):
+        for name in ('../evil.md', '/etc/evil.json', 'Concepts/Guard/../../evil.md', 'Web App/server.py',
+                     'Saved Classes/nested/A.json', 'Concepts/Guard/Games/run.sh'):
+            with self.subTest(name=name):
+                members = [(name, b'x')]
+                with self.assertRaises(ValueError):
+                    read_archive(tar_bytes(members, manifest_for(members)), self.staging)
+
+    def test_class_file_must_be_a_json_object(self):
+        members = [('Saved Classes/A.json', b'[1, 2]')]
+        with self.assertRaisesRegex(ValueError, 'Not a saved class'):
+            read_archive(tar_bytes(members, manifest_for(members)), self.staging)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+from generate_content import ContentIndex
+from class_planner import ClassPlanner
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def game(game_id, category, duration=5):
+    return {'id': game_id, 'category': category, 'duration': duration, 'type': 'Standard'}
+
+class ClassPlannerTest(unittest.TestCase):
+
+    def test_every_concept_in_the_corpus_gets_a_plan(self):
+        index = ContentIndex(os.path.join(PROJECT_ROOT, 'Concepts'), output_file=None)
+        index.build()
+        games = index.game_list()
+        for category in index.concepts:
+            with self.subTest(category=category):
+                plans = ClassPlanner(games).plan(category, 90)
+                self.assertTrue(plans)
+                self.assertEqual(sum(plans[0]['minutes'].values()), 90)
+
+    def test_shared_pool_falls_back_to_reusing_games(self):
+        # standing, takedowns and applications all draw from these five games
+        games = [game(f'standing-{i}', 'Standing') for i in range(5)]
+        games += [game(f'mobility-{i}', 'Mobility') for i in range(3)]
+        plans = ClassPlanner(games).plan('Standing', 90)
+        self.assertTrue(plans)
+        self.assertTrue(any('used twice' in w for w in plans[0]['warnings']))
+
+    def test_no_game_is_repeated_when_the_catalog_has_enough(self):
+        games = [game(f'standing-{i}', 'Standing') for i in range(4)]
+        games += [game(f'mobility-{i}', 'Mobility') for i in range(3)]
+        games += [game(f'pressure-{i}', 'Pressure') for i in range(6)]
+        plans = ClassPlanner(games).plan('Pressure', 90)
+        self.assertTrue(plans)
+        for plan in plans:
+            ids = [g['gameId'] for picked in plan['segments'].values() for g in picked]
+            self.assertEqual(len(ids), len(set(ids)))
+            self.assertEqual(plan['warnings'], [])
+
+    def test_too_short_a_class_is_rejected(self):
+        with self.assertRaises(ValueError):
+            ClassPlanner([]).plan('Standing', 30)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+from frontmatter import read_frontmatter, MAX_HEADER_LINES
+
+class FrontmatterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp(prefix='eco-test-')
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir)
+
+    def read(self, text, **kwargs):
+        path = os.path.join(self.workdir, 'game.md')
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+        return read_frontmatter(path, **kwargs)
+
+    def test_typed_fields_and_body(self):
+        doc = self.read('\ufeff---\r\ntitle: "Hip Escape"\r\nplayers: 3\r\nduration: 2.5\r\n'
+                        'difficulty: advanced\r\nintensity: None\r\n---\r\nBody text.\r\n', with_body=True)
+        self.assertTrue(doc.found)
+        self.assertEqual(doc.diagnostics, [])
+        self.assertEqual(doc.fields, {'title': 'Hip Escape', 'players': 3, 'duration': 2.5,
+                                      'difficulty': 'Advanced', 'intensity': None})
+        self.assertEqual(doc.body, 'Body text.\r\n')
+
+    def test_indented_line_continues_the_value(self):
+        doc = self.read('---\nfocus: Keep the\n  elbows in\n---\n')
+        self.assertEqual(doc.fields['focus'], 'Keep the elbows in')
+
+    def test_field_diagnostics(self):
+        doc = self.read('---\ntitle: A\nplayers: 2.5\nduration: 5 min\ndifficulty: Expert\n'
+                        'not a field\ntitle: B\n---\n')
+        self.assertTrue(doc.found)
+        self.assertEqual(doc.fields['title'], 'B')
+        self.assertEqual(doc.fields['duration'], 5)
+        self.assertEqual(doc.fields['difficulty'], 'Expert')
+        self.assertEqual(doc.diagnostics, [
+            "line 6: expected 'key: value', got 'not a field'; ignored",
+            "line 7: duplicate key 'title'; the last value wins",
+            "players: expected a whole number, got '2.5'",
+            "duration: read '5 min' as 5",
+            "difficulty: unknown level 'Expert' (expected one of Beginner, Intermediate, Advanced)",
+        ])
+
+    def test_non_numeric_value_is_dropped(self):
+        doc = self.read('---\nplayers: many\n---\n')
+        self.assertIsNone(doc.fields['players'])
+        self.assertEqual(doc.diagnostics, ["players: expected a number, got 'many'"])
+
+    def test_missing_frontmatter_skips_the_file(self):
+        doc = self.read('# Just markdown\n')
+        self.assertFalse(doc.found)
+        self.assertEqual(doc.diagnostics, ["line 1: no frontmatter (file must start with '---'); file skipped"])
+
+    def test_unterminated_header_skips_the_file(self):
+        doc = self.read('---\ntitle: A\n')
+        self.assertFalse(doc.found)
+        self.assertEqual(doc.diagnostics, ["no closing '---' before the end of the file; file skipped"])
+
+        doc = self.read('---\n' + 'key: value\n' * (MAX_HEADER_LINES + 1))
+        self.assertFalse(doc.found)
+        self.assertEqual(doc.diagnostics[-1], f"no closing '---' within {MAX_HEADER_LINES} lines; file skipped")
+
+    def test_body_is_read_lazily(self):
+        doc = self.read('---\ntitle: A\n---\nLater.\n')
+        self.assertIsNone(doc._body)
+        self.assertEqual(doc.body, 'Later.\n')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+from generate_content import ContentIndex
+
+PARENT = '''---
+title: Parent
+players: 2
+duration: 4
+type: Standard
+intensity: Low
+goals: Pass the guard
+---
+Parent description.
+'''
+
+CHILD = '''---
+title: Child
+parent_id: guard-parent
+intensity: Adversarial
+---
+'''
+
+class InheritanceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp(prefix='eco-test-')
+        concept_dir = os.path.join(self.workdir, 'Concepts', 'Guard')
+        self.games_dir = os.path.join(concept_dir, 'Games')
+        os.makedirs(self.games_dir)
+        with open(os.path.join(concept_dir, 'Guard.md'), 'w', encoding='utf-8') as f:
+            f.write('# Guard\n\nKeeping the guard.\n')
+        self.parent = self.write('Parent.md', PARENT)
+        self.child = self.write('Child.md', CHILD)
+        self.index = ContentIndex(os.path.join(self.workdir, 'Concepts'), output_file=None)
+        self.index.build()
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir)
+
+    def write(self, name, text):
+        path = os.path.join(self.games_dir, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return path
+
+    def test_empty_fields_come_from_the_parent(self):
+        child = self.index.find_game('guard-child')
+        self.assertEqual(child['goals'], 'Pass the guard')
+        self.assertEqual(child['duration'], 4)
+        self.assertEqual(child['description'], 'Parent description.')
+        # The variation's own value wins over the parent's
+        self.assertEqual(child['intensity'], 'Adversarial')
+        self.assertEqual(child['inherited']['goals'], 'guard-parent')
+        self.assertNotIn('intensity', child['inherited'])
+        self.assertIsNone(child.get('inheritanceError'))
+
+    def test_saving_the_parent_updates_the_variation(self):
+        self.write('Parent.md', PARENT.replace('Pass the guard', 'Sweep').replace('Parent description.', 'New text.'))
+        self.assertGreater(self.index.refresh_path(self.parent), 0)
+        child = self.index.find_game('guard-child')
+        self.assertEqual(child['goals'], 'Sweep')
+        self.assertEqual(child['description'], 'New text.')
+
+    def test_deleting_the_parent_orphans_the_variation(self):
+        os.remove(self.parent)
+        self.index.refresh_path(self.parent)
+        child = self.index.find_game('guard-child')
+        self.assertEqual(child['inheritanceError'], "parent 'guard-parent' not found")
+        self.assertFalse(child['goals'])
+
+        self.write('Parent.md', PARENT)
+        self.index.refresh_path(self.parent)
+        child = self.index.find_game('guard-child')
+        self.assertIsNone(child.get('inheritanceError'))
+        self.assertEqual(child['goals'], 'Pass the guard')
+
+    def test_parent_cycle_disables_inheritance(self):
+        self.write('Parent.md', PARENT.replace('goals:', 'parent_id: guard-child\ngoals:'))
+        self.index.refresh_path(self.parent)
+        child = self.index.find_game('guard-child')
+        self.assertIn('cycle', child['inheritanceError'])
+        self.assertFalse(child['goals'])
+
+    def test_unchanged_file_reports_no_change(self):
+        self.assertEqual(self.index.refresh_path(self.child), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,297 @@
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+import subprocess
+import urllib.request
+from urllib.error import HTTPError, URLError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import server
+from atomic_io import file_version
+
+# Seconds to wait for a test server to finish indexing and start answering
+STARTUP_TIMEOUT = 30
+# Left out of the copy a test server runs in: caches it rebuilds, and the tests themselves
+COPY_IGNORE = shutil.ignore_patterns('__pycache__', '*.sqlite', 'dist', 'images', 'server.log', 'tests')
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+class ServerTestCase(unittest.TestCase):
+    """
+    Runs server.py in a subprocess against a copy of the project, so tests
+    can save, delete and import without touching the real Concepts tree.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.workdir = tempfile.mkdtemp(prefix='eco-test-')
+        cls.root = os.path.join(cls.workdir, 'eco')
+        for name in ('Concepts', 'Saved Classes', 'Web App'):
+            shutil.copytree(os.path.join(server.PROJECT_ROOT, name), os.path.join(cls.root, name),
+                            ignore=COPY_IGNORE, symlinks=True)
+        port = free_port()
+        cls.base_url = f'http://127.0.0.1:{port}'
+        cls.process = subprocess.Popen([sys.executable, 'server.py', '--port', str(port), '--workers', '4'],
+                                       cwd=os.path.join(cls.root, 'Web App'),
+                                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while True:
+            try:
+                urllib.request.urlopen(cls.base_url + '/api/diagnostics', timeout=1).close()
+                break
+            except (URLError, ConnectionError):
+                if cls.process.poll() is not None or time.monotonic() > deadline:
+                    cls.tearDownClass()
+                    raise RuntimeError("test server did not start")
+                time.sleep(0.1)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.process.terminate()
+        cls.process.wait()
+        shutil.rmtree(cls.workdir, ignore_errors=True)
+
+    def path(self, *parts):
+        return os.path.join(self.root, *parts)
+
+    def post(self, api, data, content_type='application/json'):
+        """(status, decoded JSON or the raw body) for a POST of data (bytes as they are, anything else as JSON)."""
+        if not isinstance(data, bytes):
+            data = json.dumps(data).encode('utf-8')
+        request = urllib.request.Request(self.base_url + api, data=data, headers={'Content-Type': content_type},
+                                         method='POST')
+        try:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                status, body = response.status, response.read()
+        except HTTPError as e:
+            status, body = e.code, e.read()
+        try:
+            return status, json.loads(body)
+        except ValueError:
+            return status, body
+
+    def read(self, *parts):
+        with open(self.path(*parts), encoding='utf-8') as f:
+            return f.read()
+
+    def write(self, parts, text):
+        path = self.path(*parts)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return path
+
+class PooledServerTest(unittest.TestCase):
+
+    def test_port_in_use_reports_the_bind_error(self):
+        with socket.socket() as taken:
+            taken.bind(('127.0.0.1', 0))
+            taken.listen()
+            with self.assertRaises(OSError) as caught:
+                server.create_server(taken.getsockname()[1], workers=2, host='127.0.0.1')
+        self.assertNotIsInstance(caught.exception, AttributeError)
+
+class PathLocksTest(unittest.TestCase):
+
+    def setUp(self):
+        self.locks = server.PathLocks()
+        self.root = os.path.abspath(os.sep + 'eco-locks')
+
+    def path(self, *parts):
+        return os.path.join(self.root, *parts)
+
+    def test_folder_waits_for_writes_inside_it(self):
+        events = []
+        inside = threading.Event()
+
+        def save():
+            with self.locks.hold(self.path('Games', 'a.md')):
+                inside.set()
+                events.append('save')
+                time.sleep(0.1)
+                events.append('saved')
+
+        writer = threading.Thread(target=save)
+        writer.start()
+        inside.wait()
+        with self.locks.hold(self.path('Games')):
+            events.append('delete')
+        writer.join()
+        self.assertEqual(events, ['save', 'saved', 'delete'])
+        self.assertEqual(self.locks._held, {})
+
+    def test_sibling_files_do_not_wait_on_each_other(self):
+        with self.locks.hold(self.path('Games', 'a.md')):
+            done = threading.Event()
+
+            def save():
+                with self.locks.hold(self.path('Games', 'b.md')):
+                    done.set()
+
+            threading.Thread(target=save).start()
+            self.assertTrue(done.wait(1))
+
+    def test_same_file_is_serialized(self):
+        with self.locks.hold(self.path('a.md')):
+            done = threading.Event()
+
+            def save():
+                with self.locks.hold(self.path('a.md')):
+                    done.set()
+
+            threading.Thread(target=save).start()
+            self.assertFalse(done.wait(0.1))
+        self.assertTrue(done.wait(1))
+
+GAME = ('Concepts', 'Mobility', 'Games', 'AutoSelectTest.md')
+
+class SaveTest(ServerTestCase):
+
+    def test_save_with_current_base_version(self):
+        path = self.path(*GAME)
+        text = self.read(*GAME) + '\nOne more line.\n'
+        status, body = self.post('/api/save', {'path': path, 'content': text, 'baseVersion': file_version(path)})
+        self.assertEqual(status, 200)
+        self.assertEqual(body['version'], file_version(path))
+        self.assertEqual(self.read(*GAME), text)
+
+    def test_stale_base_version_is_a_conflict(self):
+        path = self.path(*GAME)
+        before = self.read(*GAME)
+        status, body = self.post('/api/save', {'path': path, 'content': 'lost', 'baseVersion': 'stale'})
+        self.assertEqual(status, 409)
+        self.assertEqual(body['version'], file_version(path))
+        self.assertEqual(self.read(*GAME), before)
+
+    def test_null_base_version_on_an_existing_file_is_a_conflict(self):
+        status, body = self.post('/api/save', {'path': self.path(*GAME), 'content': 'lost', 'baseVersion': None})
+        self.assertEqual(status, 409)
+        self.assertEqual(body['error'], "File already exists")
+
+    def test_stale_class_save_is_a_conflict(self):
+        status, body = self.post('/api/save_class', {'name': 'Conflict Test', 'data': {'title': 'Conflict Test'},
+                                                     'baseVersion': 'stale'})
+        self.assertEqual(status, 409)
+        self.assertFalse(os.path.exists(self.path('Saved Classes', 'Conflict_Test.json')))
+
+    def test_relative_path_resolves_against_the_project(self):
+        status, _ = self.post('/api/save', {'path': '/'.join(GAME), 'content': self.read(*GAME)})
+        self.assertEqual(status, 200)
+
+    def test_paths_outside_the_project_are_forbidden(self):
+        sibling = self.root + '-evil'
+        for path in ('../outside.md', os.path.join(sibling, 'x.md'), os.path.join(self.workdir, 'x.md'), self.root):
+            with self.subTest(path=path):
+                status, _ = self.post('/api/save', {'path': path, 'content': 'x'})
+                self.assertEqual(status, 403)
+        self.assertEqual(os.listdir(self.workdir), ['eco'])
+
+class BatchTest(ServerTestCase):
+
+    def test_failed_step_rolls_back_the_whole_batch(self):
+        before = self.read(*GAME)
+        # A file where the create below needs a folder makes that step fail after the others applied
+        blocker = self.write(('Concepts', 'Blocked'), 'not a folder')
+        try:
+            status, body = self.post('/api/batch', {'operations': [
+                {'op': 'save', 'path': self.path(*GAME), 'content': 'changed'},
+                {'op': 'create', 'type': 'game', 'category': 'Fresh', 'name': 'Rollback One'},
+                {'op': 'create', 'type': 'game', 'category': 'Blocked', 'name': 'Rollback Two'},
+            ]})
+        finally:
+            os.remove(blocker)
+        self.assertEqual(status, 500)
+        self.assertEqual([r['status'] for r in body['results']], ['rolled_back', 'rolled_back', 'failed'])
+        self.assertEqual(self.read(*GAME), before)
+        self.assertFalse(os.path.exists(self.path('Concepts', 'Fresh')))
+        self.assertFalse([name for name in os.listdir(self.root) if name.startswith('.eco-batch-')])
+
+    def test_stale_base_version_writes_nothing(self):
+        status, body = self.post('/api/batch', {'operations': [
+            {'op': 'create', 'type': 'game', 'category': 'Mobility', 'name': 'Batch Conflict'},
+            {'op': 'save', 'path': self.path(*GAME), 'content': 'lost', 'baseVersion': 'stale'},
+        ]})
+        self.assertEqual(status, 409)
+        self.assertEqual([r['status'] for r in body['results']], ['skipped', 'conflict'])
+        self.assertFalse(os.path.exists(self.path('Concepts', 'Mobility', 'Games', 'BatchConflict.md')))
+
+    def test_path_outside_the_project_rejects_the_batch(self):
+        status, body = self.post('/api/batch', {'operations': [
+            {'op': 'create', 'type': 'game', 'category': 'Mobility', 'name': 'Batch Traversal'},
+            {'op': 'save', 'path': '../outside.md', 'content': 'x'},
+            {'op': 'delete', 'path': self.root + '-evil'},
+        ]})
+        self.assertEqual(status, 400)
+        self.assertEqual([r['status'] for r in body['results']], ['skipped', 'invalid', 'invalid'])
+        self.assertFalse(os.path.exists(self.path('Concepts', 'Mobility', 'Games', 'BatchTraversal.md')))
+        self.assertEqual(os.listdir(self.workdir), ['eco'])
+
+class DeleteTest(ServerTestCase):
+
+    def test_paths_outside_the_project_are_forbidden(self):
+        sibling = os.path.join(self.root + '-evil', 'x.md')
+        os.makedirs(os.path.dirname(sibling))
+        with open(sibling, 'w') as f:
+            f.write('x')
+        for path in (sibling, '../eco-evil/x.md', self.root):
+            with self.subTest(path=path):
+                status, _ = self.post('/api/delete', {'path': path})
+                self.assertEqual(status, 403)
+        self.assertTrue(os.path.exists(sibling))
+        self.assertTrue(os.path.exists(self.path(*GAME)))
+
+    def test_relative_path_resolves_against_the_project(self):
+        path = self.write(('Concepts', 'Mobility', 'Games', 'DeleteMe.md'), '---\ntitle: Delete Me\n---\n')
+        status, _ = self.post('/api/delete', {'path': 'Concepts/Mobility/Games/DeleteMe.md'})
+        self.assertEqual(status, 200)
+        self.assertFalse(os.path.exists(path))
+
+class ImportExportTest(ServerTestCase):
+
+    def test_round_trip(self):
+        class_file = ('Saved Classes', 'Pressure.json')
+        game_file = ('Concepts', 'Standing', 'Games', 'ApeHangersingleleg.md')
+        originals = {parts: self.read(*parts) for parts in (class_file, game_file)}
+
+        with urllib.request.urlopen(self.base_url + '/api/export?class=Pressure&gzip=1', timeout=10) as response:
+            archive = response.read()
+
+        for parts in originals:
+            self.write(parts, 'edited since the export\n')
+        status, body = self.post('/api/import', archive, 'application/gzip')
+        self.assertEqual(status, 409)
+        self.assertEqual(self.read(*class_file), 'edited since the export\n')
+
+        status, body = self.post('/api/import?overwrite=1', archive, 'application/gzip')
+        self.assertEqual(status, 200)
+        statuses = {r['path']: r['status'] for r in body['results']}
+        self.assertEqual(statuses['/'.join(class_file)], 'written')
+        self.assertEqual(statuses['/'.join(game_file)], 'written')
+        for parts, text in originals.items():
+            self.assertEqual(self.read(*parts), text)
+
+        status, body = self.post('/api/import', archive, 'application/gzip')
+        self.assertEqual(status, 200)
+        self.assertEqual({r['status'] for r in body['results']}, {'unchanged'})
+
+    def test_tampered_archive_is_rejected(self):
+        with urllib.request.urlopen(self.base_url + '/api/export?class=Pressure', timeout=10) as response:
+            archive = bytearray(response.read())
+        # Flip a byte inside the first member's data (after its 512-byte header)
+        archive[600] ^= 0xFF
+        status, body = self.post('/api/import?overwrite=1', bytes(archive), 'application/x-tar')
+        self.assertEqual(status, 400)
+        self.assertIn(b'Hash mismatch', body)
+
+if __name__ == '__main__':
+    unittest.main()